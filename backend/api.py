@@ -1,12 +1,11 @@
 import os
-from typing import List, Dict, Any, Tuple, Optional, TypedDict, Annotated
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import concurrent.futures
+import time
+from typing import List, Dict, Any, Tuple, Optional, TypedDict, Annotated, Callable, Awaitable
 import json
 from datetime import datetime
-import re
 from langchain.vectorstores import FAISS
-from langchain.embeddings import HuggingFaceEmbeddings
 from langchain.schema import Document
 import os
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, FunctionMessage
@@ -15,9 +14,25 @@ from langchain.tools import tool
 from langchain_core.prompts import ChatPromptTemplate
 from langgraph.graph import StateGraph, END
 from langchain_core.runnables import RunnablePassthrough
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from dotenv import load_dotenv
 import logging
+
+try:
+    from .embeddings import get_embedding_service
+    from .fetcher import Fetcher
+    from .extraction import parse_listing_page, parse_article_page, run_extraction
+    from .keyword_scorer import score_articles
+    from .structured_output import generate_structured, StructuredOutputError
+    from .context_budget import ensure_token_counts, pack_summaries, report_item
+except ImportError:
+    from embeddings import get_embedding_service
+    from fetcher import Fetcher
+    from extraction import parse_listing_page, parse_article_page, run_extraction
+    from keyword_scorer import score_articles
+    from structured_output import generate_structured, StructuredOutputError
+    from context_budget import ensure_token_counts, pack_summaries, report_item
+
 logger = logging.getLogger(__name__)
 
 load_dotenv()
@@ -297,6 +312,111 @@ NEWS_SOURCES = [
 ]
 # Define a new tool to scrape only specific articles
 
+def fallback_article(source: Dict[str, str], url: str) -> Dict[str, Any]:
+    """Minimal placeholder for an article page that couldn't be fetched or parsed"""
+    return {
+        "source": source["name"],
+        "source_type": source.get("type", "news"),
+        "title": f"Climate risk article from {source['name']}",
+        "url": url,
+        "date": datetime.now().strftime("%Y-%m-%d"),
+        "content": f"This article discusses climate risk implications for the insurance industry, particularly regarding physical risks, transition risks, and regulatory frameworks affecting {', '.join(['property insurance', 'casualty insurance', 'reinsurance'])}.",
+        "category": "Climate Risk"
+    }
+
+async def fetch_article(fetcher: Fetcher, source: Dict[str, str], article_meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Fetch and parse one article page, falling back to a placeholder on errors"""
+    url = article_meta["url"]
+    try:
+        print(f"Scraping article: {url}")
+        result = await fetcher.fetch(url)
+        # Parse in the extraction pool so other fetches keep flowing
+        article = await run_extraction(parse_article_page, result.content, source, article_meta)
+        print(f"Successfully scraped article: {article['title']}")
+        return article
+    except Exception as e:
+        print(f"Error scraping article {url}: {str(e)}")
+        return fallback_article(source, url)
+
+async def crawl_source(
+    fetcher: Fetcher,
+    source: Dict[str, str],
+    url_filter: Optional[Callable[[List[str]], Awaitable[List[str]]]] = None,
+    link_parser: Callable[[Dict[str, str], bytes], List[Dict[str, Any]]] = parse_listing_page
+) -> List[Dict[str, Any]]:
+    """Fetch a source's listing page, then all of its article pages concurrently"""
+    try:
+        print(f"Scraping {source['name']} from {source['url']}")
+        listing = await fetcher.fetch(source["url"])
+        articles_data = await run_extraction(link_parser, source, listing.content)
+    except Exception as e:
+        print(f"Error scraping source {source['name']}: {str(e)}")
+        return []
+    
+    if url_filter:
+        # One batched check per listing page
+        wanted = set(await url_filter([article_data["url"] for article_data in articles_data]))
+        articles_data = [article_data for article_data in articles_data if article_data["url"] in wanted]
+    print(f"Found {len(articles_data)} article links from {source['name']}")
+    
+    # Article fetches start as soon as this listing is parsed, while other
+    # sources' listings are still loading
+    return await asyncio.gather(*(fetch_article(fetcher, source, meta) for meta in articles_data))
+
+async def crawl_news_sources(
+    sources: Optional[List[Dict[str, str]]] = None,
+    url_filter: Optional[Callable[[List[str]], Awaitable[List[str]]]] = None,
+    link_parser: Callable[[Dict[str, str], bytes], List[Dict[str, Any]]] = parse_listing_page
+) -> List[Dict[str, Any]]:
+    """
+    Crawl news sources concurrently through one shared fetcher
+    
+    Args:
+        sources: Optional list of source dictionaries (defaults to NEWS_SOURCES)
+        url_filter: Optional async function given a listing page's article URLs that returns the ones to fetch
+        link_parser: Function extracting article links from a listing page
+        
+    Returns:
+        List of scraped articles, grouped by source in input order
+    """
+    if sources is None:
+        sources = NEWS_SOURCES
+    
+    start = time.perf_counter()
+    async with Fetcher() as fetcher:
+        per_source = await asyncio.gather(
+            *(crawl_source(fetcher, source, url_filter, link_parser) for source in sources)
+        )
+        fetch_stats = dict(fetcher.stats)
+    
+    all_articles = [article for articles in per_source for article in articles]
+    print(f"Total articles scraped: {len(all_articles)} in {time.perf_counter() - start:.1f}s ({fetch_stats})")
+    return all_articles
+
+async def crawl_articles(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fetch specific article URLs concurrently through one shared fetcher"""
+    async with Fetcher() as fetcher:
+        scraped_articles = await asyncio.gather(*(
+            fetch_article(
+                fetcher,
+                {"name": article_info.get("source", "Unknown"), "type": article_info.get("source_type", "news")},
+                {"url": article_info.get("url"), "title": article_info.get("title"), "published_date": article_info.get("date")}
+            )
+            for article_info in articles
+        ))
+    
+    print(f"Total articles scraped: {len(scraped_articles)}")
+    return list(scraped_articles)
+
+def run_coroutine_sync(coro):
+    """Run a coroutine from synchronous code, even if this thread already runs an event loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
 @tool
 def scrape_specific_articles(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
@@ -308,172 +428,8 @@ def scrape_specific_articles(articles: List[Dict[str, Any]]) -> List[Dict[str, A
     Returns:
         List of dictionaries containing scraped articles with full content
     """
-    scraped_articles = []
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
-    for article_info in articles:
-        url = article_info.get("url")
-        source = article_info.get("source", "Unknown")
-        source_type = article_info.get("source_type", "news")
-        
-        try:
-            print(f"Scraping article: {url}")
-            article_response = requests.get(url, headers=headers, timeout=15)
-            article_response.raise_for_status()
-            article_soup = BeautifulSoup(article_response.content, 'html.parser')
-            
-            # Extract title if not already provided
-            title = article_info.get("title")
-            if not title or title == "Unknown Title":
-                # Try multiple strategies to find the title
-                title_candidates = []
-                
-                # Strategy 1: Look for article title in common heading elements
-                for heading in ['h1', 'h2']:
-                    headings = article_soup.find_all(heading)
-                    for h in headings:
-                        # Skip very short headings and navigation elements
-                        text = h.get_text(strip=True)
-                        if len(text) > 10 and text not in ["News & Media", "Learn More", "Navigation"]:
-                            title_candidates.append(text)
-                
-                # Strategy 2: Look for elements with title classes
-                title_classes = article_soup.find_all(class_=lambda c: c and ('title' in c.lower() if c else False))
-                for t in title_classes:
-                    text = t.get_text(strip=True)
-                    if len(text) > 10:
-                        title_candidates.append(text)
-                
-                # Strategy 3: Use page title as fallback
-                if article_soup.title:
-                    title_candidates.append(article_soup.title.string)
-                
-                # Select the best title (longest, non-generic)
-                if title_candidates:
-                    # Filter out generic titles
-                    filtered_titles = [t for t in title_candidates if t not in ["News & Media", "Learn More", "Home", "Dashboard"]]
-                    if filtered_titles:
-                        # Select longest remaining title
-                        title = max(filtered_titles, key=len)
-                    else:
-                        title = max(title_candidates, key=len)
-                else:
-                    # Default to a source-based title if nothing else works
-                    title = f"Article from {source}"
-            
-            # Extract content with source-specific strategies
-            content = ""
-            
-            # Generic content extraction strategies
-            # Strategy 1: Look for main content containers
-            content_container = article_soup.find(['div', 'article'], 
-                                            class_=lambda c: c and ('content' in c.lower() or 
-                                                                    'article' in c.lower() or 
-                                                                    'body' in c.lower() if c else False))
-            if content_container:
-                paragraphs = content_container.find_all('p')
-                content = " ".join([p.get_text(strip=True) for p in paragraphs])
-            
-            # Strategy 2: If no content found, try looking for article text in main element
-            if not content or len(content) < 100:
-                article_element = article_soup.find(['article', 'main'])
-                if article_element:
-                    paragraphs = article_element.find_all('p')
-                    content = " ".join([p.get_text(strip=True) for p in paragraphs])
-            
-            # Strategy 3: Fallback to all paragraphs
-            if not content or len(content) < 100:
-                paragraphs = article_soup.find_all('p')
-                content = " ".join([p.get_text(strip=True) for p in paragraphs])
-                
-            # Strategy 4: Last resort - extract all text and clean it up
-            if not content or len(content) < 100:
-                # Get all text but exclude scripts, styles, and navigation
-                for script in article_soup(["script", "style", "nav", "header", "footer"]):
-                    script.extract()
-                
-                content = article_soup.get_text(separator=' ', strip=True)
-                # Clean up whitespace
-                content = re.sub(r'\s+', ' ', content)
-                # Limit length for processing
-                content = content[:5000]
-            
-            # Extract date with multiple strategies
-            date = article_info.get("date")
-            if not date:
-                # Try different date patterns
-                date_patterns = [
-                    ['time'],  # HTML5 time element
-                    ['span', 'div', 'p'], {'class': lambda c: c and ('date' in c.lower() or 'time' in c.lower() if c else False)},
-                    ['span', 'div', 'p'], {'itemprop': 'datePublished'},
-                    ['meta'], {'property': 'article:published_time'}
-                ]
-                
-                for pattern in date_patterns:
-                    if len(pattern) == 1:
-                        date_tags = article_soup.find_all(pattern[0])
-                    else:
-                        date_tags = article_soup.find_all(pattern[0], **pattern[1])
-                    
-                    if date_tags:
-                        # First check for datetime attribute
-                        for tag in date_tags:
-                            if tag.has_attr('datetime'):
-                                date = tag['datetime']
-                                break
-                            elif tag.has_attr('content'):
-                                date = tag['content']
-                                break
-                        
-                        # If no datetime attribute, use text
-                        if not date and date_tags[0].text.strip():
-                            date = date_tags[0].text.strip()
-                        
-                        if date:
-                            break
-            
-            # If still no date, use current date
-            if not date:
-                date = datetime.now().strftime("%Y-%m-%d")
-            
-            # Ensure content is not empty
-            if not content or len(content) < 100:
-                # Create relevant fallback content based on source type
-                if "TNFD" in source:
-                    content = "This article discusses the Taskforce on Nature-related Financial Disclosures framework and its implications for insurance industry risk management related to climate and nature-based risks."
-                elif "UNFCCC" in source:
-                    content = "This article discusses United Nations climate change initiatives and their implications for insurance markets, particularly regarding adaptation finance and physical risk management."
-                elif "Insurance" in source:
-                    content = f"This article from {source} discusses insurance industry trends related to climate risk, including potential impacts on underwriting, pricing, and coverage availability in vulnerable regions."
-                else:
-                    content = f"This article from {source} contains information about climate risks and their implications for insurance markets and risk management practices."
-            
-            # Add the article to our collection
-            scraped_articles.append({
-                "source": source,
-                "source_type": source_type,
-                "title": title,
-                "url": url,
-                "date": date,
-                "content": content[:5000],  # Limit content length
-            })
-            print(f"Successfully scraped article: {title}")
-        except Exception as e:
-            print(f"Error scraping article {url}: {str(e)}")
-            # Add fallback article with minimal information
-            scraped_articles.append({
-                "source": source,
-                "source_type": source_type,
-                "title": f"Climate risk article from {source}",
-                "url": url,
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "content": f"This article discusses climate risk implications for the insurance industry, particularly regarding physical risks, transition risks, and regulatory frameworks affecting insurance domains.",
-            })
-    
-    print(f"Total articles scraped: {len(scraped_articles)}")
-    return scraped_articles
+    return run_coroutine_sync(crawl_articles(articles))
+
 # Tool to scrape news from sources
 @tool
 def scrape_news_sources(sources: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, Any]]:
@@ -486,526 +442,7 @@ def scrape_news_sources(sources: Optional[List[Dict[str, str]]] = None) -> List[
     Returns:
         List of dictionaries containing scraped articles with source, title, url, and content
     """
-    if sources is None:
-        sources = NEWS_SOURCES
-    
-    all_articles = []
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
-    for source in sources:
-        try:
-            print(f"Scraping {source['name']} from {source['url']}")
-            response = requests.get(source["url"], headers=headers, timeout=15)
-            response.raise_for_status()  # Raise exception for 4XX/5XX status codes
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find article links with source-specific selectors
-            article_links = []
-            articles_data = []  # For storing additional metadata
-            
-            # TNFD specific parsing
-            if source["name"] == "TNFD":
-                # Find all h3 elements with class 'entry-title mb-sm h4' containing links
-                title_elements = soup.find_all('h3', class_='entry-title mb-sm h4')
-                
-                for title_element in title_elements:
-                    # Get the anchor tag and its href
-                    link = title_element.find('a', href=True)
-                    if link:
-                        href = link['href']
-                        title = link.text.strip()
-                        
-                        # Make sure URL is absolute
-                        if not href.startswith('http'):
-                            base_url = '/'.join(source["url"].split('/')[:3])
-                            href = base_url + href if href.startswith('/') else base_url + '/' + href
-                        
-                        # Find associated content in div with class 'post-content'
-                        article_container = title_element.find_parent('article')
-                        
-                        # Get publication time if available
-                        posted_time = None
-                        if article_container:
-                            time_span = article_container.find('span', class_='posted-on')
-                            if time_span:
-                                time_tag = time_span.find('time')
-                                if time_tag:
-                                    posted_time = time_tag.get('datetime') or time_tag.text.strip()
-                        
-                        # Store the collected information
-                        article_links.append(href)
-                        articles_data.append({
-                            "url": href,
-                            "title": title,
-                            "published_date": posted_time
-                        })
-            
-            # UNFCCC specific parsing
-            elif source["name"] == "UNFCCC":
-                # Find div elements with class 'news'
-                news_divs = soup.find_all('div', class_='news')
-                for news_div in news_divs:
-                    links = news_div.find_all('a', href=True, attrs={'data-title': True})
-                    for link in links:
-                        href = link['href']
-                        title = link.get('data-title') or link.text.strip()
-                        
-                        if not href.startswith('http'):
-                            base_url = '/'.join(source["url"].split('/')[:3])
-                            href = base_url + href if href.startswith('/') else base_url + '/' + href
-                        
-                        article_links.append(href)
-                        articles_data.append({
-                            "url": href,
-                            "title": title,
-                            "published_date": None  # Will try to extract from article page
-                        })
-            
-            # CLIMATE CHANGE NEWS specific parsing
-            elif source["name"] == "CLIMATE CHANGE NEWS":
-                # Find post headers
-                post_headers = soup.find_all('div', class_='header-text')
-                for header in post_headers:
-                    # Find title and link
-                    title_elem = header.find('h3', class_='post__title')
-                    if title_elem:
-                        link = title_elem.find('a', href=True)
-                        if link:
-                            href = link['href']
-                            title = link.text.strip()
-                            
-                            if not href.startswith('http'):
-                                base_url = '/'.join(source["url"].split('/')[:3])
-                                href = base_url + href if href.startswith('/') else base_url + '/' + href
-                            
-                            # Extract date
-                            date_elem = header.find('div', class_='post__date')
-                            date = date_elem.text.strip() if date_elem else None
-                            
-                            # Extract category
-                            category_elem = header.find('div', class_='post__categories')
-                            category = None
-                            if category_elem:
-                                cat_link = category_elem.find('a')
-                                if cat_link:
-                                    category = cat_link.text.strip()
-                            
-                            article_links.append(href)
-                            articles_data.append({
-                                "url": href,
-                                "title": title,
-                                "published_date": date,
-                                "category": category
-                            })
-            
-            # Insurance Business Magazine specific parsing
-            elif source["name"] == "Insurance Business Magazine":
-                # For regular article items
-                article_items = soup.find_all('div', class_='article-list__item')
-                for item in article_items:
-                    title_elem = item.find('h3')
-                    if title_elem:
-                        link = title_elem.find('a', href=True)
-                        if link:
-                            href = link['href']
-                            title = link.text.strip()
-                            
-                            if not href.startswith('http'):
-                                base_url = '/'.join(source["url"].split('/')[:3])
-                                href = base_url + href if href.startswith('/') else base_url + '/' + href
-                            
-                            article_links.append(href)
-                            articles_data.append({
-                                "url": href,
-                                "title": title
-                            })
-                
-                # For header articles
-                header_articles = soup.find_all('div', class_='article-list__head__passage--news')
-                for header in header_articles:
-                    title_elem = header.find('h2')
-                    if title_elem:
-                        link = title_elem.find('a', href=True)
-                        if link:
-                            href = link['href']
-                            title = link.text.strip()
-                            
-                            if not href.startswith('http'):
-                                base_url = '/'.join(source["url"].split('/')[:3])
-                                href = base_url + href if href.startswith('/') else base_url + '/' + href
-                            
-                            article_links.append(href)
-                            articles_data.append({
-                                "url": href,
-                                "title": title
-                            })
-            
-            # Insurance Journal specific parsing
-            elif source["name"] == "Insurance Journal":
-                # Find article entries
-                entries = soup.find_all('div', class_='entry')
-                for entry in entries:
-                    title_elem = entry.find('h3')
-                    if title_elem:
-                        link = title_elem.find('a', href=True)
-                        if link:
-                            href = link['href']
-                            title = link.text.strip()
-                            
-                            if not href.startswith('http'):
-                                base_url = '/'.join(source["url"].split('/')[:3])
-                                href = base_url + href if href.startswith('/') else base_url + '/' + href
-                            
-                            # Extract date
-                            date_elem = entry.find('div', class_='entry-meta')
-                            date = date_elem.text.strip() if date_elem else None
-                            
-                            article_links.append(href)
-                            articles_data.append({
-                                "url": href,
-                                "title": title,
-                                "published_date": date
-                            })
-                
-                # Alternative structure with nav tabs
-                main_post_list = soup.find('div', class_='main-post-list')
-                if main_post_list:
-                    links = main_post_list.find_all('a', href=True)
-                    for link in links:
-                        href = link['href']
-                        title_elem = link.find('h6')
-                        if title_elem:
-                            title = title_elem.text.strip()
-                        else:
-                            title = link.text.strip()
-                        
-                        # Find metadata paragraph
-                        meta_p = link.find('p')
-                        date = None
-                        if meta_p and '|' in meta_p.text:
-                            # Format like "BY AMELIA DAVIDSON | 04/11/2025 06:46 AM EDT"
-                            meta_text = meta_p.text.strip()
-                            date_part = meta_text.split('|')[1].strip() if '|' in meta_text else None
-                            if date_part:
-                                date = date_part
-                        
-                        if not href.startswith('http'):
-                            base_url = '/'.join(source["url"].split('/')[:3])
-                            href = base_url + href if href.startswith('/') else base_url + '/' + href
-                        
-                        article_links.append(href)
-                        articles_data.append({
-                            "url": href,
-                            "title": title,
-                            "published_date": date
-                        })
-            
-            # WEADAPT specific parsing
-            elif source["name"] == "WEADAPT":
-                list_items = soup.find_all('div', class_='cpt-list-item__content')
-                for item in list_items:
-                    title_elem = item.find('h4', class_='cpt-list-item__title')
-                    if title_elem:
-                        link = title_elem.find('a', href=True)
-                        if link:
-                            href = link['href']
-                            title = link.text.strip()
-                            
-                            if not href.startswith('http'):
-                                base_url = '/'.join(source["url"].split('/')[:3])
-                                href = base_url + href if href.startswith('/') else base_url + '/' + href
-                            
-                            # Extract date
-                            date = None
-                            meta_list = item.find('ul', class_='post-meta')
-                            if meta_list:
-                                meta_items = meta_list.find_all('li', class_='post-meta__item')
-                                for meta_item in meta_items:
-                                    if meta_item.find('span', attrs={'aria-label': 'icon-calendar'}):
-                                        date_span = meta_item.find('span', class_='text')
-                                        if date_span:
-                                            date = date_span.text.strip()
-                            
-                            article_links.append(href)
-                            articles_data.append({
-                                "url": href,
-                                "title": title,
-                                "published_date": date
-                            })
-            
-            # UNEPFI specific parsing
-            elif source["name"] == "UNEPFI":
-                articles = soup.find_all('article', class_=lambda c: c and 'd-sm-flex' in c)
-                for article in articles:
-                    link = article.find('a', href=True)
-                    if link:
-                        href = link['href']
-                        title_elem = article.find('h5')
-                        title = title_elem.text.strip() if title_elem else link.text.strip()
-                        
-                        if not href.startswith('http'):
-                            base_url = '/'.join(source["url"].split('/')[:3])
-                            href = base_url + href if href.startswith('/') else base_url + '/' + href
-                        
-                        article_links.append(href)
-                        articles_data.append({
-                            "url": href,
-                            "title": title
-                        })
-            
-            # GENEVA ASSOCIATION specific parsing
-            elif source["name"] == "GENEVA ASSOCIATION":
-                cards = soup.find_all('div', class_=lambda c: c and 'card shadow-sm views-row' in c)
-                for card in cards:
-                    link = card.find('a', href=True)
-                    if link:
-                        href = link['href']
-                        title_elem = card.find('h3')
-                        title = title_elem.text.strip() if title_elem else link.text.strip()
-                        
-                        if not href.startswith('http'):
-                            base_url = '/'.join(source["url"].split('/')[:3])
-                            href = base_url + href if href.startswith('/') else base_url + '/' + href
-                        
-                        article_links.append(href)
-                        articles_data.append({
-                            "url": href,
-                            "title": title
-                        })
-            
-            # Generic fallback approach if no specific parser
-            else:
-                for a in soup.find_all('a', href=True):
-                    # Basic filtering for article links
-                    href = a['href']
-                    if ('news' in href or 'article' in href or 'press' in href) and not href.endswith(('.pdf', '.jpg', '.png')):
-                        if not href.startswith('http'):
-                            # Handle relative URLs
-                            base_url = '/'.join(source["url"].split('/')[:3])
-                            href = base_url + href if href.startswith('/') else base_url + '/' + href
-                        article_links.append(href)
-                        articles_data.append({
-                            "url": href,
-                            "title": a.text.strip() if a.text.strip() else "Unknown Title"
-                        })
-            
-            # Limit to avoid excessive scraping
-            article_links = list(set(article_links))[:5]
-            print(f"Found {len(article_links)} article links from {source['name']}")
-            
-            # Match article data with deduplicated links
-            filtered_articles_data = []
-            for link in article_links:
-                for article_data in articles_data:
-                    if article_data["url"] == link:
-                        filtered_articles_data.append(article_data)
-                        break
-            
-            # Update the individual article processing section inside the scrape_news_sources function
-
-# This code goes inside the loop for each source, after collecting article_links
-# and before the loop that processes each link
-
-# Replace the current article processing loop with this improved version:
-            for idx, link in enumerate(article_links):
-                try:
-                    print(f"Scraping article: {link}")
-                    article_response = requests.get(link, headers=headers, timeout=15)
-                    article_response.raise_for_status()
-                    article_soup = BeautifulSoup(article_response.content, 'html.parser')
-                    
-                    # Get stored metadata if available
-                    article_meta = filtered_articles_data[idx] if idx < len(filtered_articles_data) else {"url": link}
-                    
-                    # Extract title if not already retrieved or if it's a generic title
-                    title = article_meta.get("title")
-                    if not title or title == "Unknown Title" or title in ["News & Media", "Learn More"]:
-                        # Try multiple strategies to find the title
-                        title_candidates = []
-                        
-                        # Strategy 1: Look for article title in common heading elements
-                        for heading in ['h1', 'h2']:
-                            headings = article_soup.find_all(heading)
-                            for h in headings:
-                                # Skip very short headings and navigation elements
-                                text = h.get_text(strip=True)
-                                if len(text) > 10 and text not in ["News & Media", "Learn More", "Navigation"]:
-                                    title_candidates.append(text)
-                        
-                        # Strategy 2: Look for elements with title classes
-                        title_classes = article_soup.find_all(class_=lambda c: c and ('title' in c.lower() if c else False))
-                        for t in title_classes:
-                            text = t.get_text(strip=True)
-                            if len(text) > 10:
-                                title_candidates.append(text)
-                        
-                        # Strategy 3: Use page title as fallback
-                        if article_soup.title:
-                            title_candidates.append(article_soup.title.string)
-                        
-                        # Select the best title (longest, non-generic)
-                        if title_candidates:
-                            # Filter out generic titles
-                            filtered_titles = [t for t in title_candidates if t not in ["News & Media", "Learn More", "Home", "Dashboard"]]
-                            if filtered_titles:
-                                # Select longest remaining title
-                                title = max(filtered_titles, key=len)
-                            else:
-                                title = max(title_candidates, key=len)
-                        else:
-                            # Default to a source-based title if nothing else works
-                            title = f"Article from {source['name']}"
-                    
-                    # Extract content with source-specific strategies
-                    content = ""
-                    
-                    # TNFD specific content extraction
-                    if source["name"] == "TNFD":
-                        content_div = article_soup.find('div', class_='post-content')
-                        if content_div:
-                            paragraphs = content_div.find_all('p')
-                            content = " ".join([p.get_text(strip=True) for p in paragraphs])
-                    
-                    # UNFCCC specific content extraction
-                    elif source["name"] == "UNFCCC":
-                        # Try to find the main content container which often has article text
-                        main_content = article_soup.find('div', class_=lambda c: c and ('content' in c.lower() if c else False))
-                        if main_content:
-                            paragraphs = main_content.find_all('p')
-                            content = " ".join([p.get_text(strip=True) for p in paragraphs])
-                    
-                    # Insurance Business Magazine specific content extraction
-                    elif source["name"] == "Insurance Business Magazine":
-                        article_body = article_soup.find('div', class_=lambda c: c and ('article__body' in c if c else False))
-                        if article_body:
-                            paragraphs = article_body.find_all('p')
-                            content = " ".join([p.get_text(strip=True) for p in paragraphs])
-                    
-                    # Insurance Journal specific content extraction
-                    elif source["name"] == "Insurance Journal":
-                        article_body = article_soup.find('div', class_='entry-content')
-                        if article_body:
-                            paragraphs = article_body.find_all('p')
-                            content = " ".join([p.get_text(strip=True) for p in paragraphs])
-                    
-                    # Generic content extraction strategies if source-specific failed or for other sources
-                    if not content or len(content) < 100:
-                        # Strategy 1: Look for main content containers
-                        content_container = article_soup.find(['div', 'article'], 
-                                                        class_=lambda c: c and ('content' in c.lower() or 
-                                                                                'article' in c.lower() or 
-                                                                                'body' in c.lower() if c else False))
-                        if content_container:
-                            paragraphs = content_container.find_all('p')
-                            content = " ".join([p.get_text(strip=True) for p in paragraphs])
-                        
-                        # Strategy 2: If no content found, try looking for article text in main element
-                        if not content or len(content) < 100:
-                            article_element = article_soup.find(['article', 'main'])
-                            if article_element:
-                                paragraphs = article_element.find_all('p')
-                                content = " ".join([p.get_text(strip=True) for p in paragraphs])
-                        
-                        # Strategy 3: Fallback to all paragraphs
-                        if not content or len(content) < 100:
-                            paragraphs = article_soup.find_all('p')
-                            content = " ".join([p.get_text(strip=True) for p in paragraphs])
-                            
-                        # Strategy 4: Last resort - extract all text and clean it up
-                        if not content or len(content) < 100:
-                            # Get all text but exclude scripts, styles, and navigation
-                            for script in article_soup(["script", "style", "nav", "header", "footer"]):
-                                script.extract()
-                            
-                            content = article_soup.get_text(separator=' ', strip=True)
-                            # Clean up whitespace
-                            content = re.sub(r'\s+', ' ', content)
-                            # Limit length for processing
-                            content = content[:5000]
-                    
-                    # Extract date with multiple strategies
-                    date = article_meta.get("published_date")
-                    if not date:
-                        # Try different date patterns
-                        date_patterns = [
-                            ['time'],  # HTML5 time element
-                            ['span', 'div', 'p'], {'class': lambda c: c and ('date' in c.lower() or 'time' in c.lower() if c else False)},
-                            ['span', 'div', 'p'], {'itemprop': 'datePublished'},
-                            ['meta'], {'property': 'article:published_time'}
-                        ]
-                        
-                        for pattern in date_patterns:
-                            if len(pattern) == 1:
-                                date_tags = article_soup.find_all(pattern[0])
-                            else:
-                                date_tags = article_soup.find_all(pattern[0], **pattern[1])
-                            
-                            if date_tags:
-                                # First check for datetime attribute
-                                for tag in date_tags:
-                                    if tag.has_attr('datetime'):
-                                        date = tag['datetime']
-                                        break
-                                    elif tag.has_attr('content'):
-                                        date = tag['content']
-                                        break
-                                
-                                # If no datetime attribute, use text
-                                if not date and date_tags[0].text.strip():
-                                    date = date_tags[0].text.strip()
-                                
-                                if date:
-                                    break
-                    
-                    # If still no date, use current date
-                    if not date:
-                        date = datetime.now().strftime("%Y-%m-%d")
-                    
-                    # Ensure content is not empty
-                    if not content or len(content) < 100:
-                        # Create relevant fallback content based on source type
-                        if source["name"] == "TNFD":
-                            content = "This article discusses the Taskforce on Nature-related Financial Disclosures framework and its implications for insurance industry risk management related to climate and nature-based risks."
-                        elif source["name"] == "UNFCCC":
-                            content = "This article discusses United Nations climate change initiatives and their implications for insurance markets, particularly regarding adaptation finance and physical risk management."
-                        elif "Insurance" in source["name"]:
-                            content = f"This article from {source['name']} discusses insurance industry trends related to climate risk, including potential impacts on underwriting, pricing, and coverage availability in vulnerable regions."
-                        else:
-                            content = f"This article from {source['name']} contains information about climate risks and their implications for insurance markets and risk management practices."
-                    
-                    # Add the article to our collection
-                    all_articles.append({
-                        "source": source["name"],
-                        "source_type": source.get("type", "news"),
-                        "title": title,
-                        "url": link,
-                        "date": date,
-                        "content": content[:5000],  # Limit content length
-                        "category": article_meta.get("category", "Climate Risk")
-                    })
-                    print(f"Successfully scraped article: {title}")
-                except Exception as e:
-                    print(f"Error scraping article {link}: {str(e)}")
-                    # Add fallback article
-                    all_articles.append({
-                        "source": source["name"],
-                        "source_type": source.get("type", "news"),
-                        "title": f"Climate risk article from {source['name']}",
-                        "url": link,
-                        "date": datetime.now().strftime("%Y-%m-%d"),
-                        "content": f"This article discusses climate risk implications for the insurance industry, particularly regarding physical risks, transition risks, and regulatory frameworks affecting {', '.join(['property insurance', 'casualty insurance', 'reinsurance'])}.",
-                        "category": "Climate Risk"
-                    })
-
-        except Exception as e:
-            print(f"Error scraping source {source['name']}: {str(e)}")
-            continue
-    
-    print(f"Total articles scraped: {len(all_articles)}")
-    return all_articles
+    return run_coroutine_sync(crawl_news_sources(sources))
 
 # Tool to analyze articles for insurance relevance
 @tool
@@ -1021,78 +458,12 @@ def analyze_insurance_relevance(articles: List[Dict[str, Any]]) -> List[Dict[str
     """
     relevant_articles = []
     
-    # Insurance and climate risk related keywords - expanded based on source sites
-    insurance_keywords = [
-        "insurance", "reinsurance", "underwriting", "premium", "policy", "claim", 
-        "liability", "risk assessment", "insurtech", "property insurance", 
-        "casualty insurance", "life insurance", "health insurance", "chubb",
-        "insurer", "underwriter", "coverage", "deductible", "policyholder",
-        "indemnity", "actuarial", "loss ratio", "combined ratio", "catastrophe bond",
-        "parametric", "captive insurance", "commercial lines", "personal lines"
-    ]
-    
-    climate_keywords = [
-        "climate", "flood", "hurricane", "wildfire", "storm", "drought", "sea level",
-        "extreme weather", "natural disaster", "catastrophe", "TNFD", "ESG",
-        "sustainability", "carbon", "emissions", "global warming", "climate change",
-        "biodiversity", "nature-related", "disclosure", "resilience", "adaptation",
-        "mitigation", "physical risk", "transition risk", "TCFD", "ISSB", "net-zero",
-        "decarbonization", "climate-resilient", "nature loss", "nature positive"
-    ]
-    
-    # Source-specific keyword weighting
-    source_weights = {
-        "TNFD": 2.0,  # TNFD content is highly relevant
-        "UNFCCC": 1.8,  # UN Climate content is highly relevant
-        "Insurance Business Magazine": 1.5,  # Direct insurance industry source
-        "Insurance Journal": 1.5,  # Direct insurance industry source 
-        "WEADAPT": 1.3,  # Climate adaptation platform
-        "CLIMATE CHANGE NEWS": 1.3,  # Climate-focused news
-        "UNEPFI": 1.4,  # UN Environment Programme Finance Initiative
-        "GENEVA ASSOCIATION": 1.5  # Insurance and risk research
-    }
-    
-    for article in articles:
-        # Combine title and content for analysis, ensure they're strings
-        title = str(article.get("title", "")) if article.get("title") else ""
-        content = str(article.get("content", "")) if article.get("content") else ""
-        combined_text = (title + " " + content).lower()
-        
-        # Get source name and weight
-        source = article.get("source", "Unknown")
-        source_weight = source_weights.get(source, 1.0)
-        
-        # Count keyword matches with improved matching
-        insurance_score = sum(1 for keyword in insurance_keywords if keyword.lower() in combined_text)
-        climate_score = sum(1 for keyword in climate_keywords if keyword.lower() in combined_text)
-        
-        # Apply source-specific weighting
-        weighted_insurance_score = round(insurance_score * source_weight, 1)
-        weighted_climate_score = round(climate_score * source_weight, 1)
-        
-        # Additional scoring for category/type if available
-        if article.get("category") and isinstance(article.get("category"), str):
-            category = article.get("category", "").lower()
-            if any(term in category for term in ["insurance", "risk", "finance"]):
-                weighted_insurance_score += 2
-            if any(term in category for term in ["climate", "environment", "sustainability"]):
-                weighted_climate_score += 2
-        
-        # Only include articles with at least some relevance to both domains
-        # More lenient threshold for sources known to be highly relevant
-        min_insurance_threshold = 0 if source in ["TNFD", "UNFCCC", "UNEPFI"] else 1
-        min_climate_threshold = 0 if source in ["Insurance Business Magazine", "Insurance Journal"] else 1
-        
-        if weighted_insurance_score > min_insurance_threshold and weighted_climate_score > min_climate_threshold:
-            article["insurance_relevance"] = weighted_insurance_score
-            article["climate_relevance"] = weighted_climate_score
-            article["total_relevance"] = weighted_insurance_score + weighted_climate_score
+    # Keywords are matched with the precompiled scorer in a single batch
+    for article, scores in zip(articles, score_articles(articles)):
+        if scores:
+            article.update(scores)
             relevant_articles.append(article)
     
-    # Sort by relevance
-    #relevant_articles.sort(key=lambda x: x["total_relevance"], reverse=True)
-    
-    # Limit to top 20 for more comprehensive analysis
     return relevant_articles
 
 def filter_articles_with_faiss(query: str, articles: list, top_k: int = 20) -> list:
@@ -1108,7 +479,7 @@ def filter_articles_with_faiss(query: str, articles: list, top_k: int = 20) -> l
         List of most relevant articles
     """
     # Create embeddings for the articles
-    embedding_model = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+    embedding_model = get_embedding_service()
     
     # Create documents from articles
     docs = [
@@ -1143,30 +514,11 @@ def filter_articles_with_faiss(query: str, articles: list, top_k: int = 20) -> l
     
     return filtered_articles
 
-# Fix for the extract_structured_info function
-@tool
-def extract_structured_info(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def select_articles_for_extraction(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
-    Extract structured information from articles using LLM
-    
-    Args:
-        articles: List of relevant article dictionaries
-        
-    Returns:
-        List of dictionaries with structured information
+    Pick up to 20 articles for structured extraction: the closest matches for
+    each insurance domain, topped up with the highest total_relevance ones
     """
-    MAX_ARTICLE_TOKENS = 6000  # Conservative limit per article
-    total_tokens_needed = 0
-    articles_with_tokens = []
-
-    
-    
-    structured_info = []
-        
-    if not articles:
-        print("No articles provided for information extraction")
-        return []
-        
     domain_queries = [
             "property insurance climate risk",
             "casualty insurance climate liability",
@@ -1201,37 +553,98 @@ def extract_structured_info(articles: List[Dict[str, Any]]) -> List[Dict[str, An
             unique_articles.append(article)
             seen_urls.add(article.get("url", ""))
     
-    # Process the filtered articles
-    for article in unique_articles:
-        # Skip articles with insufficient content
-        if not article.get("content") or len(str(article.get("content", ""))) < 100:
-            print(f"Skipping article with insufficient content: {article.get('title', 'Unknown')}")
-            continue
+    return unique_articles
+
+def normalize_structured_info(info: Dict[str, Any], article: Dict[str, Any]) -> Dict[str, Any]:
+    """Attach article metadata to an extracted summary and fill in or validate its fields"""
+    # Add article metadata
+    info["article_title"] = article.get("title", "Unknown")
+    info["article_url"] = article.get("url", "Unknown")
+    info["source"] = article.get("source", "Unknown")
+    info["date"] = article.get("date", "Unknown")
+    info["insurance_relevance"] = article.get("insurance_relevance", 0)
+    info["climate_relevance"] = article.get("climate_relevance", 0)
+    info["total_relevance"] = article.get("total_relevance", 0)
+
+    # Ensure all expected fields exist
+    required_fields = ["key_event", "insurance_domains", "risk_factors", 
+                      "business_implications", "timeframe", "confidence",
+                      "geographic_focus", "regulatory_impact"]
+
+    for field in required_fields:
+        if field not in info:
+            if field in ["insurance_domains", "risk_factors"]:
+                info[field] = []
+            else:
+                info[field] = "Unknown"
+
+    # Validate insurance domains
+    valid_domains = ["property", "casualty", "life", "health", "reinsurance", "commercial", "personal"]
+    if isinstance(info["insurance_domains"], list):
+        info["insurance_domains"] = [domain.lower() for domain in info["insurance_domains"] 
+                                    if isinstance(domain, str)]
+        # Add at least one domain if none were identified
+        if not info["insurance_domains"]:
+            # Use source-specific default domain if no domains identified
+            if article.get("source") == "TNFD":
+                info["insurance_domains"] = ["property", "casualty"]
+            else:
+                info["insurance_domains"] = ["property"]  # Default if none identified
+    else:
+        # Handle case where it's not a list
+        info["insurance_domains"] = ["property"]
+
+    # Validate risk factors
+    if not isinstance(info["risk_factors"], list):
+        if isinstance(info["risk_factors"], str):
+            info["risk_factors"] = [info["risk_factors"]]
+        else:
+            info["risk_factors"] = ["Unknown risk"]
     
-        # Estimate token count (rough approximation: 4 chars per token)
-        content_length = len(str(article.get("content", "")))
-        title_length = len(str(article.get("title", "")))
-        estimated_tokens = (content_length + title_length) / 4
-        
-        # Track token counts
-        articles_with_tokens.append((article, estimated_tokens))
-        total_tokens_needed += estimated_tokens
+    # Stored with the summary so report packing doesn't re-tokenize it
+    ensure_token_counts([info])
+    return info
+
 
-    print(f"Estimated total tokens needed: {total_tokens_needed:.0f}, processing {len(articles_with_tokens)} articles")
+class ArticleSummary(BaseModel):
+    """What the LLM extracts from one article; the content fields of StructuredSummaryModel"""
+    key_event: str
+    insurance_domains: List[str]
+    risk_factors: List[str]
+    business_implications: str
+    timeframe: str
+    confidence: str
+    geographic_focus: Optional[str] = None
+    regulatory_impact: Optional[str] = None
 
-# If token count is too high, process in batches
-    batch_size = 1  # Start with single articles
-    if total_tokens_needed > MAX_ARTICLE_TOKENS:
-        # Sort articles by relevance
-        articles_with_tokens.sort(key=lambda x: x[0].get("total_relevance", 0), reverse=True)
-        print(f"Token count exceeds limit. Processing articles individually or in small batches.")
-        batch_size = 1
 
-    for article in unique_articles:
+async def aextract_structured_info(articles: List[Dict[str, Any]], chat_model: Any = None) -> List[Dict[str, Any]]:
+    """
+    Extract structured information from articles using LLM
+    
+    Articles are extracted concurrently through the shared LLM executor, so a
+    batch takes about as long as its slowest call.
+    
+    Args:
+        articles: List of relevant article dictionaries
+        chat_model: Optional chat model (defaults to the module LLM)
+        
+    Returns:
+        List of dictionaries with structured information
+    """
+    model = chat_model or llm
+        
+    if not articles:
+        print("No articles provided for information extraction")
+        return []
+        
+    unique_articles = await asyncio.to_thread(select_articles_for_extraction, articles)
+    
+    async def extract_one(article: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         # Skip articles with insufficient content
         if not article.get("content") or len(str(article.get("content", ""))) < 100:
             print(f"Skipping article with insufficient content: {article.get('title', 'Unknown')}")
-            continue
+            return None
         
         # Rest of the function remains the same as original
         # Ensure content is a string
@@ -1280,22 +693,7 @@ def extract_structured_info(articles: List[Dict[str, Any]]) -> List[Dict[str, An
             5. Potential losses or exposures
             
             Pay special attention to specific climate risks (e.g., floods, wildfires, storms), regulatory 
-            frameworks (e.g., TNFD, TCFD, ISSB), and insurance products or processes mentioned.
-            
-            Generate a summary report based on the extracted information from news articles.
-    
-    YOUR RESPONSE MUST BE VALID JSON with the following structure:
-    {
-      "Executive Summary": "brief overview text",
-      "Key Climate Risk Developments": "list of developments",
-      "Insurance Domain Impacts": "domain specific impacts",
-      "Regional Insights": "regional variations",
-      "Regulatory Landscape": "regulatory changes",
-      "Business Implications": "business implications",
-      "Recommended Actions": "specific action steps"
-    }
-    
-    Do not include any explanations or text outside the JSON structure."""),
+            frameworks (e.g., TNFD, TCFD, ISSB), and insurance products or processes mentioned."""),
             HumanMessage(content=f"""
             Source: {article.get('source', 'Unknown')}
             Title: {article.get('title', 'Unknown')}
@@ -1325,89 +723,35 @@ def extract_structured_info(articles: List[Dict[str, Any]]) -> List[Dict[str, An
         
         try:
             print(f"Extracting info from article: {article.get('title', 'Unknown')}")
-            result = llm.invoke([m for m in prompt.invoke({"article": article}).messages])
-            content = result.content
-            
-            # Clean up the JSON string
-            # First try to extract JSON if it's in markdown code blocks
-            json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', content)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                # Otherwise assume the whole content is JSON
-                json_str = content
-                
-            # Clean up the JSON string - remove any markdown formatting completely
-            json_str = re.sub(r'```.*?```', '', json_str, flags=re.DOTALL)
-            json_str = re.sub(r'```', '', json_str)
-            
-            # Look for JSON object boundaries to handle cases where there's text before/after
-            json_obj_match = re.search(r'(\{[\s\S]*\})', json_str)
-            if json_obj_match:
-                json_str = json_obj_match.group(1)
+            summary = await generate_structured(model, prompt.invoke({"article": article}).messages, ArticleSummary)
+            info = normalize_structured_info(summary.model_dump(), article)
             
-            # Parse the JSON
-            try:
-                info = json.loads(json_str)
-                
-                # Add article metadata
-                info["article_title"] = article.get("title", "Unknown")
-                info["article_url"] = article.get("url", "Unknown")
-                info["source"] = article.get("source", "Unknown")
-                info["date"] = article.get("date", "Unknown")
-                info["insurance_relevance"] = article.get("insurance_relevance", 0)
-                info["climate_relevance"] = article.get("climate_relevance", 0)
-                info["total_relevance"] = article.get("total_relevance", 0)
-                
-                # Ensure all expected fields exist
-                required_fields = ["key_event", "insurance_domains", "risk_factors", 
-                                  "business_implications", "timeframe", "confidence",
-                                  "geographic_focus", "regulatory_impact"]
-                
-                for field in required_fields:
-                    if field not in info:
-                        if field in ["insurance_domains", "risk_factors"]:
-                            info[field] = []
-                        else:
-                            info[field] = "Unknown"
-                
-                # Validate insurance domains
-                valid_domains = ["property", "casualty", "life", "health", "reinsurance", "commercial", "personal"]
-                if isinstance(info["insurance_domains"], list):
-                    info["insurance_domains"] = [domain.lower() for domain in info["insurance_domains"] 
-                                                if isinstance(domain, str)]
-                    # Add at least one domain if none were identified
-                    if not info["insurance_domains"]:
-                        # Use source-specific default domain if no domains identified
-                        if source == "TNFD":
-                            info["insurance_domains"] = ["property", "casualty"]
-                        else:
-                            info["insurance_domains"] = ["property"]  # Default if none identified
-                else:
-                    # Handle case where it's not a list
-                    info["insurance_domains"] = ["property"]
-                
-                # Validate risk factors
-                if not isinstance(info["risk_factors"], list):
-                    if isinstance(info["risk_factors"], str):
-                        info["risk_factors"] = [info["risk_factors"]]
-                    else:
-                        info["risk_factors"] = ["Unknown risk"]
-                
-                structured_info.append(info)
-                print(f"Successfully extracted info from: {article.get('title', 'Unknown')}")
-            except json.JSONDecodeError as e:
-                print(f"JSON parsing error: {str(e)}")
-                print(f"Problematic JSON string: {json_str[:100]}...")
-                # Try one more approach - use regex to find key-value pairs
-                continue
+            print(f"Successfully extracted info from: {article.get('title', 'Unknown')}")
+            return info
                 
         except Exception as e:
             print(f"Error extracting info from {article.get('title', 'Unknown')}: {str(e)}")
-            continue
+            return None
+    
+    print(f"Extracting structured info from {len(unique_articles)} articles")
+    results = await asyncio.gather(*(extract_one(article) for article in unique_articles))
+    structured_info = [info for info in results if info]
     
     print(f"Total structured summaries extracted: {len(structured_info)}")
     return structured_info
+
+@tool
+def extract_structured_info(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Extract structured information from articles using LLM
+    
+    Args:
+        articles: List of relevant article dictionaries
+        
+    Returns:
+        List of dictionaries with structured information
+    """
+    return run_coroutine_sync(aextract_structured_info(articles))
     
 
 
@@ -1418,6 +762,25 @@ def extract_structured_info(articles: List[Dict[str, Any]]) -> List[Dict[str, An
 
 # Improved JSON parsing function for generate_summary_reports
 
+class SummaryReport(BaseModel):
+    executive_summary: str = Field(alias="Executive Summary")
+    key_developments: str = Field(alias="Key Climate Risk Developments")
+    domain_impacts: str = Field(alias="Insurance Domain Impacts")
+    regional_insights: str = Field(alias="Regional Insights")
+    regulatory_landscape: str = Field(alias="Regulatory Landscape")
+    business_implications: str = Field(alias="Business Implications")
+    recommended_actions: str = Field(alias="Recommended Actions")
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def flatten_section(cls, value):
+        # Sections are plain text; fold lists and nested sections into it
+        if isinstance(value, list):
+            return "\n\n".join(str(item) for item in value)
+        if isinstance(value, dict):
+            return "\n\n".join(f"**{key}:**\n{item}" for key, item in value.items())
+        return value
+
 def create_fallback_report(error_message="Error in report generation"):
     """Create a fallback report when normal processing fails"""
     return {
@@ -1436,8 +799,13 @@ def create_fallback_report(error_message="Error in report generation"):
     }
 
 @tool
-def generate_summary_reports(structured_info, llm=None):
-    """Generate summary reports from structured information"""
+def generate_summary_reports(structured_info, llm=None, on_section_text=None, on_sections_reset=None):
+    """Generate summary reports from structured information.
+
+    on_section_text, if given, is called with (section, text) as each report
+    section streams in from the model. on_sections_reset is called when the
+    model's response is regenerated and the streamed sections start over.
+    """
     # Basic validation
     if not structured_info:
         logger.warning("No structured information to summarize")
@@ -1464,7 +832,7 @@ def generate_summary_reports(structured_info, llm=None):
 
         # Process themes using vector search
         themes = {}
-        embedding_model = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+        embedding_model = get_embedding_service()
         
         for domain, domain_info in domains.items():
             if not domain_info:
@@ -1533,25 +901,8 @@ def generate_summary_reports(structured_info, llm=None):
         for source, items in source_groups.items():
             items.sort(key=lambda x: x.get("total_relevance", 0), reverse=True)
         
-        # Prepare clean data for LLM prompt
-        cleaned_info = []
-        for info in structured_info:
-            # Create a clean copy with only essential fields
-            clean_item = {
-                "key_event": info.get("key_event", "Unknown"),
-                "insurance_domains": info.get("insurance_domains", []),
-                "risk_factors": info.get("risk_factors", []),
-                "business_implications": info.get("business_implications", "Unknown"),
-                "timeframe": info.get("timeframe", "Unknown"),
-                "confidence": info.get("confidence", "Unknown"),
-                "geographic_focus": info.get("geographic_focus", "Unknown"),
-                "regulatory_impact": info.get("regulatory_impact", "Unknown"),
-                "source": info.get("source", "Unknown"),
-                "article_title": info.get("article_title", "Unknown"),
-                "date": info.get("date", "Unknown"),
-                "total_relevance": info.get("total_relevance", 0)
-            }
-            cleaned_info.append(clean_item)
+        # Fit the most useful summaries into the prompt's token budget
+        cleaned_info = [report_item(info) for info in pack_summaries(structured_info)]
 
         # Prepare theme statistics
         theme_stats = {
@@ -1626,47 +977,15 @@ def generate_summary_reports(structured_info, llm=None):
         
         # Generate report using LLM
         logger.info("Generating final summary report")
-        result = llm.invoke([m for m in prompt.invoke({}).messages])
-        content = result.content
-        
-        logger.info(f"Raw LLM response received, length: {len(content)} characters")
-        
-        # Parse JSON response
         try:
-            # Try direct JSON parsing first
-            report = json.loads(content)
-            logger.info("Successfully parsed JSON directly")
-        except json.JSONDecodeError:
-            # If direct parsing fails, extract JSON object
-            logger.info("Direct parsing failed, looking for JSON object")
-            json_obj_match = re.search(r'(\{[\s\S]*\})', content)
-            
-            if json_obj_match:
-                json_str = json_obj_match.group(1)
-                logger.info("Found JSON object, attempting to parse")
-                
-                try:
-                    # Clean up common issues and try again
-                    json_str = json_str.replace('\n', ' ')
-                    report = json.loads(json_str)
-                    logger.info("Successfully parsed extracted JSON")
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse extracted JSON: {str(e)}")
-                    return create_fallback_report(f"JSON parsing error: {str(e)}")
-            else:
-                logger.error("No JSON object found in response")
-                return create_fallback_report("No JSON object found in response")
-        
-        # Ensure all report fields are strings
-        for key, value in report.items():
-            if isinstance(value, (list, dict)):
-                if isinstance(value, list):
-                    report[key] = "\n\n".join(value)
-                elif isinstance(value, dict):
-                    formatted_text = ""
-                    for section_key, section_value in value.items():
-                        formatted_text += f"**{section_key}:**\n{section_value}\n\n"
-                    report[key] = formatted_text.strip()
+            summary = run_coroutine_sync(generate_structured(
+                llm, prompt.invoke({}).messages, SummaryReport,
+                on_field_text=on_section_text, on_reset=on_sections_reset
+            ))
+        except StructuredOutputError as e:
+            logger.error(f"Failed to parse summary report: {str(e)}")
+            return create_fallback_report(f"JSON parsing error: {str(e)}")
+        report = summary.model_dump(by_alias=True)
         
         # Add metadata
         report["generated_date"] = datetime.now().strftime("%Y-%m-%d")
@@ -1674,138 +993,12 @@ def generate_summary_reports(structured_info, llm=None):
         report["article_count"] = len(structured_info)
         report["source_distribution"] = source_stats["source_distribution"]
         
-        # Ensure all required sections exist as strings
-        required_sections = [
-            "Executive Summary", 
-            "Key Climate Risk Developments", 
-            "Insurance Domain Impacts",
-            "Regional Insights",
-            "Regulatory Landscape",
-            "Business Implications", 
-            "Recommended Actions"
-        ]
-        
-        for section in required_sections:
-            if section not in report:
-                report[section] = f"No data available for {section}"
-            elif not isinstance(report[section], str):
-                # Convert to string as a fallback
-                report[section] = str(report[section])
-        
         logger.info("Successfully generated final report")
         return report
         
     except Exception as e:
         logger.error(f"Error in report generation: {str(e)}")
         return create_fallback_report(f"Error in report generation: {str(e)}")
-# Helper functions for repairing JSON
-
-def fix_unescaped_quotes(json_str):
-    """Fix unescaped quotes in JSON string values"""
-    # This is a simple approach - a more robust solution would use a state machine
-    # to track whether we're inside a string value
-    
-    # Find all field patterns like "field": "value with "quotes" inside"
-    pattern = r'"([^"]+)":\s*"([^"]*)"([^"]*)"([^"]*)"'
-    
-    # Keep applying the fix until no more matches are found
-    prev_json = ""
-    while prev_json != json_str:
-        prev_json = json_str
-        
-        # Replace unescaped quotes with escaped quotes
-        json_str = re.sub(pattern, r'"\1": "\2\\"\3\\"\4"', json_str)
-    
-    return json_str
-
-def fix_newlines(json_str):
-    """Fix newlines in JSON string values"""
-    # Replace literal newlines in string values with \n
-    # This regex looks for string values and replaces newlines
-    pattern = r'"([^"\\]*(?:\\.[^"\\]*)*)"'
-    
-    def replace_newlines(match):
-        s = match.group(1)
-        s = s.replace('\n', '\\n')
-        return f'"{s}"'
-    
-    return re.sub(pattern, replace_newlines, json_str)
-
-def repair_json(json_str):
-    """More robust JSON repair for LLM outputs"""
-    try:
-        # Try using a simple approach first
-        return json.loads(json_str)
-    except:
-        print("Basic JSON parsing failed, attempting repairs")
-        # If we got here, we need a more aggressive approach
-        
-        # 1. Try fixing common JSON errors
-        
-        # Fix trailing commas before closing brackets
-        json_str = re.sub(r',\s*}', '}', json_str)
-        json_str = re.sub(r',\s*\]', ']', json_str)
-        
-        # Fix missing quotes around field names
-        json_str = re.sub(r'([{,])\s*([A-Za-z0-9_]+)\s*:', r'\1 "\2":', json_str)
-        
-        # Fix unescaped quotes in values
-        json_str = re.sub(r':\s*"([^"]*)"([^"]*)"([^"]*)"', r': "\1\\"\2\\"\3"', json_str)
-        
-        try:
-            # Try parsing with our fixes
-            return json.loads(json_str)
-        except:
-            print("JSON repair still failing, attempting manual extraction")
-            # 2. If all else fails, try to extract just the main sections we need
-            # This is very aggressive and might not work in all cases
-            fallback = {}
-            
-            # Try to extract each section separately
-            for section in ["Executive Summary", "Key Climate Risk Developments", 
-                           "Insurance Domain Impacts", "Regional Insights", 
-                           "Regulatory Landscape", "Business Implications", 
-                           "Recommended Actions"]:
-                
-                # Look for the section pattern
-                section_pattern = re.compile(r'"' + re.escape(section) + r'"\s*:\s*"((?:[^"\\]|\\.|"(?:[^"\\]|\\.)*")*)"', re.DOTALL)
-                match = section_pattern.search(json_str)
-                
-                if match:
-                    # Clean up the content (handle nested quotes)
-                    content = match.group(1).replace('\\"', '"')
-                    fallback[section] = content
-                else:
-                    # Second attempt with looser matching
-                    looser_pattern = re.compile(r'"' + re.escape(section) + r'"\s*:\s*(.+?)(?:,\s*"[^"]+"\s*:|$)', re.DOTALL)
-                    match = looser_pattern.search(json_str)
-                    if match:
-                        content = match.group(1).strip()
-                        # Remove outer quotes if present
-                        if content.startswith('"') and content.endswith('"'):
-                            content = content[1:-1]
-                        fallback[section] = content
-                    else:
-                        # If not found, provide a placeholder
-                        fallback[section] = f"No data available for {section}"
-            
-            # If we have at least some sections, return them
-            if fallback:
-                print(f"Extracted {len(fallback)} sections manually")
-                return fallback
-            
-            # 3. Complete failure - build a minimal valid response
-            print("Manual extraction failed, using emergency fallback")
-            return {
-                "Executive Summary": "JSON parsing error occurred. Using fallback report.",
-                "Key Climate Risk Developments": "Error processing climate risk data.",
-                "Insurance Domain Impacts": "No domain impact data available due to processing error.",
-                "Regional Insights": "Regional data unavailable.",
-                "Regulatory Landscape": "Regulatory data unavailable.",
-                "Business Implications": "Business implications data unavailable.",
-                "Recommended Actions": "1. Check system logs for errors\n2. Verify data sources\n3. Try running analysis again"
-            }
-
         
 # Update the scrape_step function to handle specific errors and parsing patterns
 def scrape_step(state: AgentState) -> AgentState:
@@ -1950,7 +1143,7 @@ def analyze_step(state: AgentState) -> AgentState:
         ]
         
         # Create FAISS index for articles
-        embedding_model = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+        embedding_model = get_embedding_service()
         docs = [
             Document(
                 page_content=article.get("content", ""),
@@ -2079,7 +1272,7 @@ def summarize_step(state: AgentState) -> AgentState:
         print("Using vector search to identify key themes in structured summaries")
         
         # Create vector embeddings for structured summaries
-        embedding_model = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+        embedding_model = get_embedding_service()
         
         # Group information by insurance domains
         domains = {
@@ -1,20 +1,19 @@
 # app.py - FIXED VERSION
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Query, status, Path, APIRouter, File, UploadFile
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Query, status, Path, APIRouter, File, UploadFile, Request
+from fastapi.responses import StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any, Optional, Union
-from pydantic import BaseModel, Field, field_serializer
+from typing import List, Dict, Any, Optional, Union, Callable
+from pydantic import BaseModel, Field, field_serializer, field_validator
 from datetime import datetime, timedelta
 import asyncio
 import json
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
+from pymongo import UpdateOne
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 import logging
-import requests
-from bs4 import BeautifulSoup
 from langchain.vectorstores import FAISS
-from langchain.embeddings import HuggingFaceEmbeddings
 from langchain.chains import LLMChain
 
 from langchain.schema import Document
@@ -26,9 +25,40 @@ from langchain_core.messages import SystemMessage, HumanMessage
 from fastapi.middleware.cors import CORSMiddleware
 import httpx
 import uuid
+import time
 from langchain.output_parsers import PydanticOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-import re
+
+try:
+    from .embeddings import get_embedding_service
+    from .vector_index import index_manager, ARTICLES_INDEX, SUMMARIES_INDEX, SUMMARIES_KEY_FIELD
+    from .http_cache import get_http_cache
+    from .extraction import shutdown_extraction_pool, extract_candidate_links
+    from .keyword_scorer import score_articles
+    from .near_dup import hasher as minhasher, cluster_near_duplicates
+    from .llm_executor import llm_executor
+    from .batch_prompting import extract_from_articles
+    from .structured_output import generate_structured, has_keys, parse_json, StructuredOutputError
+    from .context_budget import ensure_token_counts, pack_summaries
+    from .bulk_writes import bulk_write_chunked, upsert_op
+    from .dashboard_stats import DashboardStatsView, DASHBOARD_STATS_REFRESH_MINUTES
+    from .trend_rollups import refresh_rollups, window_totals, monthly_totals, month_keys, days_ago, DOMAINS as ROLLUP_DOMAINS
+    from .response_cache import CacheRule, ResponseCache, ResponseCacheMiddleware
+except ImportError:
+    from embeddings import get_embedding_service
+    from vector_index import index_manager, ARTICLES_INDEX, SUMMARIES_INDEX, SUMMARIES_KEY_FIELD
+    from http_cache import get_http_cache
+    from extraction import shutdown_extraction_pool, extract_candidate_links
+    from keyword_scorer import score_articles
+    from near_dup import hasher as minhasher, cluster_near_duplicates
+    from llm_executor import llm_executor
+    from batch_prompting import extract_from_articles
+    from structured_output import generate_structured, has_keys, parse_json, StructuredOutputError
+    from context_budget import ensure_token_counts, pack_summaries
+    from bulk_writes import bulk_write_chunked, upsert_op
+    from dashboard_stats import DashboardStatsView, DASHBOARD_STATS_REFRESH_MINUTES
+    from trend_rollups import refresh_rollups, window_totals, monthly_totals, month_keys, days_ago, DOMAINS as ROLLUP_DOMAINS
+    from response_cache import CacheRule, ResponseCache, ResponseCacheMiddleware
 
 
 # … after: app = FastAPI(...)
@@ -256,115 +286,44 @@ async def extract_esg_impacts_from_summaries(category=None):
     results.sort(key=lambda x: x["score"], reverse=True)
     
     return results
-async def generate_regulatory_frameworks(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """
-    Generate structured regulatory framework data from articles using AI
-    
-    Args:
-        articles: List of relevant articles
-        
-    Returns:
-        List of regulatory frameworks extracted from the articles
-    """
-    logger.info(f"Generating regulatory frameworks from {len(articles)} articles")
-    
-    # Filter articles that might mention regulatory frameworks
-    regulatory_keywords = ["regulation", "framework", "disclosure", "compliance", "TCFD", 
-                           "TNFD", "SEC", "EU Taxonomy", "ESG", "SFDR", "CSRD", "ISSB"]
-    
-    # Find articles mentioning regulation
-    regulatory_articles = []
+
+# Keywords that mark an article as a candidate for each generate_* extractor
+REGULATORY_KEYWORDS = ["regulation", "framework", "disclosure", "compliance", "TCFD", 
+                       "TNFD", "SEC", "EU Taxonomy", "ESG", "SFDR", "CSRD", "ISSB"]
+ESG_KEYWORDS = ["ESG", "environmental", "social", "governance", "sustainability", 
+                "climate justice", "biodiversity", "transition risk", "physical risk"]
+UNDERWRITING_KEYWORDS = ["underwriting", "premium", "pricing", "rate", "coverage", "capacity", 
+                         "risk assessment", "model", "catastrophe", "flood", "wildfire", "hurricane"]
+COVERAGE_KEYWORDS = ["coverage gap", "protection gap", "uninsured", "underinsured", 
+                     "economic loss", "insured loss", "take-up rate", "affordability"]
+
+def select_keyword_articles(articles: List[Dict[str, Any]], keywords: List[str], limit: int = 10) -> List[Dict[str, Any]]:
+    """The `limit` most relevant articles mentioning any of `keywords`"""
+    matching = []
     for article in articles:
         content = article.get("content", "").lower() + article.get("title", "").lower()
-        if any(keyword.lower() in content for keyword in regulatory_keywords):
-            regulatory_articles.append(article)
-    
-    if not regulatory_articles:
-        logger.warning("No articles found with regulatory content")
-        return []
-    
-    # Take most relevant articles
-    regulatory_articles = sorted(
-        regulatory_articles, 
-        key=lambda x: x.get("total_relevance", 0), 
-        reverse=True
-    )[:10]  # Limit to 10 most relevant articles
-    
-    # Generate structured data using LLM
-    frameworks = []
-    for article in regulatory_articles:
-        prompt = f"""
-        Extract regulatory framework information from this article about climate risk and insurance.
-        
-        ARTICLE:
-        Title: {article.get('title', '')}
-        Date: {article.get('date', '')}
-        Content: {article.get('content', '')[:4000]}
-        
-        Extract any mentioned regulatory frameworks (like TCFD, TNFD, SFDR, SEC Climate Rule) related to climate risk disclosure, 
-        reporting requirements, or compliance that would impact insurance companies.
-        
-        For each identified regulatory framework, provide:
-        1. Name of the framework
-        2. Description of what it requires
-        3. Status (emerging, established, or proposed)
-        4. Region affected (global, north_america, europe, asia_pacific, etc.)
-        5. Relevance score (1-10) for insurance industry
-        6. Implementation date (if mentioned)
-        7. Which insurance domains are affected (property, casualty, life, health, reinsurance)
-        
-        Return ONLY valid JSON in this format (array of frameworks):
-        [
-          {
-            "name": "Framework Name",
-            "description": "Brief description",
-            "status": "emerging|established|proposed",
-            "region": "global|europe|north_america|etc",
-            "relevance_score": 8.5,
-            "implementation_date": "YYYY-MM-DD",
-            "domains_affected": ["property", "casualty", "etc"]
-          }
-        ]
-        
-        If no frameworks are mentioned, return an empty array: []
-        """
-        
-        try:
-            system_msg = SystemMessage(content="You are an expert financial regulations analyst specializing in climate risk disclosure frameworks.")
-            human_msg = HumanMessage(content=prompt)
-            
-            response = llm.invoke([system_msg, human_msg])
-            content = response.content
-            
-            # Extract JSON from response
-            json_pattern = r'```(?:json)?\s*([\s\S]*?)\s*```'
-            import re
-            json_match = re.search(json_pattern, content)
-            
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                # Try to find JSON object directly
-                json_str = content
-                
-            try:
-                extracted_frameworks = json.loads(json_str)
-                if isinstance(extracted_frameworks, list):
-                    # Add source info
-                    for framework in extracted_frameworks:
-                        framework["source_article_id"] = article.get("id", "")
-                        framework["source_article_title"] = article.get("title", "")
-                        framework["source"] = article.get("source", "")
-                        
-                    frameworks.extend(extracted_frameworks)
-                    logger.info(f"Extracted {len(extracted_frameworks)} frameworks from article: {article.get('title', '')}")
-                
-            except json.JSONDecodeError:
-                logger.error(f"Failed to parse JSON from LLM response for article: {article.get('title', '')}")
-        
-        except Exception as e:
-            logger.error(f"Error generating regulatory frameworks: {str(e)}")
-    
+        if any(keyword.lower() in content for keyword in keywords):
+            matching.append(article)
+    
+    return sorted(matching, key=lambda x: x.get("total_relevance", 0), reverse=True)[:limit]
+
+def tag_source_article(items: List[Dict[str, Any]], article: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Add source info to frameworks, ESG impacts or coverage gaps extracted from an article"""
+    for item in items:
+        item["source_article_id"] = article.get("id", "")
+        item["source_article_title"] = article.get("title", "")
+        item["source"] = article.get("source", "")
+    return items
+
+def tag_challenges(challenges: List[Dict[str, Any]], article: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Add source info and a unique ID to underwriting challenges extracted from an article"""
+    for i, challenge in enumerate(challenges):
+        challenge["id"] = f"{article.get('id', 'article')}_{i}"
+        challenge["source"] = article.get("source", "Unknown")
+        challenge["date"] = article.get("date", datetime.now().strftime("%Y-%m-%d"))
+    return challenges
+
+def dedupe_frameworks(frameworks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     # Deduplicate frameworks by name
     unique_frameworks = {}
     for framework in frameworks:
@@ -376,124 +335,9 @@ async def generate_regulatory_frameworks(articles: List[Dict[str, Any]]) -> List
                     unique_frameworks[name] = framework
             else:
                 unique_frameworks[name] = framework
-    
-    result = list(unique_frameworks.values())
-    logger.info(f"Generated {len(result)} unique regulatory frameworks")
-    return result
+    return list(unique_frameworks.values())
 
-async def generate_esg_impacts(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """
-    Generate ESG impact data from articles using AI
-    
-    Args:
-        articles: List of relevant articles
-        
-    Returns:
-        List of ESG impacts extracted from the articles
-    """
-    logger.info(f"Generating ESG impacts from {len(articles)} articles")
-    
-    # Filter articles that might mention ESG topics
-    esg_keywords = ["ESG", "environmental", "social", "governance", "sustainability", 
-                   "climate justice", "biodiversity", "transition risk", "physical risk"]
-    
-    # Find articles mentioning ESG
-    esg_articles = []
-    for article in articles:
-        content = article.get("content", "").lower() + article.get("title", "").lower()
-        if any(keyword.lower() in content for keyword in esg_keywords):
-            esg_articles.append(article)
-    
-    if not esg_articles:
-        logger.warning("No articles found with ESG content")
-        return []
-    
-    # Take most relevant articles
-    esg_articles = sorted(
-        esg_articles, 
-        key=lambda x: x.get("total_relevance", 0), 
-        reverse=True
-    )[:10]  # Limit to 10 most relevant articles
-    
-    # Generate structured data using LLM
-    impacts = []
-    for article in esg_articles:
-        prompt = f"""
-        Extract ESG (Environmental, Social, Governance) impact information from this article about climate risk and insurance.
-        
-        ARTICLE:
-        Title: {article.get('title', '')}
-        Date: {article.get('date', '')}
-        Content: {article.get('content', '')[:4000]}
-        
-        Extract ESG impacts related to climate risk that would affect insurance companies.
-        Consider:
-        - Physical risks (floods, wildfires, etc.)
-        - Transition risks (policy, market changes, etc.)
-        - Social impacts (climate justice, health effects, etc.)
-        - Governance requirements (disclosure, board responsibilities, etc.)
-        
-        For each identified ESG impact, provide:
-        1. Category (E for Environmental, S for Social, G for Governance)
-        2. Name of the impact
-        3. Score (1-10) reflecting severity or importance 
-        4. Impact level (High, Medium, Low)
-        5. Description of how it affects insurance
-        6. Relevant frameworks mentioned (TCFD, TNFD, etc.)
-        7. Current trend (increasing, stable, decreasing)
-        
-        Return ONLY valid JSON in this format (array of impacts):
-        [
-          {
-            "category": "E",
-            "name": "Impact Name",
-            "score": 8.5,
-            "impact": "High|Medium|Low",
-            "description": "Brief description",
-            "relevant_frameworks": ["TCFD", "etc"],
-            "trend": "increasing|stable|decreasing"
-          }
-        ]
-        
-        If no ESG impacts are identified, return an empty array: []
-        """
-        
-        try:
-            system_msg = SystemMessage(content="You are an expert ESG analyst specializing in climate risk impacts for insurance companies.")
-            human_msg = HumanMessage(content=prompt)
-            
-            response = llm.invoke([system_msg, human_msg])
-            content = response.content
-            
-            # Extract JSON from response
-            json_pattern = r'```(?:json)?\s*([\s\S]*?)\s*```'
-            import re
-            json_match = re.search(json_pattern, content)
-            
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                # Try to find JSON object directly
-                json_str = content
-                
-            try:
-                extracted_impacts = json.loads(json_str)
-                if isinstance(extracted_impacts, list):
-                    # Add source info
-                    for impact in extracted_impacts:
-                        impact["source_article_id"] = article.get("id", "")
-                        impact["source_article_title"] = article.get("title", "")
-                        impact["source"] = article.get("source", "")
-                        
-                    impacts.extend(extracted_impacts)
-                    logger.info(f"Extracted {len(extracted_impacts)} ESG impacts from article: {article.get('title', '')}")
-                
-            except json.JSONDecodeError:
-                logger.error(f"Failed to parse JSON from LLM response for article: {article.get('title', '')}")
-        
-        except Exception as e:
-            logger.error(f"Error generating ESG impacts: {str(e)}")
-    
+def dedupe_esg_impacts(impacts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     # Deduplicate impacts by category + name
     unique_impacts = {}
     for impact in impacts:
@@ -505,10 +349,157 @@ async def generate_esg_impacts(articles: List[Dict[str, Any]]) -> List[Dict[str,
                     unique_impacts[key] = impact
             else:
                 unique_impacts[key] = impact
-    
-    result = list(unique_impacts.values())
-    logger.info(f"Generated {len(result)} unique ESG impacts")
-    return result
+    return list(unique_impacts.values())
+
+def dedupe_coverage_gaps(gaps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Deduplicate gaps by hazard type and region
+    unique_gaps = {}
+    for gap in gaps:
+        key = f"{gap.get('hazard_type', '')}-{gap.get('region', '')}".strip()
+        if key:
+            # If we already have this gap, keep the one with more complete information
+            if key in unique_gaps:
+                current = unique_gaps[key]
+                # Check which has more complete data
+                if (gap.get("economic_losses") and gap.get("insured_losses") and 
+                    (not current.get("economic_losses") or not current.get("insured_losses"))):
+                    unique_gaps[key] = gap
+                # Or keep the one with more recent source
+                elif (gap.get("source_article_date", "") > current.get("source_article_date", "")):
+                    unique_gaps[key] = gap
+            else:
+                unique_gaps[key] = gap
+    return list(unique_gaps.values())
+
+# Extraction instructions for the generate_* functions. They're sent once per
+# batch of articles (see batch_prompting.py), so they describe a single
+# article's output.
+REGULATORY_FRAMEWORKS_TASK = """
+Extract regulatory framework information from each article about climate risk and insurance.
+
+Extract any mentioned regulatory frameworks (like TCFD, TNFD, SFDR, SEC Climate Rule) related to climate risk disclosure, 
+reporting requirements, or compliance that would impact insurance companies.
+
+For each identified regulatory framework, provide:
+1. Name of the framework
+2. Description of what it requires
+3. Status (emerging, established, or proposed)
+4. Region affected (global, north_america, europe, asia_pacific, etc.)
+5. Relevance score (1-10) for insurance industry
+6. Implementation date (if mentioned)
+7. Which insurance domains are affected (property, casualty, life, health, reinsurance)
+
+Each framework is a JSON object in this format:
+{
+  "name": "Framework Name",
+  "description": "Brief description",
+  "status": "emerging|established|proposed",
+  "region": "global|europe|north_america|etc",
+  "relevance_score": 8.5,
+  "implementation_date": "YYYY-MM-DD",
+  "domains_affected": ["property", "casualty", "etc"]
+}
+"""
+
+ESG_IMPACTS_TASK = """
+Extract ESG (Environmental, Social, Governance) impact information from each article about climate risk and insurance.
+
+Extract ESG impacts related to climate risk that would affect insurance companies.
+Consider:
+- Physical risks (floods, wildfires, etc.)
+- Transition risks (policy, market changes, etc.)
+- Social impacts (climate justice, health effects, etc.)
+- Governance requirements (disclosure, board responsibilities, etc.)
+
+For each identified ESG impact, provide:
+1. Category (E for Environmental, S for Social, G for Governance)
+2. Name of the impact
+3. Score (1-10) reflecting severity or importance 
+4. Impact level (High, Medium, Low)
+5. Description of how it affects insurance
+6. Relevant frameworks mentioned (TCFD, TNFD, etc.)
+7. Current trend (increasing, stable, decreasing)
+
+Each impact is a JSON object in this format:
+{
+  "category": "E",
+  "name": "Impact Name",
+  "score": 8.5,
+  "impact": "High|Medium|Low",
+  "description": "Brief description",
+  "relevant_frameworks": ["TCFD", "etc"],
+  "trend": "increasing|stable|decreasing"
+}
+"""
+
+UNDERWRITING_CHALLENGES_TASK = """
+Extract climate-related underwriting challenges from each article about insurance.
+
+Extract specific underwriting challenges that climate risk creates for insurance companies.
+Consider challenges related to:
+- Risk assessment and modeling difficulties
+- Premium pricing considerations
+- Coverage limitations or exclusions
+- Capacity constraints
+- Specific climate hazards like floods, wildfires, hurricanes, etc.
+
+For each identified challenge, provide:
+1. Clear description of the challenge
+2. Related hazard type (flood, hurricane, wildfire, drought, storm, other)
+3. Geographic region affected (north_america, europe, asia_pacific, global, etc.)
+4. Impact level (High, Medium, Low)
+5. Business implications for insurers
+
+Each challenge is a JSON object in this format:
+{
+  "challenge": "Description of the challenge",
+  "hazard_type": "flood|hurricane|wildfire|drought|storm|other",
+  "region": "north_america|europe|asia_pacific|global|etc",
+  "impact_level": "High|Medium|Low",
+  "business_implications": "Explanation of impacts"
+}
+"""
+
+COVERAGE_GAPS_TASK = """
+Extract coverage gap information from each article about climate risk and insurance.
+
+Extract information about insurance coverage gaps related to climate risks.
+Coverage gaps are the difference between economic losses and insured losses from climate events.
+
+For identified coverage gaps, provide:
+1. Related hazard type (flood, hurricane, wildfire, drought, storm, other)
+2. Geographic region affected (north_america, europe, asia_pacific, global, etc.)
+3. Coverage gap percentage (if mentioned or can be inferred)
+4. Economic losses in billions USD (if mentioned)
+5. Insured losses in billions USD (if mentioned)
+6. Trends information (gap increasing or decreasing, take-up rate changes)
+7. Key challenges creating or maintaining this coverage gap
+
+Each coverage gap is a JSON object in this format:
+{
+  "hazard_type": "flood|hurricane|wildfire|drought|storm|other",
+  "region": "north_america|europe|asia_pacific|global|etc",
+  "coverage_gap_percentage": 70,
+  "economic_losses": 42.5,
+  "insured_losses": 12.8,
+  "trends": {
+    "gap_change": 5.0,
+    "take_up_rate": -3.0
+  },
+  "key_challenges": [
+    "Challenge 1",
+    "Challenge 2",
+    "Challenge 3"
+  ]
+}
+
+Where:
+- coverage_gap_percentage is the percentage of economic losses that are uninsured
+- gap_change is percentage points the gap has changed (positive means growing gap)
+- take_up_rate is the percentage change in insurance adoption (negative means decreasing adoption)
+
+Provide realistic estimates based on industry knowledge if exact figures aren't mentioned.
+"""
 
 async def generate_underwriting_challenges(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
@@ -522,252 +513,156 @@ async def generate_underwriting_challenges(articles: List[Dict[str, Any]]) -> Li
     """
     logger.info(f"Generating underwriting challenges from {len(articles)} articles")
     
-    # Filter articles that might mention underwriting challenges
-    underwriting_keywords = ["underwriting", "premium", "pricing", "rate", "coverage", "capacity", 
-                            "risk assessment", "model", "catastrophe", "flood", "wildfire", "hurricane"]
-    
-    # Find articles mentioning underwriting
-    underwriting_articles = []
-    for article in articles:
-        content = article.get("content", "").lower() + article.get("title", "").lower()
-        if any(keyword.lower() in content for keyword in underwriting_keywords):
-            underwriting_articles.append(article)
-    
+    # Most relevant articles that might mention underwriting challenges
+    underwriting_articles = select_keyword_articles(articles, UNDERWRITING_KEYWORDS)
     if not underwriting_articles:
         logger.warning("No articles found with underwriting content")
         return []
     
-    # Take most relevant articles
-    underwriting_articles = sorted(
-        underwriting_articles, 
-        key=lambda x: x.get("total_relevance", 0), 
-        reverse=True
-    )[:10]  # Limit to 10 most relevant articles
-    
-    # Generate structured data using LLM
+    # Generate structured data using LLM, several articles per prompt
     challenges = []
-    for article in underwriting_articles:
-        prompt = f"""
-        Extract climate-related underwriting challenges from this article about insurance.
-        
-        ARTICLE:
-        Title: {article.get('title', '')}
-        Date: {article.get('date', '')}
-        Content: {article.get('content', '')[:4000]}
-        
-        Extract specific underwriting challenges that climate risk creates for insurance companies.
-        Consider challenges related to:
-        - Risk assessment and modeling difficulties
-        - Premium pricing considerations
-        - Coverage limitations or exclusions
-        - Capacity constraints
-        - Specific climate hazards like floods, wildfires, hurricanes, etc.
-        
-        For each identified challenge, provide:
-        1. Clear description of the challenge
-        2. Related hazard type (flood, hurricane, wildfire, drought, storm, other)
-        3. Geographic region affected (north_america, europe, asia_pacific, global, etc.)
-        4. Impact level (High, Medium, Low)
-        5. Business implications for insurers
-        
-        Return ONLY valid JSON in this format (array of challenges):
-        [
-          {{
-            "challenge": "Description of the challenge",
-            "hazard_type": "flood|hurricane|wildfire|drought|storm|other",
-            "region": "north_america|europe|asia_pacific|global|etc",
-            "impact_level": "High|Medium|Low",
-            "business_implications": "Explanation of impacts"
-          }}
-        ]
-        
-        If no underwriting challenges are identified, return an empty array: []
-        """
-        
-        try:
-            system_msg = SystemMessage(content="You are an expert insurance underwriter specializing in climate risk assessment.")
-            human_msg = HumanMessage(content=prompt)
-            
-            response = llm.invoke([system_msg, human_msg])
-            content = response.content
-            
-            # Extract JSON from response
-            json_pattern = r'```(?:json)?\s*([\s\S]*?)\s*```'
-            import re
-            json_match = re.search(json_pattern, content)
-            
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                # Try to find JSON object directly
-                json_str = content
-                
-            try:
-                extracted_challenges = json.loads(json_str)
-                if isinstance(extracted_challenges, list):
-                    # Add source info and unique ID
-                    for i, challenge in enumerate(extracted_challenges):
-                        challenge["id"] = f"{article.get('id', 'article')}_{i}"
-                        challenge["source"] = article.get("source", "Unknown")
-                        challenge["date"] = article.get("date", datetime.now().strftime("%Y-%m-%d"))
-                        
-                    challenges.extend(extracted_challenges)
-                    logger.info(f"Extracted {len(extracted_challenges)} underwriting challenges from article: {article.get('title', '')}")
-                
-            except json.JSONDecodeError:
-                logger.error(f"Failed to parse JSON from LLM response for article: {article.get('title', '')}")
-        
-        except Exception as e:
-            logger.error(f"Error generating underwriting challenges: {str(e)}")
+    extracted = await extract_from_articles(
+        llm,
+        underwriting_articles,
+        system_prompt="You are an expert insurance underwriter specializing in climate risk assessment.",
+        task=UNDERWRITING_CHALLENGES_TASK,
+        label="underwriting challenges"
+    )
+    for article, extracted_challenges in extracted:
+        challenges.extend(tag_challenges(extracted_challenges, article))
+        logger.info(f"Extracted {len(extracted_challenges)} underwriting challenges from article: {article.get('title', '')}")
     
     # Return the combined list (no deduplication as challenges may be similar but distinct)
     logger.info(f"Generated {len(challenges)} underwriting challenges")
     return challenges
 
 
-async def generate_coverage_gaps(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+FUSED_EXTRACTION_KEYS = ["summary", "frameworks", "esg_impacts", "underwriting_challenges", "coverage_gaps"]
+# Output budget for one fused reply; a reply cut off at it is retried once with twice the budget
+FUSED_EXTRACTION_MAX_TOKENS = int(os.getenv("FUSED_EXTRACTION_MAX_TOKENS", "8000"))
+
+FUSED_EXTRACTION_TASK = """
+Analyze this news article for an insurance company like Chubb and extract, in a single pass, everything below.
+Use an empty array for any section the article doesn't cover.
+
+Return ONLY valid JSON with exactly these keys:
+{
+  "summary": {
+    "key_event": "The main event or development described",
+    "insurance_domains": ["affected insurance types: property, casualty, life, health, reinsurance"],
+    "risk_factors": ["identified risk factors or changes"],
+    "business_implications": "How this might affect insurance business operations",
+    "timeframe": "Immediate, short-term, or long-term implications",
+    "geographic_focus": "Regions or countries affected (if mentioned)",
+    "regulatory_impact": "Any regulatory changes or requirements mentioned",
+    "confidence": "low|medium|high"
+  },
+  "frameworks": [],
+  "esg_impacts": [],
+  "underwriting_challenges": [],
+  "coverage_gaps": []
+}
+
+"frameworks" follows these instructions:
+""" + REGULATORY_FRAMEWORKS_TASK + """
+"esg_impacts" follows these instructions:
+""" + ESG_IMPACTS_TASK + """
+"underwriting_challenges" follows these instructions:
+""" + UNDERWRITING_CHALLENGES_TASK + """
+"coverage_gaps" follows these instructions:
+""" + COVERAGE_GAPS_TASK
+
+async def extract_climate_risk_data(articles: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
     """
-    Generate coverage gap data from articles using AI
+    Extract structured summaries, regulatory frameworks, ESG impacts,
+    underwriting challenges and coverage gaps with one LLM call per article.
+    
+    The articles read are those select_articles_for_extraction picks plus
+    the top keyword matches for each section. Every section of the combined
+    result is tagged with its source article and deduplicated.
     
     Args:
         articles: List of relevant articles
         
     Returns:
-        List of coverage gap analyses extracted from the articles
+        Dict with structured_info, frameworks, esg_impacts,
+        underwriting_challenges and coverage_gaps lists
     """
-    logger.info(f"Generating coverage gap analyses from {len(articles)} articles")
-    
-    # Filter articles that might mention coverage gaps
-    coverage_keywords = ["coverage gap", "protection gap", "uninsured", "underinsured", 
-                         "economic loss", "insured loss", "take-up rate", "affordability"]
-    
-    # Find articles mentioning coverage gaps
-    coverage_articles = []
-    for article in articles:
-        content = article.get("content", "").lower() + article.get("title", "").lower()
-        if any(keyword.lower() in content for keyword in coverage_keywords):
-            coverage_articles.append(article)
+    results = {
+        "structured_info": [], "frameworks": [], "esg_impacts": [],
+        "underwriting_challenges": [], "coverage_gaps": []
+    }
+    if not articles:
+        return results
     
-    if not coverage_articles:
-        logger.warning("No articles found with coverage gap content")
-        return []
+    selected = {}
+    for group in [
+        await asyncio.to_thread(select_articles_for_extraction, articles),
+        select_keyword_articles(articles, REGULATORY_KEYWORDS),
+        select_keyword_articles(articles, ESG_KEYWORDS),
+        select_keyword_articles(articles, UNDERWRITING_KEYWORDS),
+        select_keyword_articles(articles, COVERAGE_KEYWORDS)
+    ]:
+        for article in group:
+            if len(str(article.get("content", ""))) >= 100:
+                selected.setdefault(article.get("url") or id(article), article)
+    logger.info(f"Running fused extraction on {len(selected)} articles")
     
-    # Take most relevant articles
-    coverage_articles = sorted(
-        coverage_articles, 
-        key=lambda x: x.get("total_relevance", 0), 
-        reverse=True
-    )[:10]  # Limit to 10 most relevant articles
+    system_msg = SystemMessage(content="You are an expert insurance and climate risk analyst covering regulation, ESG, underwriting and coverage gaps.")
     
-    # Generate structured data using LLM
-    gaps = []
-    for article in coverage_articles:
-        prompt = f"""
-        Extract coverage gap information from this article about climate risk and insurance.
+    async def extract_one(article):
+        human_msg = HumanMessage(content=FUSED_EXTRACTION_TASK + f"""
         
         ARTICLE:
+        Source: {article.get('source', 'Unknown')}
         Title: {article.get('title', '')}
         Date: {article.get('date', '')}
-        Content: {article.get('content', '')[:4000]}
-        
-        Extract information about insurance coverage gaps related to climate risks.
-        Coverage gaps are the difference between economic losses and insured losses from climate events.
-        
-        For identified coverage gaps, provide:
-        1. Related hazard type (flood, hurricane, wildfire, drought, storm, other)
-        2. Geographic region affected (north_america, europe, asia_pacific, global, etc.)
-        3. Coverage gap percentage (if mentioned or can be inferred)
-        4. Economic losses in billions USD (if mentioned)
-        5. Insured losses in billions USD (if mentioned)
-        6. Trends information (gap increasing or decreasing, take-up rate changes)
-        7. Key challenges creating or maintaining this coverage gap
-        
-        Return ONLY valid JSON in this format (array of coverage gaps):
-        [
-          {{
-            "hazard_type": "flood|hurricane|wildfire|drought|storm|other",
-            "region": "north_america|europe|asia_pacific|global|etc",
-            "coverage_gap_percentage": 70,
-            "economic_losses": 42.5,
-            "insured_losses": 12.8,
-            "trends": {{
-              "gap_change": 5.0,
-              "take_up_rate": -3.0
-            }},
-            "key_challenges": [
-              "Challenge 1",
-              "Challenge 2",
-              "Challenge 3"
-            ]
-          }}
-        ]
-        
-        Where:
-        - coverage_gap_percentage is the percentage of economic losses that are uninsured
-        - gap_change is percentage points the gap has changed (positive means growing gap)
-        - take_up_rate is the percentage change in insurance adoption (negative means decreasing adoption)
-        
-        Provide realistic estimates based on industry knowledge if exact figures aren't mentioned.
-        If no coverage gap information is identified, return an empty array: []
-        """
-        
+        Content: {str(article.get('content', ''))[:6000]}
+        """)
         try:
-            system_msg = SystemMessage(content="You are an expert insurance analyst specializing in climate risk coverage gaps.")
-            human_msg = HumanMessage(content=prompt)
-            
-            response = llm.invoke([system_msg, human_msg])
-            content = response.content
-            
-            # Extract JSON from response
-            json_pattern = r'```(?:json)?\s*([\s\S]*?)\s*```'
-            import re
-            json_match = re.search(json_pattern, content)
-            
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                # Try to find JSON object directly
-                json_str = content
-                
-            try:
-                extracted_gaps = json.loads(json_str)
-                if isinstance(extracted_gaps, list):
-                    # Add source info
-                    for gap in extracted_gaps:
-                        gap["source_article_id"] = article.get("id", "")
-                        gap["source_article_title"] = article.get("title", "")
-                        gap["source"] = article.get("source", "")
-                        
-                    gaps.extend(extracted_gaps)
-                    logger.info(f"Extracted {len(extracted_gaps)} coverage gaps from article: {article.get('title', '')}")
-                
-            except json.JSONDecodeError:
-                logger.error(f"Failed to parse JSON from LLM response for article: {article.get('title', '')}")
-        
+            for max_tokens in (FUSED_EXTRACTION_MAX_TOKENS, 2 * FUSED_EXTRACTION_MAX_TOKENS):
+                # Only replies holding every section are cached
+                response = await llm_executor.ainvoke(
+                    llm, [system_msg, human_msg], max_tokens=max_tokens,
+                    validate=lambda text: has_keys(parse_json(text, expect="object"), FUSED_EXTRACTION_KEYS)
+                )
+                if response.response_metadata.get("stop_reason") != "max_tokens":
+                    break
+                logger.warning(f"Fused extraction hit {max_tokens} output tokens for article: {article.get('title', '')}")
+            extracted = parse_json(response.content, expect="object")
+            if not has_keys(extracted, FUSED_EXTRACTION_KEYS):
+                raise StructuredOutputError(f"Response is missing sections: {[key for key in FUSED_EXTRACTION_KEYS if key not in extracted]}")
+            return article, extracted
         except Exception as e:
-            logger.error(f"Error generating coverage gaps: {str(e)}")
-    
-    # Deduplicate gaps by hazard type and region
-    unique_gaps = {}
-    for gap in gaps:
-        key = f"{gap.get('hazard_type', '')}-{gap.get('region', '')}".strip()
-        if key:
-            # If we already have this gap, keep the one with more complete information
-            if key in unique_gaps:
-                current = unique_gaps[key]
-                # Check which has more complete data
-                if (gap.get("economic_losses") and gap.get("insured_losses") and 
-                    (not current.get("economic_losses") or not current.get("insured_losses"))):
-                    unique_gaps[key] = gap
-                # Or keep the one with more recent source
-                elif (gap.get("source_article_date", "") > current.get("source_article_date", "")):
-                    unique_gaps[key] = gap
-            else:
-                unique_gaps[key] = gap
+            logger.error(f"Fused extraction failed for article {article.get('title', '')}: {str(e)}")
+            return article, None
     
-    result = list(unique_gaps.values())
-    logger.info(f"Generated {len(result)} unique coverage gaps")
-    return result
+    frameworks, impacts, challenges, gaps = [], [], [], []
+    for article, extracted in await asyncio.gather(*(extract_one(article) for article in selected.values())):
+        if not extracted:
+            continue
+        
+        def section(name):
+            value = extracted.get(name)
+            return [item for item in value if isinstance(item, dict)] if isinstance(value, list) else []
+        
+        if isinstance(extracted.get("summary"), dict):
+            results["structured_info"].append(normalize_structured_info(extracted["summary"], article))
+        frameworks.extend(tag_source_article(section("frameworks"), article))
+        impacts.extend(tag_source_article(section("esg_impacts"), article))
+        challenges.extend(tag_challenges(section("underwriting_challenges"), article))
+        gaps.extend(tag_source_article(section("coverage_gaps"), article))
+    
+    results["frameworks"] = dedupe_frameworks(frameworks)
+    results["esg_impacts"] = dedupe_esg_impacts(impacts)
+    results["underwriting_challenges"] = challenges
+    results["coverage_gaps"] = dedupe_coverage_gaps(gaps)
+    logger.info(
+        f"Fused extraction produced {len(results['structured_info'])} summaries, {len(results['frameworks'])} frameworks, "
+        f"{len(results['esg_impacts'])} ESG impacts, {len(challenges)} underwriting challenges "
+        f"and {len(results['coverage_gaps'])} coverage gaps"
+    )
+    return results
 
 # Main function to populate database with AI-generated data
 async def populate_climate_risk_data():
@@ -778,20 +673,40 @@ async def populate_climate_risk_data():
     
     try:
         # Step 1: Scrape latest news
-        news_sources = scrape_news_sources.invoke({})
+        news_sources = await crawl_news_sources()
         logger.info(f"Scraped {len(news_sources)} articles from news sources")
         
         # Step 2: Analyze insurance relevance
         relevant_articles = analyze_insurance_relevance.invoke({"articles": news_sources})
         logger.info(f"Found {len(relevant_articles)} relevant articles")
         
-        # Step 3: Generate structured data for different endpoints
-        frameworks = await generate_regulatory_frameworks(relevant_articles)
-        esg_impacts = await generate_esg_impacts(relevant_articles)
-        underwriting_challenges = await generate_underwriting_challenges(relevant_articles)
-        coverage_gaps = await generate_coverage_gaps(relevant_articles)
+        # Step 3: Generate structured data for different endpoints, reading
+        # each article once
+        extracted = await extract_climate_risk_data(relevant_articles)
+        frameworks = extracted["frameworks"]
+        esg_impacts = extracted["esg_impacts"]
+        underwriting_challenges = extracted["underwriting_challenges"]
+        coverage_gaps = extracted["coverage_gaps"]
         
         # Step 4: Store in database for API endpoints
+        # Structured summaries
+        now = datetime.now()
+        for info in extracted["structured_info"]:
+            info["created_at"] = now
+        await bulk_write_chunked(db.structured_summaries, [
+            upsert_op({"article_url": info.get("article_url")}, info) for info in extracted["structured_info"]
+        ])
+        if extracted["structured_info"]:
+            await index_structured_summaries(extracted["structured_info"], update_index=True)
+            await refresh_article_filter_columns()
+            logger.info(f"Stored {len(extracted['structured_info'])} structured summaries in database")
+            dashboard_view.mark_dirty()
+            try:
+                await refresh_rollups(db)
+            except Exception as e:
+                logger.error(f"Error refreshing trend rollups: {str(e)}")
+            await response_cache.invalidate("summaries")
+        
         # Regulatory frameworks
         if frameworks:
             # Clear existing data or use upsert
@@ -806,6 +721,9 @@ async def populate_climate_risk_data():
             await db.esg_impacts.insert_many(esg_impacts)
             logger.info(f"Stored {len(esg_impacts)} ESG impacts in database")
         
+        if frameworks or esg_impacts:
+            await response_cache.invalidate("regulatory")
+        
         # Underwriting challenges
         if underwriting_challenges:
             # Clear existing data or use upsert
@@ -859,7 +777,7 @@ def generate_fallback_regulatory_trends(months=6):
 
 # Create and persist FAISS index from articles
 def build_faiss_index(articles: list[dict], save_path: str = "faiss_index") -> FAISS:
-    embedding_model = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+    embedding_model = get_embedding_service()
     docs = [
         Document(
             page_content=article.get("content", ""),
@@ -872,13 +790,16 @@ def build_faiss_index(articles: list[dict], save_path: str = "faiss_index") -> F
         ) for article in articles
     ]
     index = FAISS.from_documents(docs, embedding_model)
-    index.save_local(save_path)
+    index_manager.publish(save_path, index)
     return index
 
-# Load FAISS index if it exists
+# Load FAISS index if it exists (served from memory after the first load)
 def load_faiss_index(path: str = "faiss_index") -> FAISS:
-    embedding_model = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-    return FAISS.load_local(path, embedding_model, allow_dangerous_deserialization=True)
+    index_manager.reload_if_changed(path)
+    snapshot = index_manager.get(path)
+    if snapshot is None:
+        raise FileNotFoundError(f"FAISS index {path} does not exist")
+    return snapshot.store
 
 
 
@@ -891,10 +812,12 @@ def filter_articles_with_faiss(query: str, top_k: int = 20) -> list[dict]:
 
 try:
     from .api import (
-        scrape_news_sources,
         scrape_specific_articles,
+        crawl_news_sources,
         analyze_insurance_relevance,
-        extract_structured_info,
+        aextract_structured_info,
+        select_articles_for_extraction,
+        normalize_structured_info,
         generate_summary_reports,
         NEWS_SOURCES,
         create_fallback_report
@@ -902,9 +825,11 @@ try:
 except ImportError:
     # Fallback for direct execution
     from api import (
-        scrape_news_sources,
+        crawl_news_sources,
         analyze_insurance_relevance,
-        extract_structured_info,
+        aextract_structured_info,
+        select_articles_for_extraction,
+        normalize_structured_info,
         generate_summary_reports,
         NEWS_SOURCES
     )
@@ -923,6 +848,21 @@ app = FastAPI(
     version="1.0.0",
 )
 
+# Cached dashboard reads. Tags name the data each route depends on; writers
+# invalidate them after storing new data.
+response_cache = ResponseCache({
+    "/regulatory/frameworks": CacheRule(ttl=3600, stale=3600, tags=["regulatory"]),
+    "/regulatory/esg-impacts": CacheRule(ttl=3600, stale=3600, tags=["regulatory"]),
+    "/underwriting/premium-trends": CacheRule(ttl=900, stale=3600, tags=["summaries"]),
+    "/domains/risk-scores": CacheRule(ttl=300, stale=900, tags=["summaries"]),
+    "/dashboard/stats": CacheRule(ttl=30, stale=300, tags=["dashboard"]),
+    "/reports/latest": CacheRule(ttl=300, stale=900, tags=["reports"]),
+    "/topics/clusters": CacheRule(ttl=1800, stale=3600, tags=["summaries"]),
+    "/trends/emerging": CacheRule(ttl=600, stale=3600, tags=["summaries"]),
+})
+# Added before CORS so it runs inside it and cached responses get per-request CORS headers
+app.add_middleware(ResponseCacheMiddleware, cache=response_cache)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -959,6 +899,35 @@ async def store_underwriting_challenges(challenges: List[dict]):
         logger.error(f"Error storing underwriting challenges: {str(e)}")
         return {"message": f"Error: {str(e)}", "success": False}
 
+@app.get("/admin/embeddings/stats")
+async def get_embedding_stats():
+    """Load time and encode throughput of the shared embedding model"""
+    return get_embedding_service().stats()
+
+@app.get("/admin/indexes/stats")
+async def get_index_stats():
+    """Versions and sizes of the memory-resident vector indexes"""
+    return index_manager.stats()
+
+@app.get("/admin/http-cache/stats")
+async def get_http_cache_stats():
+    """Hit/revalidation counts and size of the scraper's HTTP cache"""
+    cache = get_http_cache()
+    if cache is None:
+        return {"enabled": False}
+    return dict(await asyncio.to_thread(cache.summary), enabled=True)
+
+@app.get("/admin/llm/stats")
+async def get_llm_executor_stats():
+    """Call, retry, timeout and rate-limit wait counts for the async LLM executor, plus response cache metrics"""
+    cache = llm_executor.cache
+    return dict(
+        llm_executor.stats,
+        max_concurrency=llm_executor.max_concurrency,
+        timeout_seconds=llm_executor.timeout,
+        cache=await asyncio.to_thread(cache.summary) if cache else {"enabled": False}
+    )
+
 def get_default_frameworks(region=None, status=None, min_relevance=None):
     """Return default frameworks data when real data isn't available"""
     default_frameworks = [
@@ -1282,19 +1251,19 @@ async def vector_search_articles(request: VectorSearchRequest):
     """
     try:
         # Create or use FAISS index for articles
-        index_path = "articles_index"
+        index_path = ARTICLES_INDEX
         if not os.path.exists(index_path):
             # Need to create index from existing articles
             logger.info("Creating article vector index")
             all_articles = []
-            async for article in db.articles.find({}):
+            async for article in db.articles.find({"duplicate_of": None}, NEAR_DUP_EXCLUDED_FIELDS):
                 all_articles.append(document_helper(article))
                 
             if not all_articles:
                 return []
                 
             # Create FAISS index
-            embedding_model = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+            embedding_model = get_embedding_service()
             docs = [
                 Document(
                     page_content=article.get("content", ""),
@@ -1311,25 +1280,51 @@ async def vector_search_articles(request: VectorSearchRequest):
                 ) for article in all_articles
             ]
             index = FAISS.from_documents(docs, embedding_model)
-            index.save_local(index_path)
+            index_manager.publish(index_path, index)
+        
+        # Use the resident index; only a cold start loads it from disk
+        snapshot = index_manager.get(index_path)
+        if snapshot is None:
+            await asyncio.to_thread(index_manager.reload_if_changed, index_path)
+            snapshot = index_manager.get(index_path)
+            if snapshot is None:
+                return []
         
-        # Load index
-        embedding_model = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-        index = FAISS.load_local(index_path, embedding_model, allow_dangerous_deserialization=True)
+        # Run the search, applying filters during the search so a filtered
+        # query still fills the requested page
+        # (tombstoned vectors are always masked out)
+        results = await asyncio.to_thread(
+            index_manager.filtered_search,
+            index_path,
+            request.query,
+            request.limit,
+            min_relevance=request.min_relevance,
+            domains=request.domains,
+            start_date=request.start_date,
+            end_date=request.end_date,
+        )
         
-        # Run the search
-        results = index.similarity_search(request.query, k=request.limit)
+        # Hydrate all hits with one query per collection, keeping similarity order
+        object_ids = [
+            ObjectId(doc.metadata["id"]) for doc in results
+            if doc.metadata.get("id") and ObjectId.is_valid(doc.metadata["id"])
+        ]
+        articles_by_id = await hydrate_documents(db.articles, "_id", object_ids, ARTICLE_RESPONSE_PROJECTION)
+        
+        summaries_by_url = {}
+        if request.domains:
+            # Domains live on the structured summaries for each article
+            summaries_by_url = await hydrate_documents(
+                db.structured_summaries,
+                "article_url",
+                [article.get("url") for article in articles_by_id.values()],
+                {"article_url": 1, "insurance_domains": 1}
+            )
         
         # Convert results to ArticleModel format
         articles = []
-        for doc in results:
-            # Get the article ID from metadata
-            article_id = doc.metadata.get("id")
-            if not article_id:
-                continue
-                
-            # Get the full article from database
-            article = await db.articles.find_one({"_id": ObjectId(article_id)})
+        for object_id in object_ids:
+            article = articles_by_id.get(object_id)
             if not article:
                 continue
                 
@@ -1339,14 +1334,8 @@ async def vector_search_articles(request: VectorSearchRequest):
                 
             # Filter by domain if specified
             if request.domains:
-                # Need to check structured summaries for this article
-                domain_match = False
-                summary = await db.structured_summaries.find_one({"article_url": article.get("url")})
-                if summary and summary.get("insurance_domains"):
-                    if any(domain in summary.get("insurance_domains", []) for domain in request.domains):
-                        domain_match = True
-                
-                if not domain_match:
+                summary = summaries_by_url.get(article.get("url"))
+                if not summary or not any(domain in summary.get("insurance_domains", []) for domain in request.domains):
                     continue
             
             # Filter by date range
@@ -1356,13 +1345,42 @@ async def vector_search_articles(request: VectorSearchRequest):
             if request.end_date and article.get("date", "") > request.end_date:
                 continue
                 
-            articles.append(document_helper(article))
+            articles.append(document_helper(dict(article)))
+            if len(articles) >= request.limit:
+                break
         
         return articles
     except Exception as e:
         logger.error(f"Error in vector search: {str(e)}")
         return []
 
+async def refresh_article_filter_columns():
+    """
+    Refresh the relevance/date/domain filter columns of the articles index
+    from the database (domains come from the structured summaries).
+    """
+    if index_manager.get(ARTICLES_INDEX) is None:
+        return
+    
+    try:
+        domains_by_url = {}
+        async for summary in db.structured_summaries.find({}, {"article_url": 1, "insurance_domains": 1}):
+            if summary.get("article_url"):
+                domains_by_url.setdefault(summary["article_url"], []).extend(summary.get("insurance_domains") or [])
+        
+        records = {}
+        async for article in db.articles.find({}, {"url": 1, "date": 1, "total_relevance": 1}):
+            records[str(article["_id"])] = {
+                "total_relevance": article.get("total_relevance"),
+                "date": article.get("date"),
+                "domains": domains_by_url.get(article.get("url"), [])
+            }
+        
+        await asyncio.to_thread(index_manager.set_filter_records, ARTICLES_INDEX, records)
+        logger.info(f"Refreshed article filter columns for {len(records)} articles")
+    except Exception as e:
+        logger.error(f"Error refreshing article filter columns: {str(e)}")
+
 @app.post("/search/semantic", response_model=List[StructuredSummaryModel])
 async def semantic_search_structured_summaries(request: VectorSearchRequest):
     """
@@ -1412,31 +1430,15 @@ async def get_regulatory_trends(months: int = 6):
         List of monthly data points with regulatory mentions by insurance domain
     """
     try:
-        # First, check if we have data in the regulatory_trends collection
-        count = await db.regulatory_trends.count_documents({})
-        
-        if count > 0:
-            # If we have data in the collection, use it
-            trends = []
-            # Get data for the requested number of months, sorted by month
-            cursor = db.regulatory_trends.find().sort("month", -1).limit(months)
-            
-            async for doc in cursor:
-                trends.append({
-                    "month": doc["month"],
-                    "property": doc["property"],
-                    "casualty": doc["casualty"],
-                    "life": doc["life"],
-                    "health": doc["health"],
-                    "reinsurance": doc["reinsurance"]
-                })
-                
-            # Sort by month (ascending)
-            trends.sort(key=lambda x: x["month"])
-            
-            return trends
+        # Summed from the daily rollups when they have been built
+        if await db.daily_rollups.find_one({}, {"_id": 1}) is not None:
+            monthly = await monthly_totals(db, "regulatory", month_keys(months))
+            return [
+                {"month": month, **{domain: counts.get(domain, 0) for domain in ROLLUP_DOMAINS}}
+                for month, counts in monthly.items()
+            ]
         
-        # If no data in collection, generate fallback
+        # If no rollups yet, generate fallback
         # Generate realistic trend data
         current_month = datetime.now()
         trends = []
@@ -1479,37 +1481,9 @@ async def startup_event():
     await db.esg_impacts.create_index("score")
     await db.regulatory_trends.create_index("month", unique=True)
     
-    # Schedule vector index maintenance
-    async def update_vector_indexes():
-        logger.info("Running scheduled vector index update")
-        
-        try:
-            # Get recent structured summaries
-            last_week = datetime.now() - timedelta(days=7)
-            recent_summaries = []
-            async for summary in db.structured_summaries.find({"created_at": {"$gte": last_week}}):
-                recent_summaries.append(document_helper(summary))
-                
-            if recent_summaries:
-                await index_structured_summaries(recent_summaries, update_index=True)
-                logger.info(f"Updated summaries vector index with {len(recent_summaries)} recent summaries")
-                
-            # Update articles index if needed (less frequently)
-            if datetime.now().weekday() == 0:  # Only on Mondays
-                # Get recent articles
-                recent_articles = []
-                async for article in db.articles.find({"created_at": {"$gte": last_week}}):
-                    recent_articles.append(document_helper(article))
-                    
-                if recent_articles:
-                    await asyncio.to_thread(update_articles_index, recent_articles)
-                    logger.info(f"Updated articles vector index with {len(recent_articles)} recent articles")
-        except Exception as e:
-            logger.error(f"Error updating vector indexes: {str(e)}")
-    
+    # Vector index maintenance is scheduled by the main startup handler below
     # Start the scheduler
     scheduler.add_job(scheduled_daily_analysis, "cron", hour=1, minute=0)  # Run daily at 1:00 AM
-    scheduler.add_job(update_vector_indexes, "cron", hour=2, minute=0)  # Run daily at 2:00 AM
     scheduler.start()
     logger.info("Scheduler started")
 
@@ -1518,8 +1492,8 @@ def update_articles_index(articles: List[Dict[str, Any]], update_index: bool = T
     """
     Update the FAISS index for articles
     """
-    embedding_model = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-    index_path = "articles_index"
+    embedding_model = get_embedding_service()
+    index_path = ARTICLES_INDEX
     
     docs = [
         Document(
@@ -1539,16 +1513,16 @@ def update_articles_index(articles: List[Dict[str, Any]], update_index: bool = T
     
     if os.path.exists(index_path) and update_index:
         try:
-            existing_index = FAISS.load_local(index_path, embedding_model, allow_dangerous_deserialization=True)
-            existing_index.add_documents(docs)
-            existing_index.save_local(index_path)
+            # Only new or changed articles are embedded and written as a delta segment
+            counts = index_manager.upsert(index_path, docs)
+            logger.info(f"Incremental articles index update: {counts}")
             return index_path
         except Exception as e:
             logger.error(f"Error updating articles index: {str(e)}")
     
     # Create new index if update fails or not requested
     index = FAISS.from_documents(docs, embedding_model)
-    index.save_local(index_path)
+    index_manager.publish(index_path, index)
     return index_path
 
 async def safe_mongodb_insert(collection, document, max_retries=3):
@@ -1706,12 +1680,108 @@ def hash_content(content: str) -> str:
     # Hash the content
     return hashlib.md5(cleaned_content.encode('utf-8')).hexdigest()
 
+async def find_existing_keys(field: str, values: List[str], chunk_size: int = 1000) -> set:
+    """Return which of `values` already exist in db.articles[field], using indexed $in lookups"""
+    existing = set()
+    unique_values = list(dict.fromkeys(v for v in values if v))
+    for i in range(0, len(unique_values), chunk_size):
+        chunk = unique_values[i:i + chunk_size]
+        async for article in db.articles.find({field: {"$in": chunk}}, {field: 1, "_id": 0}):
+            existing.add(article[field])
+    return existing
+
+def minhash_fields(content: str) -> Dict[str, Any]:
+    """MinHash signature and LSH band keys stored on an article for near-duplicate lookups"""
+    signature = minhasher.signature(content)
+    if signature is None:
+        # Too short to compare; an empty signature marks it as processed
+        return {"minhash": [], "minhash_bands": []}
+    return {"minhash": signature, "minhash_bands": minhasher.band_keys(signature)}
+
+async def find_near_duplicates(articles: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Map the URL of each near-duplicate in `articles` to the URL of the article
+    it duplicates, matching against stored articles through the indexed
+    minhash_bands field and against earlier articles in the same batch.
+    """
+    bands = list({band for article in articles for band in article.get("minhash_bands", [])})
+    existing = []
+    for i in range(0, len(bands), 1000):
+        cursor = db.articles.find(
+            {"minhash_bands": {"$in": bands[i:i + 1000]}},
+            {"url": 1, "duplicate_of": 1, "minhash": 1, "_id": 0}
+        )
+        async for article in cursor:
+            existing.append((article.get("duplicate_of") or article["url"], article["minhash"]))
+    
+    new_items = [(article["url"], article.get("minhash") or None) for article in articles]
+    return await asyncio.to_thread(cluster_near_duplicates, new_items, existing)
+
+async def backfill_dedup_keys(batch_size: int = 500):
+    """
+    Store normalized_url, content_hash and MinHash keys on articles written
+    before those fields existed. Only documents missing a key are read, so once the
+    backfill has run this is a single indexed query that returns nothing.
+    """
+    query = {"$or": [
+        {"normalized_url": {"$exists": False}},
+        {"content_hash": {"$exists": False}, "content": {"$nin": [None, ""]}},
+        {"minhash": {"$exists": False}, "content": {"$nin": [None, ""]}}
+    ]}
+    operations = []
+    updated = 0
+    async for article in db.articles.find(query, {"url": 1, "content": 1}):
+        fields = {}
+        if article.get("url"):
+            fields["normalized_url"] = normalize_url(article["url"])
+        if article.get("content"):
+            fields["content_hash"] = hash_content(article["content"])
+            fields.update(minhash_fields(article["content"]))
+        if not fields:
+            continue
+        operations.append(UpdateOne({"_id": article["_id"]}, {"$set": fields}))
+        if len(operations) >= batch_size:
+            await db.articles.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+    if operations:
+        await db.articles.bulk_write(operations, ordered=False)
+        updated += len(operations)
+    if updated:
+        logger.info(f"Backfilled dedup keys on {updated} articles")
+
 # Helper function to convert MongoDB documents to Pydantic models
 def document_helper(document) -> dict:
     if document and "_id" in document:
         document["id"] = str(document.pop("_id"))
     return document
 
+# Fields needed to build an ArticleModel response
+# MinHash data is only needed for near-duplicate lookups
+NEAR_DUP_EXCLUDED_FIELDS = {"minhash": 0, "minhash_bands": 0}
+
+ARTICLE_RESPONSE_PROJECTION = {
+    "source": 1, "source_type": 1, "title": 1, "url": 1, "date": 1, "content": 1,
+    "insurance_relevance": 1, "climate_relevance": 1, "total_relevance": 1, "created_at": 1
+}
+
+async def hydrate_documents(collection, field: str, values: List[Any], projection: Dict[str, int] = None) -> Dict[Any, dict]:
+    """
+    Fetch every document whose `field` is in `values` with a single $in query.
+
+    Returns a dict keyed by the field value so callers can walk their own
+    (similarity-ordered) result list and look documents up. Missing values are
+    simply absent; if several documents share a value the first one wins.
+    """
+    unique_values = list(dict.fromkeys(v for v in values if v is not None))
+    if not unique_values:
+        return {}
+
+    documents = {}
+    async for document in collection.find({field: {"$in": unique_values}}, projection):
+        documents.setdefault(document.get(field), document)
+    return documents
+
 # Helper function to ensure report fields are strings
 # Add logging to this function
 def format_report_data(report_data):
@@ -1797,7 +1867,7 @@ async def index_structured_summaries(structured_info: List[Dict[str, Any]], upda
         return ""
     
     # Prepare documents for indexing
-    embedding_model = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+    embedding_model = get_embedding_service()
     docs = []
     
     for info in structured_info:
@@ -1841,27 +1911,24 @@ async def index_structured_summaries(structured_info: List[Dict[str, Any]], upda
         return ""
         
     # Create or update FAISS index
-    index_path = "summaries_index"
+    index_path = SUMMARIES_INDEX
     
     try:
         if os.path.exists(index_path) and update_index:
             try:
-                # Load existing index and add new documents
-                logger.info(f"Loading existing index from {index_path}")
-                existing_index = FAISS.load_local(index_path, embedding_model, allow_dangerous_deserialization=True)
-                existing_index.add_documents(docs)
-                existing_index.save_local(index_path)
-                logger.info(f"Updated existing FAISS index with {len(docs)} new documents")
+                # Only new or changed summaries are embedded and written as a delta segment
+                counts = await asyncio.to_thread(index_manager.upsert, index_path, docs, SUMMARIES_KEY_FIELD)
+                logger.info(f"Updated existing FAISS index: {counts}")
             except Exception as e:
                 logger.error(f"Error updating existing index: {str(e)}. Creating new index.")
                 index = FAISS.from_documents(docs, embedding_model)
-                index.save_local(index_path)
+                index_manager.publish(index_path, index, SUMMARIES_KEY_FIELD)
                 logger.info(f"Created new FAISS index with {len(docs)} documents")
         else:
             # Create new index
             logger.info(f"Creating new FAISS index with {len(docs)} documents")
             index = FAISS.from_documents(docs, embedding_model)
-            index.save_local(index_path)
+            index_manager.publish(index_path, index, SUMMARIES_KEY_FIELD)
             logger.info(f"Created new FAISS index with {len(docs)} documents")
     except Exception as e:
         logger.error(f"Failed to create or update index: {str(e)}")
@@ -1878,7 +1945,7 @@ async def retrieve_relevant_summaries(
     logger.info(f"Retrieving relevant summaries for domains: {domains}, themes: {themes}")
     
     # Check if index exists and load it
-    index_path = "summaries_index"
+    index_path = SUMMARIES_INDEX
     if not os.path.exists(index_path):
         logger.warning("FAISS index not found. Creating from all available summaries.")
         # Get all summaries from database
@@ -1893,14 +1960,19 @@ async def retrieve_relevant_summaries(
         # Create index from all summaries
         await index_structured_summaries(all_summaries)
     
-    # Load the index
-    embedding_model = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-    try:
-        logger.info(f"Loading FAISS index from {index_path}")
-        index = FAISS.load_local(index_path, embedding_model, allow_dangerous_deserialization=True)
-    except Exception as e:
-        logger.error(f"Error loading FAISS index: {str(e)}")
-        return []
+    # Use the resident index; only a cold start loads it from disk
+    snapshot = index_manager.get(index_path)
+    if snapshot is None:
+        try:
+            logger.info(f"Loading FAISS index from {index_path}")
+            await asyncio.to_thread(index_manager.reload_if_changed, index_path)
+        except Exception as e:
+            logger.error(f"Error loading FAISS index: {str(e)}")
+            return []
+        snapshot = index_manager.get(index_path)
+        if snapshot is None:
+            logger.error(f"FAISS index {index_path} is not available")
+            return []
     
     # Build search queries based on domains and themes
     queries = []
@@ -1939,18 +2011,23 @@ async def retrieve_relevant_summaries(
     
     # Run searches and collect results with more controlled limits
     all_results = []
+    # Best reciprocal rank of each article across the queries
+    similarity_by_url: Dict[str, float] = {}
     for query in queries:
         try:
             logger.info(f"Running vector search with query: {query}")
-            results = index.similarity_search(query, k=results_per_query)
+            results = index_manager.filtered_search(index_path, query, results_per_query)
             logger.info(f"Query '{query}' returned {len(results)} results")
             all_results.extend(results)
+            for rank, doc in enumerate(results):
+                article_url = doc.metadata.get("article_url", "")
+                similarity_by_url[article_url] = max(similarity_by_url.get(article_url, 0.0), 1.0 / (rank + 1))
         except Exception as e:
             logger.error(f"Error in similarity search for query '{query}': {str(e)}")
     
     # Deduplicate results - THE CRITICAL FIX IS HERE
     seen_urls = set()  # Track by URL instead of ID
-    unique_results = []
+    unique_docs = []
     
     for doc in all_results:
         # Get the article URL from metadata (more reliable than ID)
@@ -1962,95 +2039,54 @@ async def retrieve_relevant_summaries(
             
         if article_url not in seen_urls:
             seen_urls.add(article_url)
-            
-            # Convert Document back to structured summary format
-            try:
-                # Fetch by article URL instead of ID
-                db_summary = await db.structured_summaries.find_one({"article_url": article_url})
-                
-                if db_summary:
-                    # Use the database version with full data
-                    unique_results.append(document_helper(db_summary))
-                else:
-                    # Fallback to constructing from metadata if not in database
-                    summary = {
-                        "id": doc.metadata.get("id", ""),
-                        "key_event": doc.metadata.get("key_event", ""),
-                        "insurance_domains": doc.metadata.get("insurance_domains", []),
-                        "risk_factors": doc.metadata.get("risk_factors", []),
-                        "business_implications": doc.metadata.get("business_implications", ""),
-                        "timeframe": doc.metadata.get("timeframe", ""),
-                        "confidence": doc.metadata.get("confidence", ""),
-                        "geographic_focus": doc.metadata.get("geographic_focus", ""),
-                        "regulatory_impact": doc.metadata.get("regulatory_impact", ""),
-                        "article_title": doc.metadata.get("article_title", ""),
-                        "article_url": article_url,
-                        "source": doc.metadata.get("source", ""),
-                        "date": doc.metadata.get("date", "")
-                    }
-                    unique_results.append(summary)
-            except Exception as e:
-                logger.error(f"Error processing document with article URL {article_url}: {str(e)}")
-                continue
+            unique_docs.append(doc)
     
-    # If we have too many results after deduplication, limit to top_k
-    if len(unique_results) > top_k:
-        logger.info(f"Limiting {len(unique_results)} results to top {top_k}")
-        
-        # Sort by confidence and relevance to make the best use of context window
-        sorted_results = sorted(
-            unique_results,
-            key=lambda x: (
-                {"High": 3, "Medium": 2, "Low": 1}.get(x.get("confidence", "Unknown"), 0),
-                # Use created_at as secondary sort criteria, most recent first
-                x.get("created_at", datetime.min)
-            ),
-            reverse=True
+    # Fetch the full summaries in one query instead of one per result
+    try:
+        summaries_by_url = await hydrate_documents(
+            db.structured_summaries, "article_url", [doc.metadata["article_url"] for doc in unique_docs]
         )
+    except Exception as e:
+        logger.error(f"Error fetching summaries for vector search results: {str(e)}")
+        summaries_by_url = {}
+    
+    unique_results = []
+    for doc in unique_docs:
+        article_url = doc.metadata["article_url"]
+        db_summary = summaries_by_url.get(article_url)
         
-        unique_results = sorted_results[:top_k]
-    
-    MAX_REPORT_TOKENS = 6000  # Conservative limit for report generation
-    total_chars = 0
-    summaries_with_tokens = []
-
-    for summary in unique_results:
-        # Count key fields that contribute most to token count
-        summary_chars = len(str(summary.get("key_event", ""))) + \
-                    len(str(summary.get("business_implications", ""))) + \
-                    sum(len(str(factor)) for factor in summary.get("risk_factors", [])) + \
-                    len(str(summary.get("article_title", ""))) + \
-                    len(str(summary.get("regulatory_impact", ""))) + \
-                    200  # Buffer for other fields
-        
-        summaries_with_tokens.append((summary, summary_chars / 4))
-        total_chars += summary_chars
-
-    approx_tokens = total_chars / 4
-    logger.info(f"Estimated tokens for all summaries: {approx_tokens:.0f}/{MAX_REPORT_TOKENS}")
-
-    # If token count is too high, reduce the number of summaries
-    if approx_tokens > MAX_REPORT_TOKENS:
-        logger.warning(f"Token count too high ({approx_tokens:.0f}). Reducing summaries.")
-        # Sort by confidence and relevance
-        summaries_with_tokens.sort(key=lambda x: (
-            {"High": 3, "Medium": 2, "Low": 1}.get(x[0].get("confidence", "Unknown"), 0),
-            # Use created_at as secondary sort criteria
-            x[0].get("created_at", datetime.min)
-        ), reverse=True)
-        
-        # Add summaries until we reach token limit
-        filtered_summaries = []
-        current_tokens = 0
-        for summary, token_count in summaries_with_tokens:
-            if current_tokens + token_count <= MAX_REPORT_TOKENS:
-                filtered_summaries.append(summary)
-                current_tokens += token_count
-            else:
-                break
-        
-        logger.info(f"Reduced summaries from {len(unique_results)} to {len(filtered_summaries)}")
-        return filtered_summaries
+        if db_summary:
+            # Use the database version with full data
+            unique_results.append(document_helper(dict(db_summary)))
+        else:
+            # Fallback to constructing from metadata if not in database
+            summary = {
+                "id": doc.metadata.get("id", ""),
+                "key_event": doc.metadata.get("key_event", ""),
+                "insurance_domains": doc.metadata.get("insurance_domains", []),
+                "risk_factors": doc.metadata.get("risk_factors", []),
+                "business_implications": doc.metadata.get("business_implications", ""),
+                "timeframe": doc.metadata.get("timeframe", ""),
+                "confidence": doc.metadata.get("confidence", ""),
+                "geographic_focus": doc.metadata.get("geographic_focus", ""),
+                "regulatory_impact": doc.metadata.get("regulatory_impact", ""),
+                "article_title": doc.metadata.get("article_title", ""),
+                "article_url": article_url,
+                "source": doc.metadata.get("source", ""),
+                "date": doc.metadata.get("date", "")
+            }
+            unique_results.append(summary)
+    
+    # Summaries stored before token counts were recorded get them now
+    stale = ensure_token_counts(unique_results)
+    if stale:
+        await bulk_write_chunked(db.structured_summaries, [
+            UpdateOne(
+                {"article_url": summary["article_url"]},
+                {"$set": {"token_count": summary["token_count"], "token_encoding": summary["token_encoding"]}}
+            )
+            for summary in stale
+        ])
     
     if not unique_results:
         logger.warning("No unique results from vector search. Falling back to database query.")
@@ -2071,11 +2107,14 @@ async def retrieve_relevant_summaries(
         logger.info(f"Fallback query returned {len(fallback_results)} summaries")
         return fallback_results
         
-    # Limit to top_k results
     logger.info(f"Vector search returned {len(unique_results)} unique summaries")
-
-# If token count is OK, return original results
-    return unique_results
+    
+    # Keep the most useful summaries that fit the report context, at most top_k
+    return pack_summaries(
+        unique_results,
+        similarity=lambda summary: similarity_by_url.get(summary.get("article_url", "")),
+        limit=top_k
+    )
     
     # If we still have no unique results, fall back to database query
     
@@ -2121,10 +2160,10 @@ async def rebuild_vector_indices(background_tasks: BackgroundTasks):
                 
             if all_summaries:
                 # Force creation of new index
-                if os.path.exists("summaries_index"):
+                if os.path.exists(SUMMARIES_INDEX):
                     logger.info("Removing existing summaries index")
                     import shutil
-                    shutil.rmtree("summaries_index")
+                    shutil.rmtree(SUMMARIES_INDEX)
                 
                 await index_structured_summaries(all_summaries)
                 logger.info(f"Rebuilt summaries index with {len(all_summaries)} summaries")
@@ -2133,21 +2172,22 @@ async def rebuild_vector_indices(background_tasks: BackgroundTasks):
                 
             # Rebuild articles index
             all_articles = []
-            async for article in db.articles.find({}):
+            async for article in db.articles.find({"duplicate_of": None}, NEAR_DUP_EXCLUDED_FIELDS):
                 all_articles.append(document_helper(article))
                 
             if all_articles:
                 # Force creation of new index
-                if os.path.exists("articles_index"):
+                if os.path.exists(ARTICLES_INDEX):
                     logger.info("Removing existing articles index")
                     import shutil
-                    shutil.rmtree("articles_index")
+                    shutil.rmtree(ARTICLES_INDEX)
                 
                 await asyncio.to_thread(update_articles_index, all_articles, update_index=False)
                 logger.info(f"Rebuilt articles index with {len(all_articles)} articles")
             else:
                 logger.warning("No articles found for indexing")
-                
+            
+            await refresh_article_filter_columns()
             logger.info("Vector indices rebuild completed successfully")
             
         except Exception as e:
@@ -2161,123 +2201,154 @@ async def rebuild_vector_indices(background_tasks: BackgroundTasks):
         "status": "accepted"
     }
 
-async def run_analysis_pipeline(task_id: str, custom_sources: List[Dict[str, Any]] = None):
-    """Run the full analysis pipeline as a background task with efficient caching and vector DB support"""
+async def rescore_all_articles(batch_size: int = 2000) -> Dict[str, int]:
+    """
+    Recompute keyword relevance for every stored article.
+    
+    Articles are streamed in batches with only the scored fields projected,
+    scored off the event loop, and only changed scores are written back.
+    Articles that no longer match get zeroed scores, so relevance queries
+    stop selecting them.
+    """
+    projection = {
+        "title": 1, "content": 1, "source": 1, "category": 1,
+        "insurance_relevance": 1, "climate_relevance": 1, "total_relevance": 1
+    }
+    stats = {"scanned": 0, "relevant": 0, "updated": 0, "cleared": 0}
+    no_scores = {"insurance_relevance": 0, "climate_relevance": 0, "total_relevance": 0}
+    
+    async def rescore_batch(batch):
+        scores = await asyncio.to_thread(score_articles, batch)
+        operations = []
+        for article, article_scores in zip(batch, scores):
+            if not article_scores:
+                if any(article.get(field) for field in no_scores):
+                    stats["cleared"] += 1
+                    operations.append(UpdateOne(
+                        {"_id": article["_id"]},
+                        {"$set": dict(no_scores, updated_at=datetime.now())}
+                    ))
+                continue
+            stats["relevant"] += 1
+            if any(article.get(field) != value for field, value in article_scores.items()):
+                operations.append(UpdateOne(
+                    {"_id": article["_id"]},
+                    {"$set": dict(article_scores, updated_at=datetime.now())}
+                ))
+        if operations:
+            await db.articles.bulk_write(operations, ordered=False)
+            stats["updated"] += len(operations)
+    
+    batch = []
+    async for article in db.articles.find({"duplicate_of": None}, projection).batch_size(batch_size):
+        batch.append(article)
+        stats["scanned"] += 1
+        if len(batch) >= batch_size:
+            await rescore_batch(batch)
+            batch = []
+    if batch:
+        await rescore_batch(batch)
+    
+    return stats
+
+@app.post("/admin/rescore-articles")
+async def rescore_articles_endpoint():
+    """Recompute keyword relevance scores for the whole articles collection."""
+    start = time.perf_counter()
+    stats = await rescore_all_articles()
+    stats["seconds"] = round(time.perf_counter() - start, 2)
+    return stats
+
+async def run_analysis_pipeline(
+    task_id: str,
+    custom_sources: List[Dict[str, Any]] = None,
+    progress: Optional[Callable[[str, Dict[str, Any]], None]] = None
+):
+    """
+    Run the full analysis pipeline as a background task with efficient caching and vector DB support
+
+    progress, if given, is called with (event, data) for each pipeline stage,
+    for report section text as it's generated, and for the stored report or
+    a failure. It may be called from a worker thread.
+    """
+    def notify(event: str, **data):
+        if progress is not None:
+            progress(event, data)
+    
     try:
         logger.info(f"Starting analysis pipeline for task {task_id}")
         
         # Step 1: Scrape news sources
         sources_to_use = custom_sources if custom_sources else NEWS_SOURCES
         
-        # Check for existing articles to avoid duplicate scraping
-        # Check for existing articles to avoid duplicate scraping
-        existing_articles = {}
-        existing_content_hashes = set()
-
-        # Get existing URLs and content hashes
-        async for article in db.articles.find({}, {"url": 1, "content": 1, "_id": 0}):
-            if "url" in article:
-                # Normalize the URL to handle minor variations
-                norm_url = normalize_url(article["url"])
-                existing_articles[norm_url] = True
-                
-                # If content is available, hash it to detect duplicate content
+        # Dedup against stored articles through the indexed normalized_url and
+        # content_hash fields, checking candidates in batches instead of
+        # pulling every stored article at startup
+        seen_urls_this_run = set()
+        
+        async def select_new_urls(urls: List[str]) -> List[str]:
+            normalized = {url: normalize_url(url) for url in urls}
+            existing = await find_existing_keys("normalized_url", list(normalized.values()))
+            new_urls = []
+            for url, norm_url in normalized.items():
+                if norm_url in existing or norm_url in seen_urls_this_run:
+                    continue
+                # Prevent duplicates within this scraping run
+                seen_urls_this_run.add(norm_url)
+                new_urls.append(url)
+            return new_urls
+        
+        # Crawl all sources concurrently. Each listing page is scanned for links we
+        # haven't stored yet and those articles are fetched as soon as it's parsed
+        newly_scraped_articles = await crawl_news_sources(
+            sources_to_use,
+            url_filter=select_new_urls,
+            link_parser=extract_candidate_links
+        )
+        logger.info(f"Scraped {len(newly_scraped_articles)} new articles")
+        notify("stage", stage="scraped", count=len(newly_scraped_articles))
+        
+        if newly_scraped_articles:
+            for article in newly_scraped_articles:
+                article["normalized_url"] = normalize_url(article["url"])
                 if "content" in article and article["content"]:
-                    content_hash = hash_content(article["content"])
-                    existing_content_hashes.add(content_hash)
-                    
-        logger.info(f"Found {len(existing_articles)} existing article URLs and {len(existing_content_hashes)} content hashes")
-
-        # First pass - quick check of URLs that might need scraping
-        articles_to_scrape = []
-        for source in sources_to_use:
-            source_name = source.get("name")
-            source_url = source.get("url")
-            source_type = source.get("type", "news")
+                    article["content_hash"] = hash_content(article["content"])
+                    article.update(await asyncio.to_thread(minhash_fields, article["content"]))
             
-            logger.info(f"Quick checking source: {source_name} ({source_url})")
-
-            try:
-                # Get basic list of URLs without full content scraping
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                }
-                response = requests.get(source_url, headers=headers, timeout=10)
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Extract all links with better filtering
-                for a in soup.find_all('a', href=True):
-                    href = a['href']
-                    
-                    # Skip empty or JavaScript links
-                    if not href or href.startswith('javascript:') or href == '#':
-                        continue
-                        
-                    # Basic filtering for article links with improved criteria
-                    if (('news' in href or 'article' in href or 'press' in href or 'blog' in href or 
-                        'report' in href or 'publication' in href or 'release' in href) and 
-                        not href.endswith(('.pdf', '.jpg', '.png', '.zip', '.doc', '.docx', '.csv'))):
-                        
-                        if not href.startswith('http'):
-                            # Handle relative URLs
-                            base_url = '/'.join(source_url.split('/')[:3])
-                            href = base_url + href if href.startswith('/') else base_url + '/' + href
-                        
-                        # Normalize the URL
-                        norm_href = normalize_url(href)
-                        
-                        # Check if we already have this article
-                        if norm_href not in existing_articles:
-                            articles_to_scrape.append({
-                                "url": href,
-                                "source": source_name,
-                                "source_type": source_type
-                            })
-                            
-                            # Add to existing articles to prevent duplicates within this scraping run
-                            existing_articles[norm_href] = True
-                            
-            except Exception as e:
-                logger.error(f"Error during quick check of {source_name}: {str(e)}")
-        
-        logger.info(f"Found {len(articles_to_scrape)} new articles to scrape")
-
-        # Now fully scrape only the new articles
-        newly_scraped_articles = []
-        if articles_to_scrape:
-            # Use your existing scraping function but only for new URLs
-            newly_scraped_articles = await asyncio.to_thread(
-                scrape_news_sources.invoke, 
-                {"articles": articles_to_scrape}
-            )
+            # Syndicated copies are stored with a duplicate_of link and left
+            # out of scoring, embedding and LLM extraction
+            near_duplicates = await find_near_duplicates(newly_scraped_articles)
+            for article in newly_scraped_articles:
+                if article["url"] in near_duplicates:
+                    article["duplicate_of"] = near_duplicates[article["url"]]
+            logger.info(f"Found {len(near_duplicates)} near-duplicate articles")
             
-            logger.info(f"Scraped {len(newly_scraped_articles)} new articles")
+            existing_content_hashes = await find_existing_keys(
+                "content_hash",
+                [article["content_hash"] for article in newly_scraped_articles if article.get("content_hash")]
+            )
             
-            # Store new articles in MongoDB with upsert logic
             # Store new articles in MongoDB with upsert logic and content hash check
+            article_ops = []
             for article in newly_scraped_articles:
                 # Check for duplicate content
-                if "content" in article and article["content"]:
-                    content_hash = hash_content(article["content"])
+                content_hash = article.get("content_hash")
+                if content_hash:
                     if content_hash in existing_content_hashes:
                         logger.info(f"Skipping article with duplicate content: {article.get('title', 'unknown')}")
                         continue
                     existing_content_hashes.add(content_hash)
                 
                 article["created_at"] = datetime.now()
-                # Add the content hash to the article
-                if "content" in article and article["content"]:
-                    article["content_hash"] = content_hash
-                    
-                try:
-                    # Use upsert to avoid duplicate key errors
-                    await db.articles.update_one(
-                        {"url": article["url"]},
-                        {"$set": article},
-                        upsert=True
-                    )
-                except Exception as e:
-                    logger.error(f"Error storing article {article.get('url', 'unknown')}: {str(e)}")
+                # Upsert to avoid duplicate key errors
+                article_ops.append(upsert_op({"url": article["url"]}, article))
+            
+            await bulk_write_chunked(db.articles, article_ops)
+        
+        # Refresh stored relevance scores so the high-relevance query below
+        # reflects the current keyword lists
+        rescore_stats = await rescore_all_articles()
+        logger.info(f"Rescored stored articles: {rescore_stats}")
         
         # Step 2: Get all relevant articles for analysis (both new and existing)
         # We'll analyze everything with a recent timestamp or high relevance
@@ -2288,11 +2359,12 @@ async def run_analysis_pipeline(task_id: str, custom_sources: List[Dict[str, Any
             "$or": [
                 {"created_at": {"$gte": thirty_days_ago}},
                 {"total_relevance": {"$gte": 8}}  # High relevance articles are always included
-            ]
+            ],
+            "duplicate_of": None
         }
         
         all_articles = []
-        async for article in db.articles.find(query):
+        async for article in db.articles.find(query, NEAR_DUP_EXCLUDED_FIELDS):
             all_articles.append(document_helper(article))
             
         logger.info(f"Retrieved {len(all_articles)} total articles for analysis")
@@ -2301,25 +2373,11 @@ async def run_analysis_pipeline(task_id: str, custom_sources: List[Dict[str, Any
             logger.warning("No articles found for analysis")
             raise ValueError("No articles available for analysis")
             
-        # Step 3: Analyze relevance for all articles
-        relevant_articles = await asyncio.to_thread(analyze_insurance_relevance.invoke, {"articles": all_articles})
+        # Step 3: Relevant articles are those the rescore above left with
+        # nonzero scores; it already stored the current scores
+        relevant_articles = [article for article in all_articles if article.get("total_relevance")]
         logger.info(f"Found {len(relevant_articles)} relevant articles")
-        
-        # Update articles with relevance scores
-        for article in relevant_articles:
-            try:
-                query = {"url": article["url"]}
-                update = {
-                    "$set": {
-                        "insurance_relevance": article.get("insurance_relevance", 0),
-                        "climate_relevance": article.get("climate_relevance", 0),
-                        "total_relevance": article.get("total_relevance", 0),
-                        "updated_at": datetime.now()
-                    }
-                }
-                await db.articles.update_one(query, update)
-            except Exception as e:
-                logger.error(f"Error updating relevance for article {article.get('url', 'unknown')}: {str(e)}")
+        notify("stage", stage="relevant", count=len(relevant_articles), analyzed=len(all_articles))
         
         # Step 4: Extract structured information
         # First, check which articles already have structured information
@@ -2341,34 +2399,35 @@ async def run_analysis_pipeline(task_id: str, custom_sources: List[Dict[str, Any
         newly_extracted_info = []
         
         if articles_needing_extraction:
-            newly_extracted_info = await asyncio.to_thread(
-                extract_structured_info.invoke, 
-                {"articles": articles_needing_extraction}
-            )
+            newly_extracted_info = await aextract_structured_info(articles_needing_extraction)
             
             logger.info(f"Extracted structured information from {len(newly_extracted_info)} new articles")
             
             # Store newly extracted structured summaries
+            now = datetime.now()
             for info in newly_extracted_info:
-                try:
-                    info["created_at"] = datetime.now()
-                    await db.structured_summaries.update_one(
-                        {"article_url": info.get("article_url")},
-                        {"$set": info},
-                        upsert=True
-                    )
-                except Exception as e:
-                    logger.error(f"Error storing structured info for {info.get('article_url', 'unknown')}: {str(e)}")
+                info["created_at"] = now
+            await bulk_write_chunked(db.structured_summaries, [
+                upsert_op({"article_url": info.get("article_url")}, info) for info in newly_extracted_info
+            ])
+            try:
+                await refresh_rollups(db)
+            except Exception as e:
+                logger.error(f"Error refreshing trend rollups: {str(e)}")
+            await response_cache.invalidate("summaries")
         all_structured_info = []
         async for info in db.structured_summaries.find({}):
             all_structured_info.append(document_helper(info))
             
         logger.info(f"Retrieved {len(all_structured_info)} total structured summaries for report generation")
+        notify("stage", stage="extracted", count=len(newly_extracted_info), total=len(all_structured_info))
         
         # Index new summaries in vector DB
         if newly_extracted_info:
             logger.info(f"Indexing {len(newly_extracted_info)} new structured summaries")
             await index_structured_summaries(newly_extracted_info, update_index=True)
+        # Rescored relevance and new summary domains change the filter columns
+        await refresh_article_filter_columns()
         
         # Step 5: Generate reports using vector search to get relevant summaries
         # Determine important insurance domains and themes for this report
@@ -2406,51 +2465,6 @@ async def run_analysis_pipeline(task_id: str, custom_sources: List[Dict[str, Any
         
         logger.info(f"Retrieved {len(relevant_summaries)} relevant summaries using vector search")
 
-        MAX_TOKENS = 6000  # Conservative limit for LLM context
-        total_chars = 0
-        for summary in relevant_summaries:
-            # Count key fields that contribute most to token count
-            total_chars += len(str(summary.get("key_event", "")))
-            total_chars += len(str(summary.get("business_implications", "")))
-            total_chars += sum(len(str(factor)) for factor in summary.get("risk_factors", []))
-            total_chars += len(str(summary.get("article_title", "")))
-            total_chars += len(str(summary.get("regulatory_impact", "")))
-            total_chars += 200  # Buffer for other fields
-
-        approx_tokens = total_chars / 4  # Rough approximation
-        logger.info(f"Estimated tokens for report generation: {approx_tokens:.0f}/{MAX_TOKENS}")
-
-        # If token count is too high, reduce the number of summaries
-        if approx_tokens > MAX_TOKENS:
-            logger.warning(f"Token count too high ({approx_tokens:.0f}). Reducing summaries.")
-            # Sort by confidence and recency to keep most important summaries
-            relevant_summaries.sort(key=lambda x: (
-                {"High": 3, "Medium": 2, "Low": 1}.get(x.get("confidence", "Unknown"), 0),
-                x.get("created_at", datetime.min)
-            ), reverse=True)
-            
-            # Add summaries until we reach token limit
-        reduced_summaries = []
-        current_tokens = 0
-        for summary in relevant_summaries:
-            summary_chars = len(str(summary.get("key_event", ""))) + \
-                            len(str(summary.get("business_implications", ""))) + \
-                            sum(len(str(factor)) for factor in summary.get("risk_factors", [])) + \
-                            len(str(summary.get("article_title", ""))) + \
-                            len(str(summary.get("regulatory_impact", ""))) + \
-                            200  # Buffer
-                
-            summary_tokens = summary_chars / 4
-                
-            if current_tokens + summary_tokens <= MAX_TOKENS:
-                    reduced_summaries.append(summary)
-                    current_tokens += summary_tokens
-            else:
-                    break
-    
-        logger.info(f"Reduced summaries from {len(relevant_summaries)} to {len(reduced_summaries)}")
-        relevant_summaries = reduced_summaries
-
         # If vector search fails or returns too few results, fall back to database query
         if len(relevant_summaries) < 1:
             logger.warning("Vector search returned insufficient results, falling back to database query")
@@ -2476,6 +2490,7 @@ async def run_analysis_pipeline(task_id: str, custom_sources: List[Dict[str, Any
    
         try:
             logger.info(f"Starting report generation with {len(relevant_summaries)} summaries")
+            notify("stage", stage="summaries", count=len(relevant_summaries))
             if relevant_summaries:
                 logger.debug(f"First summary: {relevant_summaries[0]}")
             
@@ -2483,7 +2498,12 @@ async def run_analysis_pipeline(task_id: str, custom_sources: List[Dict[str, Any
             try:
                 report_data = await asyncio.to_thread(
                     generate_summary_reports.invoke, 
-                    {"structured_info": relevant_summaries, "llm": llm}
+                    {
+                        "structured_info": relevant_summaries,
+                        "llm": llm,
+                        "on_section_text": lambda section, text: notify("section", section=section, text=text),
+                        "on_sections_reset": lambda: notify("reset", stage="report")
+                    }
                 )
                 
                 # Add immediate verification of response
@@ -2564,8 +2584,16 @@ async def run_analysis_pipeline(task_id: str, custom_sources: List[Dict[str, Any
                 
                 if report_id:
                     logger.info(f"Report stored successfully with ID: {report_id}")
+                    await db.tasks.update_one(
+                        {"_id": ObjectId(task_id)},
+                        {"$set": {"status": "completed", "report_id": str(report_id), "completed_at": datetime.now()}}
+                    )
+                    notify("report", report_id=str(report_id), report=report)
+                    dashboard_view.mark_dirty()
+                    await response_cache.invalidate("reports")
                 else:
                     logger.error("Failed to store report in database")
+                    notify("error", message="Failed to store report in database")
 
             except Exception as db_error:  # <-- Define the variable here
                 logger.error(f"MongoDB error storing report: {str(db_error)}", exc_info=True)
@@ -2583,12 +2611,14 @@ async def run_analysis_pipeline(task_id: str, custom_sources: List[Dict[str, Any
                         truncated_report["truncated"] = True
                         result = await db.reports.insert_one(truncated_report)
                         logger.info(f"Stored truncated report with ID: {result.inserted_id}")
+                        await response_cache.invalidate("reports")
                     except Exception as truncate_error:
                         logger.error(f"Failed to store truncated report: {str(truncate_error)}")
             
         
         except Exception as e:
             logger.error(f"Error in analysis pipeline for task {task_id}: {str(e)}")
+            notify("error", message=str(e))
             # Update task status with error
             try:
                 await db.tasks.update_one(
@@ -2603,6 +2633,7 @@ async def run_analysis_pipeline(task_id: str, custom_sources: List[Dict[str, Any
                 logger.error(f"Error updating task failure status: {str(update_error)}")
     except Exception as e:
         logger.error(f"Error preparing report document: {str(e)}", exc_info=True)
+        notify("error", message=str(e))
 
 async def verify_report_saved(task_id):
     """Check if a report was successfully saved for a task"""
@@ -3397,7 +3428,7 @@ async def summarize_article(request: SummaryRequest):
     ]
 
     # Call the LLM
-    llm_response = llm.invoke(messages)
+    llm_response = await llm_executor.ainvoke(llm, messages)
     return {"summary": llm_response.content}
 
 @app.get("/reports", response_model=List[ReportModel])
@@ -3581,63 +3612,29 @@ async def get_active_hazards():
         logger.error(f"Error fetching weather hazards: {str(e)}")
         return []
 
+# Materialized /dashboard/stats document, refreshed on writes instead of per request
+dashboard_view = DashboardStatsView(
+    db,
+    format_report=lambda report: document_helper(format_report_data(report)),
+    on_refresh=lambda: response_cache.invalidate("dashboard")
+)
+
 @app.get("/dashboard/stats", response_model=DashboardStats)
-async def get_dashboard_stats():
-    """Get dashboard statistics"""
-    try:
-        # Count total articles
-        total_articles = await db.articles.count_documents({})
-        
-        # Count total reports
-        total_reports = await db.reports.count_documents({})
-        
-        # Get source distribution
-        pipeline = [
-            {"$group": {"_id": "$source", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}}
-        ]
-        source_distribution = {}
-        async for doc in db.articles.aggregate(pipeline):
-            source_distribution[doc["_id"]] = doc["count"]
-        
-        # Get domain distribution
-        pipeline = [
-            {"$unwind": "$insurance_domains"},
-            {"$group": {"_id": "$insurance_domains", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}}
-        ]
-        domain_distribution = {}
-        async for doc in db.structured_summaries.aggregate(pipeline):
-            domain_distribution[doc["_id"]] = doc["count"]
-        
-        # Get risk factor frequency
-        pipeline = [
-            {"$unwind": "$risk_factors"},
-            {"$group": {"_id": "$risk_factors", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 10}
-        ]
-        risk_factor_frequency = {}
-        async for doc in db.structured_summaries.aggregate(pipeline):
-            risk_factor_frequency[doc["_id"]] = doc["count"]
-        
-        # Get most recent report
-        recent_report = await db.reports.find_one({}, sort=[("created_at", -1)])
-        
-        # Format report fields to ensure they are strings
-        if recent_report:
-            recent_report = format_report_data(recent_report)
-            recent_report = document_helper(recent_report)
-        
-        return {
-            "total_articles": total_articles,
-            "total_reports": total_reports,
-            "source_distribution": source_distribution,
-            "domain_distribution": domain_distribution,
-            "risk_factor_frequency": risk_factor_frequency,
-            "recent_report": format_report_data(recent_report) if recent_report else None
+async def get_dashboard_stats(request: Request, response: Response):
+    """Get dashboard statistics
 
-        }
+    Served from the materialized dashboard_stats document. Its version is
+    the ETag, so a client revalidating with If-None-Match gets a 304 until
+    the statistics change.
+    """
+    try:
+        stats = await dashboard_view.get()
+        etag = f'"{stats.pop("version")}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+        return stats
     except Exception as e:
         logger.error(f"Error in get_dashboard_stats: {str(e)}")
         # Return minimal stats if there's an error
@@ -3649,8 +3646,18 @@ async def get_dashboard_stats():
             "risk_factor_frequency": {},
             "recent_report": None
         }
+
+@app.post("/admin/dashboard-stats/refresh")
+async def refresh_dashboard_stats():
+    """Recompute the materialized dashboard statistics now."""
+    document = await dashboard_view.refresh()
+    return {"version": document["version"], "updated_at": document["updated_at"], **dashboard_view.stats}
     
-async def run_analysis_pipeline_with_timeout(task_id: str, custom_sources: List[Dict[str, Any]] = None):
+async def run_analysis_pipeline_with_timeout(
+    task_id: str,
+    custom_sources: List[Dict[str, Any]] = None,
+    progress: Optional[Callable[[str, Dict[str, Any]], None]] = None
+):
     """Run the analysis pipeline with a timeout to prevent indefinitely hanging tasks"""
     logger.info(f"Starting analysis pipeline with timeout for task {task_id}")
     
@@ -3660,7 +3667,7 @@ async def run_analysis_pipeline_with_timeout(task_id: str, custom_sources: List[
     # Run the analysis task
     async def run_task():
         try:
-            await run_analysis_pipeline(task_id, custom_sources)
+            await run_analysis_pipeline(task_id, custom_sources, progress)
             task_done.set()  # Signal that the task is done
         except Exception as e:
             logger.error(f"Error in analysis pipeline: {str(e)}")
@@ -3688,6 +3695,8 @@ async def run_analysis_pipeline_with_timeout(task_id: str, custom_sources: List[
         logger.info(f"Analysis pipeline completed for task {task_id}")
     except asyncio.TimeoutError:
         logger.error(f"Analysis pipeline timed out after 30 minutes for task {task_id}")
+        if progress is not None:
+            progress("error", {"message": "Analysis pipeline timed out after 30 minutes"})
         
         # Update the task status
         try:
@@ -3756,6 +3765,69 @@ async def get_task_status(task_id: str):
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Task {task_id} not found: {str(e)}")
 
+SSE_KEEPALIVE_SECONDS = 15
+
+# Pipelines started by /analysis/stream; held so they finish even if the client disconnects
+streamed_pipelines = set()
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.get("/analysis/stream")
+async def stream_analysis(request: Request):
+    """
+    Run the analysis pipeline and stream its progress as server-sent events.
+
+    Events: ``task`` (task_id), ``stage`` (scraped / relevant / extracted /
+    summaries with counts), ``section`` (report text as it's generated),
+    ``reset`` (the report is regenerated; discard streamed sections),
+    ``report`` (the stored report), ``error`` and finally ``done``. The task
+    is recorded in db.tasks like /analysis/run, and the pipeline runs to
+    completion even if the client goes away.
+    """
+    task = {
+        "type": "manual",
+        "description": "Streamed climate risk analysis",
+        "status": "pending",
+        "created_at": datetime.now()
+    }
+    result = await db.tasks.insert_one(task)
+    task_id = str(result.inserted_id)
+    
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    
+    def progress(event: str, data: Dict[str, Any]):
+        # Report sections arrive from the report generation thread
+        loop.call_soon_threadsafe(events.put_nowait, (event, data))
+    
+    pipeline = asyncio.create_task(run_analysis_pipeline_with_timeout(task_id, progress=progress))
+    streamed_pipelines.add(pipeline)
+    pipeline.add_done_callback(streamed_pipelines.discard)
+    pipeline.add_done_callback(lambda _: events.put_nowait(None))
+    
+    async def event_stream():
+        yield sse_event("task", {"task_id": task_id})
+        while True:
+            if await request.is_disconnected():
+                logger.info(f"Client left the analysis stream for task {task_id}; pipeline continues")
+                return
+            try:
+                item = await asyncio.wait_for(events.get(), SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if item is None:
+                yield sse_event("done", {"task_id": task_id})
+                return
+            yield sse_event(*item)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Add this function to your app.py file
 
 # In app.py
@@ -3874,43 +3946,94 @@ async def create_fallback_report_for_task(task_id):
     try:
         result = await db.reports.insert_one(fallback_report)
         logger.info(f"Successfully created fallback report with ID: {result.inserted_id} for task {task_id}")
+        await response_cache.invalidate("reports")
     except Exception as e:
         logger.error(f"Error creating fallback report for task {task_id}: {str(e)}")
 
+# Shown for a domain with no recent risk factors
+DEFAULT_DOMAIN_FACTORS = {
+    "property": ["Floods", "Wildfires", "Hurricanes"],
+    "casualty": ["Liability claims", "Disclosure failures"],
+    "life": ["Heat-related illness", "Climate mortality"],
+    "health": ["Vector-borne diseases", "Heat stress"],
+    "reinsurance": ["Capacity constraints", "Pricing increases"],
+}
+
+def domain_window_pipeline(domains: List[str], start: str, previous_start: str, end: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    One aggregation over structured summaries giving, per domain, the summary
+    counts for [start, end) and the preceding window [previous_start, start),
+    and the top risk factors in [start, end). Dates are YYYY-MM-DD strings;
+    end=None leaves the current window open-ended.
+    """
+    date_range = {"$gte": previous_start}
+    if end:
+        date_range["$lt"] = end
+    return [
+        {"$match": {"insurance_domains": {"$in": domains}, "date": date_range}},
+        # Count each summary once per domain, even if the domain is listed twice
+        {"$project": {
+            "date": 1,
+            "risk_factors": 1,
+            "insurance_domains": {"$cond": [
+                {"$isArray": "$insurance_domains"},
+                {"$setIntersection": ["$insurance_domains", domains]},
+                []
+            ]}
+        }},
+        {"$unwind": "$insurance_domains"},
+        {"$facet": {
+            "counts": [
+                {"$group": {
+                    "_id": {"domain": "$insurance_domains", "current": {"$gte": ["$date", start]}},
+                    "count": {"$sum": 1}
+                }}
+            ],
+            "factors": [
+                {"$match": {"date": {"$gte": start}}},
+                {"$unwind": "$risk_factors"},
+                {"$group": {"_id": {"domain": "$insurance_domains", "factor": "$risk_factors"}, "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}},
+                {"$group": {"_id": "$_id.domain", "factors": {"$push": "$_id.factor"}}},
+                {"$project": {"factors": {"$slice": ["$factors", 3]}}}
+            ]
+        }}
+    ]
+
 @app.get("/domains/risk-scores", response_model=List[DomainRiskScore])
-async def get_domain_risk_scores():
+async def get_domain_risk_scores(
+    end_date: Optional[str] = Query(None, description="End of the scoring window (YYYY-MM-DD, exclusive); defaults to now"),
+    window_days: int = Query(30, ge=1, le=365, description="Length of the scoring window in days")
+):
     """
     Calculate and return current risk scores for each insurance domain
     based on the structured summaries
+
+    Scores any window: the trend compares it with the window of the same
+    length just before it. All domains are scored by a single aggregation.
     """
     domains = ["property", "casualty", "life", "health", "reinsurance"]
-    domain_scores = []
     
+    try:
+        end = datetime.strptime(end_date, "%Y-%m-%d") if end_date else datetime.now()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="end_date must be YYYY-MM-DD")
+    start = (end - timedelta(days=window_days)).strftime("%Y-%m-%d")
+    previous_start = (end - timedelta(days=2 * window_days)).strftime("%Y-%m-%d")
+    
+    counts = {domain: {"current": 0, "previous": 0} for domain in domains}
+    top_factors_by_domain = {}
+    async for facets in db.structured_summaries.aggregate(domain_window_pipeline(domains, start, previous_start, end_date)):
+        for doc in facets["counts"]:
+            window = "current" if doc["_id"]["current"] else "previous"
+            counts[doc["_id"]["domain"]][window] = doc["count"]
+        for doc in facets["factors"]:
+            top_factors_by_domain[doc["_id"]] = doc["factors"]
+    
+    domain_scores = []
     for domain in domains:
-        # Find recent summaries for this domain (last 30 days)
-        thirty_days_ago = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
-        
-        # Get relevant summaries
-        query = {
-            "insurance_domains": domain,
-            "date": {"$gte": thirty_days_ago}
-        }
-        
-        # Count how many summaries exist for this domain
-        count = await db.structured_summaries.count_documents(query)
-        
-        # Calculate average confidence and determine top factors
-        pipeline = [
-            {"$match": query},
-            {"$unwind": "$risk_factors"},
-            {"$group": {"_id": "$risk_factors", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 3}
-        ]
-        
-        top_factors = []
-        async for doc in db.structured_summaries.aggregate(pipeline):
-            top_factors.append(doc["_id"])
+        count = counts[domain]["current"]
+        previous_count = counts[domain]["previous"]
         
         # Calculate a risk score based on number of recent mentions
         # and normalize between 1-10
@@ -3920,13 +4043,6 @@ async def get_domain_risk_scores():
             base_score = 5.0 + (domains.index(domain) % 3)
             
         # Determine trend by comparing with previous period
-        sixty_days_ago = (datetime.now() - timedelta(days=60)).strftime("%Y-%m-%d")
-        previous_query = {
-            "insurance_domains": domain,
-            "date": {"$gte": sixty_days_ago, "$lt": thirty_days_ago}
-        }
-        previous_count = await db.structured_summaries.count_documents(previous_query)
-        
         if count > previous_count * 1.2:
             trend = "increasing"
         elif count < previous_count * 0.8:
@@ -3940,24 +4056,12 @@ async def get_domain_risk_scores():
                 trend = "increasing"
             else:
                 trend = "stable"
-                
-        # Fallback for empty factor list
-        if not top_factors:
-            if domain == "property":
-                top_factors = ["Floods", "Wildfires", "Hurricanes"]
-            elif domain == "casualty":
-                top_factors = ["Liability claims", "Disclosure failures"]
-            elif domain == "life":
-                top_factors = ["Heat-related illness", "Climate mortality"]
-            elif domain == "health":
-                top_factors = ["Vector-borne diseases", "Heat stress"]
-            else:  # reinsurance
-                top_factors = ["Capacity constraints", "Pricing increases"]
         
         domain_scores.append({
             "domain": domain,
             "risk_score": round(base_score, 1),
-            "contributing_factors": top_factors,
+            # Fallback for empty factor list
+            "contributing_factors": top_factors_by_domain.get(domain) or DEFAULT_DOMAIN_FACTORS[domain],
             "trend": trend
         })
     
@@ -3993,7 +4097,7 @@ async def generate_topic_clusters(num_clusters: int = 5) -> List[Dict[str, Any]]
         return []
     
     # Generate embeddings for each summary
-    embedding_model = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+    embedding_model = get_embedding_service()
     
     # Create combined text for each summary
     texts = []
@@ -4100,32 +4204,45 @@ async def startup_event():
         await db.articles.create_index("url", unique=True)
         await db.articles.create_index("total_relevance")
         await db.articles.create_index("content_hash")
+        await db.articles.create_index("normalized_url")
+        await db.articles.create_index("minhash_bands")
+        await db.articles.create_index("duplicate_of")
         await db.articles.create_index("source")
         await db.articles.create_index("date")
         await db.structured_summaries.create_index("insurance_domains")
+        await db.structured_summaries.create_index([("insurance_domains", 1), ("date", 1)])
+        await db.structured_summaries.create_index("date")
         await db.structured_summaries.create_index("created_at")
         await db.reports.create_index("created_at")
         
-        # Check if vector indices exist and are valid
+        # Add dedup keys to older articles in the background
+        asyncio.create_task(backfill_dedup_keys())
+        
+        # Keep /dashboard/stats current from change streams where the server supports them
+        dashboard_view.start()
+        
+        # Load the shared embedding model up front so the first search doesn't pay for it
+        if os.getenv("EMBEDDING_WARMUP", "true").lower() == "true":
+            try:
+                await asyncio.to_thread(get_embedding_service().warmup)
+                logger.info(f"Embedding model warmed up: {get_embedding_service().stats()}")
+            except Exception as e:
+                logger.error(f"Error warming up embedding model: {str(e)}")
+
+        # Load vector indices into memory, verifying they are valid
         try:
-            if os.path.exists("summaries_index"):
-                embedding_model = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-                FAISS.load_local("summaries_index", embedding_model, allow_dangerous_deserialization=True)
-                logger.info("Verified existing summaries_index is valid")
-            else:
-                logger.warning("summaries_index does not exist, will be created when needed")
-                
-            if os.path.exists("articles_index"):
-                embedding_model = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-                FAISS.load_local("articles_index", embedding_model, allow_dangerous_deserialization=True)
-                logger.info("Verified existing articles_index is valid")
-            else:
-                logger.warning("articles_index does not exist, will be created when needed")
+            for index_path in [SUMMARIES_INDEX, ARTICLES_INDEX]:
+                if os.path.exists(index_path):
+                    await asyncio.to_thread(index_manager.reload_if_changed, index_path)
+                    logger.info(f"Verified existing {index_path} is valid and loaded it into memory")
+                else:
+                    logger.warning(f"{index_path} does not exist, will be created when needed")
+            await refresh_article_filter_columns()
         except Exception as e:
             logger.error(f"Error verifying vector indices: {str(e)}")
             # Remove potentially corrupted indices
-            for index_path in ["summaries_index", "articles_index"]:
-                if os.path.exists(index_path):
+            for index_path in [SUMMARIES_INDEX, ARTICLES_INDEX]:
+                if os.path.exists(index_path) and index_manager.get(index_path) is None:
                     logger.warning(f"Removing potentially corrupted index: {index_path}")
                     import shutil
                     shutil.rmtree(index_path)
@@ -4160,21 +4277,49 @@ async def startup_event():
                 if datetime.now().weekday() == 0:  # Only on Mondays
                     # Get recent articles
                     recent_articles = []
-                    async for article in db.articles.find({"created_at": {"$gte": last_week}}):
+                    async for article in db.articles.find(
+                        {"created_at": {"$gte": last_week}, "duplicate_of": None},
+                        NEAR_DUP_EXCLUDED_FIELDS
+                    ):
                         recent_articles.append(document_helper(article))
                         
                     if recent_articles:
                         await asyncio.to_thread(update_articles_index, recent_articles)
                         logger.info(f"Updated articles vector index with {len(recent_articles)} recent articles")
+                
+                # New summaries change the domain filter columns
+                await refresh_article_filter_columns()
             except Exception as e:
                 logger.error(f"Error updating vector indexes: {str(e)}")
         
+        async def refresh_vector_indexes():
+            reloaded = await asyncio.to_thread(index_manager.refresh_all)
+            # A new articles version may hold articles the filter records don't cover yet
+            if ARTICLES_INDEX in reloaded:
+                await refresh_article_filter_columns()
+        
+        # Drop tombstoned vectors and merge delta segments once they pile up
+        async def compact_vector_indexes():
+            await asyncio.to_thread(index_manager.maybe_compact, SUMMARIES_INDEX, SUMMARIES_KEY_FIELD)
+            await asyncio.to_thread(index_manager.maybe_compact, ARTICLES_INDEX)
+        
         # Start the scheduler
         scheduler.add_job(scheduled_tasks, "cron", hour=1, minute=0)  # Run daily at 1:00 AM
     # Also schedule stalled task handler to run every hour
         scheduler.add_job(handle_stalled_tasks, "interval", hours=1)
         scheduler.add_job(scheduled_daily_analysis, "cron", hour=1, minute=0)  # Run daily at 1:00 AM
         scheduler.add_job(update_vector_indexes, "cron", hour=2, minute=0)  # Run daily at 2:00 AM
+        scheduler.add_job(compact_vector_indexes, "cron", hour=3, minute=0)  # Run daily at 3:00 AM
+        # Fallback for servers without change streams
+        scheduler.add_job(dashboard_view.refresh, "interval", minutes=DASHBOARD_STATS_REFRESH_MINUTES)
+        # Writers refresh the trend rollups for the days they touch; the nightly
+        # full rebuild also drops counts of deleted summaries
+        scheduler.add_job(refresh_rollups, "cron", hour=3, minute=30, kwargs={"db": db, "full": True})
+        # Pick up index versions published by other workers
+        scheduler.add_job(
+            refresh_vector_indexes, "interval",
+            seconds=int(os.getenv("INDEX_RELOAD_INTERVAL_SECONDS", "300"))
+        )
         if not scheduler.running:
             scheduler.start()
         logger.info("Scheduler started")
@@ -4187,6 +4332,9 @@ async def startup_event():
 async def shutdown_event():
     # Shutdown the scheduler
     scheduler.shutdown()
+    # Stop the HTML extraction workers
+    shutdown_extraction_pool()
+    await dashboard_view.stop()
     # Close MongoDB connection
     client.close()
     logger.info("API shutdown complete")
@@ -4235,33 +4383,28 @@ async def generate_location(article_id: str):
 from pymongo import DESCENDING
 
 @app.get("/trends/emerging")
-async def get_emerging_trends():
-    recent_window = datetime.utcnow() - timedelta(days=30)
-    older_window = datetime.utcnow() - timedelta(days=90)
-
-    # Get recent factor counts (last 30 days)
-    recent = await db.articles.aggregate([
-        {"$match": {"date": {"$gte": recent_window}}},
-        {"$unwind": "$risk_factors"},
-        {"$group": {"_id": "$risk_factors", "count": {"$sum": 1}}}
-    ]).to_list(length=100)
-
-    # Get older factor counts (30–90 days ago)
-    older = await db.articles.aggregate([
-        {"$match": {"date": {"$gte": older_window, "$lt": recent_window}}},
-        {"$unwind": "$risk_factors"},
-        {"$group": {"_id": "$risk_factors", "count": {"$sum": 1}}}
-    ]).to_list(length=100)
+async def get_emerging_trends(
+    window_days: int = Query(30, ge=1, le=365),
+    baseline_days: int = Query(60, ge=1, le=730)
+):
+    """
+    Risk factors whose mentions grew the most in the last ``window_days``
+    compared with the ``baseline_days`` before them, from the daily rollups.
+    """
+    recent_start = days_ago(window_days)
+    recent, older = await asyncio.gather(
+        window_totals(db, recent_start),
+        window_totals(db, days_ago(window_days + baseline_days), recent_start)
+    )
 
     trend_map = {}
-    for r in recent:
-        trend_map[r["_id"]] = {"recent": r["count"], "change": 0}
+    for factor, count in recent["risk_factors"].most_common(100):
+        trend_map[factor] = {"recent": count, "change": 0}
 
-    for o in older:
-        if o["_id"] in trend_map:
-            prev = o["count"]
-            curr = trend_map[o["_id"]]["recent"]
-            trend_map[o["_id"]]["change"] = round(((curr - prev) / prev * 100), 1) if prev else 0
+    for factor, prev in older["risk_factors"].items():
+        if factor in trend_map:
+            curr = trend_map[factor]["recent"]
+            trend_map[factor]["change"] = round(((curr - prev) / prev * 100), 1) if prev else 0
 
     sorted_trends = sorted(
         [{"factor": k, **v} for k, v in trend_map.items()],
@@ -4271,6 +4414,25 @@ async def get_emerging_trends():
     return sorted_trends[:10]
 
 
+@app.post("/admin/trend-rollups/refresh")
+async def refresh_trend_rollups(full: bool = False):
+    """Rebuild the daily rollups for changed days, or for every day with full=true"""
+    stats = await refresh_rollups(db, full=full)
+    await response_cache.invalidate("summaries")
+    return stats
+
+
+@app.post("/admin/response-cache/invalidate")
+async def invalidate_response_cache(tags: List[str] = Query(default=[])):
+    """Drop cached responses with any of the given tags, or all of them when none are given"""
+    if tags:
+        removed = await response_cache.invalidate(*tags)
+    else:
+        await response_cache.clear()
+        removed = None
+    return {"removed": removed, **response_cache.stats}
+
+
 
 class FloodRiskScore(BaseModel):
     address: str
@@ -4724,6 +4886,12 @@ class Recommendation(BaseModel):
     # This field is now optional; if the LLM never emits it on a given item, validation still passes.
     portfolioAnalysis: Optional[str] = None
 
+    @field_validator('propertyIds', mode='before')
+    @classmethod
+    def stringify_property_ids(cls, value):
+        # The model sometimes echoes numeric IDs
+        return [str(pid) for pid in value] if isinstance(value, list) else value
+
 
 class PortfolioResponse(BaseModel):
     recommendations: List[Recommendation]
@@ -4812,54 +4980,19 @@ async def generate_property_valuation(request: PropertyValuationRequest):
             HumanMessage(content=human_prompt)
         ]
         
-        llm_response = llm.invoke(messages,
-    max_tokens=6000)
-        
-        # Extract and parse JSON from LLM response
         try:
-            # Look for JSON within the response
-            response_text = llm_response.content
-            
-            # Try to find JSON block if present
-            import re
-            json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', response_text)
-            
-            if json_match:
-                result = json.loads(json_match.group(1).strip())
-            else:
-                # If no JSON block markers, try to parse the whole response
-                result = json.loads(response_text.strip())
-                
-            return PropertyValuationResponse(**result)
-        except Exception as e:
+            return await generate_structured(
+                llm, messages, PropertyValuationResponse,
+                overrides={"property_id": request.property_id}, max_tokens=6000
+            )
+        except StructuredOutputError as e:
             raise HTTPException(status_code=500, detail=f"Failed to parse AI response: {str(e)}")
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating property valuation: {str(e)}")
-def parse_llm_json(raw: str) -> dict:
-    """
-    Extract the first JSON object from raw text by finding
-    the substring from the first '{' to the last '}', then
-    stripping any literal newlines or tabs before JSON parsing.
-    """
-    if not raw:
-        raise ValueError("Empty LLM response")
 
-    # find outermost JSON object
-    match = re.search(r"(\{[\s\S]*\})", raw)
-    if not match:
-        raise ValueError(f"No JSON object found in LLM response: {raw!r}")
-
-    payload = match.group(1)
-    # sanitize literal newlines and tabs inside the JSON string
-    payload = payload.replace("\n", " ").replace("\t", " ")
-
-    try:
-        return json.loads(payload)
-    except json.JSONDecodeError as e:
-        # log the cleaned payload for inspection
-        print("🛑 JSON parse error on payload:", payload)
-        raise
 @app.post(
     "/portfolio-recommendations",
     response_model=PortfolioResponse,
@@ -4926,65 +5059,8 @@ async def generate_portfolio_recommendations(request: dict):
             HumanMessage(content=human_prompt)
         ]
         
-        response = llm.invoke(messages, max_tokens=6000)
-        print(response)
-        response_text = response.content.strip()
+        return await generate_structured(llm, messages, PortfolioResponse, max_tokens=6000)
         
-        # Extract JSON
-        import re
-        import json
-        
-        # Try to extract JSON from markdown code blocks if present
-        json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', response_text)
-        if json_match:
-            json_str = json_match.group(1).strip()
-        else:
-            # If no code blocks, treat the entire response as JSON
-            json_str = response_text
-        
-        # Parse the JSON
-        try:
-            result = json.loads(json_str)
-            
-            # Ensure the result has the expected structure
-            if "recommendations" not in result or not isinstance(result["recommendations"], list):
-                raise ValueError("Response missing 'recommendations' array")
-                
-            # Validate and fix each recommendation to ensure it has all required fields
-            for i, rec in enumerate(result["recommendations"]):
-                # Ensure rec has required fields
-                if "type" not in rec:
-                    rec["type"] = "risk_mitigation"
-                    
-                if "riskImpact" not in rec:
-                    rec["riskImpact"] = "Medium impact on portfolio risk"
-                    
-                if "financialImpact" not in rec:
-                    rec["financialImpact"] = "Varies by implementation approach"
-                    
-                if "propertyIds" not in rec or not isinstance(rec["propertyIds"], list):
-                    # Get property IDs that might be relevant based on the recommendation
-                    relevant_props = []
-                    for p in props:
-                        if any(keyword in rec.get("title", "").lower() + rec.get("description", "").lower() 
-                              for keyword in ["flood", "coast", "fire", "storm", p.get("name", "").lower()]):
-                            relevant_props.append(p.get("id"))
-                    
-                    # If no relevant properties found, use all properties
-                    rec["propertyIds"] = relevant_props if relevant_props else [p.get("id") for p in props]
-                
-                # Convert any non-string IDs to strings
-                rec["propertyIds"] = [str(pid) for pid in rec["propertyIds"]]
-                
-                # Ensure portfolioAnalysis is present (optional in schema but we'll provide it)
-                if "portfolioAnalysis" not in rec:
-                    rec["portfolioAnalysis"] = f"Analysis for recommendation {i+1}"
-            
-            return result
-            
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Failed to parse JSON from LLM response: {str(e)}")
-            
     except Exception as e:
         # Handle errors and provide a properly formatted response
         recommendations = []
@@ -5120,69 +5196,16 @@ async def generate_premium_recommendation(request: PremiumRequest):
             HumanMessage(content=human_prompt)
         ]
         
-        llm_response = llm.invoke(messages, max_tokens=6000)
-        
-        # Extract and parse JSON from LLM response
         try:
-            # Look for JSON within the response
-            response_text = llm_response.content
-            
-            # Try to find JSON block if present
-            import re
-            json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', response_text)
-            
-            if json_match:
-                result = json.loads(json_match.group(1).strip())
-            else:
-                # If no JSON block markers, try to parse the whole response
-                result = json.loads(response_text.strip())
-            
-            # Validate and fix the response if needed
-            result["property_id"] = request.property_id
-            
-            # Ensure all required fields exist
-            if "standardPremium" not in result:
-                result["standardPremium"] = request.current_premium or 2500
-                
-            if "recommendedPremium" not in result:
-                # Calculate based on risk factors if present
-                if "riskFactors" in result and isinstance(result["riskFactors"], list):
-                    base = result["standardPremium"]
-                    adjustment = sum(factor.get("impact", 0) for factor in result["riskFactors"]) / 100
-                    result["recommendedPremium"] = base * (1 + adjustment)
-                else:
-                    result["recommendedPremium"] = result["standardPremium"] * 1.15  # Default 15% increase
-            
-            if "riskFactors" not in result or not isinstance(result["riskFactors"], list):
-                result["riskFactors"] = [
-                    {"name": "Climate hazard exposure", "impact": 10.0},
-                    {"name": "Property characteristics", "impact": 5.0}
-                ]
-                
-            if "coverageRecommendations" not in result or not isinstance(result["coverageRecommendations"], list):
-                result["coverageRecommendations"] = [
-                    "Ensure adequate coverage for local climate hazards",
-                    "Consider extended replacement cost endorsement"
-                ]
-                
-            if "analysis" not in result:
-                result["analysis"] = "Premium adjustment based on climate risk factors affecting the property."
-                
-            if "riskScore" not in result:
-                result["riskScore"] = 5.0
-                
-            if "deductibleRecommendation" not in result:
-                result["deductibleRecommendation"] = result["standardPremium"] * 0.01  # Default 1% of premium
-                
-            if "coverageLimit" not in result:
-                result["coverageLimit"] = request.current_value or 500000  # Default to property value
-                
+            result = await generate_structured(
+                llm, messages, PremiumResponse,
+                overrides={"property_id": request.property_id}, max_tokens=6000
+            )
             print(f"Successfully generated premium recommendation: {result}")
             return result
             
-        except Exception as e:
+        except StructuredOutputError as e:
             print(f"Error parsing LLM response: {str(e)}")
-            print(f"Raw response: {response_text[:500]}...")
             
             # Create a fallback response with the correct structure
             standard_premium = request.current_premium or 2500
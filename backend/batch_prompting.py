@@ -0,0 +1,167 @@
+"""
+Multi-article batched prompting for the generate_* extractors.
+
+Instead of one prompt per article, each repeating the same instruction block,
+articles are packed into a single prompt up to a token budget. Every article
+gets an ID (A1, A2, ...) and the model answers with a JSON object mapping each
+ID to the array of items extracted from that article, which is split back
+into per-article results.
+
+A batch whose response can't be parsed, or leaves out any article ID (as a
+truncated answer does), is retried one article at a time, so a malformed
+answer costs extra calls but never drops articles.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+from langchain_core.messages import HumanMessage, SystemMessage
+
+try:
+    from .llm_executor import llm_executor
+    from .structured_output import has_keys, parse_json, StructuredOutputError
+except ImportError:
+    from llm_executor import llm_executor
+    from structured_output import has_keys, parse_json, StructuredOutputError
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+BATCH_PROMPT_TOKEN_BUDGET = int(os.getenv("BATCH_PROMPT_TOKEN_BUDGET", "8000"))
+BATCH_PROMPT_MAX_ARTICLES = int(os.getenv("BATCH_PROMPT_MAX_ARTICLES", "5"))
+# Output allowance per article in a batch
+BATCH_OUTPUT_TOKENS_PER_ARTICLE = int(os.getenv("BATCH_OUTPUT_TOKENS_PER_ARTICLE", "1200"))
+
+ARTICLE_CONTENT_CHARS = 4000
+
+
+def article_block(article_id: str, article: Dict[str, Any]) -> str:
+    return (
+        f"[ARTICLE {article_id}]\n"
+        f"Title: {article.get('title', '')}\n"
+        f"Date: {article.get('date', '')}\n"
+        f"Content: {str(article.get('content', ''))[:ARTICLE_CONTENT_CHARS]}\n"
+    )
+
+
+def pack_batches(
+    articles: Sequence[Dict[str, Any]],
+    token_budget: int = BATCH_PROMPT_TOKEN_BUDGET,
+    max_articles: int = BATCH_PROMPT_MAX_ARTICLES,
+) -> List[List[Tuple[str, Dict[str, Any]]]]:
+    """Greedily group (id, article) pairs, in order, so each batch's article text fits the budget"""
+    batches: List[List[Tuple[str, Dict[str, Any]]]] = []
+    current: List[Tuple[str, Dict[str, Any]]] = []
+    current_tokens = 0
+    for i, article in enumerate(articles):
+        article_id = f"A{i + 1}"
+        # Rough approximation: 4 chars per token
+        tokens = len(article_block(article_id, article)) // 4
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_articles):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append((article_id, article))
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_prompt(task: str, label: str, batch: Sequence[Tuple[str, Dict[str, Any]]]) -> str:
+    ids = [article_id for article_id, _ in batch]
+    example = ", ".join(f'"{article_id}": [...]' for article_id in ids)
+    articles_text = "\n".join(article_block(article_id, article) for article_id, article in batch)
+    return (
+        f"{task}\n\n"
+        f"Apply these instructions to each of the {len(batch)} articles below separately.\n\n"
+        f"ARTICLES:\n{articles_text}\n"
+        f"Return ONLY valid JSON: an object with exactly these keys: {', '.join(ids)}.\n"
+        f"Each key maps to the array of {label} extracted from that article, for example {{{example}}}.\n"
+        f"Use an empty array for an article with no {label}.\n"
+    )
+
+
+def parse_response(content: str, batch: Sequence[Tuple[str, Dict[str, Any]]]) -> Optional[Dict[str, List[Any]]]:
+    """Per-article item lists from a batch response, or None if it can't be parsed or misses an article"""
+    ids = [article_id for article_id, _ in batch]
+    try:
+        parsed = parse_json(content, expect="object")
+    except StructuredOutputError:
+        parsed = None
+
+    if not has_keys(parsed, ids):
+        # A single-article batch may come back as a bare array, whose first
+        # item would otherwise be taken for the keyed object
+        if len(batch) == 1:
+            try:
+                return {ids[0]: parse_json(content, expect="array")}
+            except StructuredOutputError:
+                pass
+        return None
+    return {
+        article_id: parsed[article_id] if isinstance(parsed.get(article_id), list) else []
+        for article_id, _ in batch
+    }
+
+
+async def extract_from_articles(
+    llm: Any,
+    articles: Sequence[Dict[str, Any]],
+    system_prompt: str,
+    task: str,
+    label: str,
+) -> List[Tuple[Dict[str, Any], List[Any]]]:
+    """
+    Run one extraction task over many articles with batched prompts.
+
+    Args:
+        llm: Chat model to call through the shared LLM executor
+        articles: Articles to extract from
+        system_prompt: System message for every batch
+        task: Instructions and item format, written for a single article
+        label: Plural name of the extracted items, e.g. "frameworks"
+
+    Returns:
+        (article, extracted items) pairs in article order. Articles whose
+        extraction failed are left out.
+    """
+    async def run_batch(batch):
+        messages = [SystemMessage(content=system_prompt), HumanMessage(content=build_prompt(task, label, batch))]
+        try:
+            response = await llm_executor.ainvoke(
+                llm, messages, max_tokens=BATCH_OUTPUT_TOKENS_PER_ARTICLE * len(batch),
+                validate=lambda text: parse_response(text, batch) is not None
+            )
+        except Exception as e:
+            logger.error(f"Error extracting {label} from batch {[article_id for article_id, _ in batch]}: {str(e)}")
+            return {}
+
+        parsed = parse_response(response.content, batch)
+        if parsed is not None:
+            return parsed
+        if len(batch) == 1:
+            logger.error(f"Failed to parse JSON from LLM response for article: {batch[0][1].get('title', '')}")
+            return {}
+
+        logger.warning(f"Unparseable or incomplete batch response for {label}, retrying {len(batch)} articles individually")
+        results = {}
+        for parsed_single in await asyncio.gather(*(run_batch([item]) for item in batch)):
+            results.update(parsed_single)
+        return results
+
+    batches = pack_batches(articles)
+    logger.info(f"Extracting {label} from {len(articles)} articles in {len(batches)} batched prompts")
+
+    results: Dict[str, List[Any]] = {}
+    for parsed in await asyncio.gather(*(run_batch(batch) for batch in batches)):
+        results.update(parsed)
+
+    return [
+        (article, results[article_id])
+        for batch in batches
+        for article_id, article in batch
+        if article_id in results
+    ]
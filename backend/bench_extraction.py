@@ -0,0 +1,138 @@
+"""
+Benchmark HTML parser backends for the article extraction stage.
+
+Usage:
+    python bench_extraction.py CORPUS_DIR [--export-from-cache N] [--repeat N] [--workers N]
+
+CORPUS_DIR holds saved article pages (*.html). With --export-from-cache the
+directory is first filled with up to N HTML pages from the scraper's HTTP
+cache, so the benchmark runs on real pages from the configured sources.
+
+For every available BeautifulSoup backend the script reports single-process
+throughput and how often its output matches html.parser, then measures the
+process pool with the default backend.
+"""
+import argparse
+import concurrent.futures
+import glob
+import hashlib
+import multiprocessing
+import os
+import sqlite3
+import time
+
+from bs4 import BeautifulSoup, FeatureNotFound
+
+try:
+    from .extraction import parse_article_page, HTML_PARSER
+    from .http_cache import HTTP_CACHE_PATH
+except ImportError:
+    from extraction import parse_article_page, HTML_PARSER
+    from http_cache import HTTP_CACHE_PATH
+
+BACKENDS = ["html.parser", "lxml", "html5lib"]
+SOURCE = {"name": "Benchmark", "type": "news"}
+
+
+def export_from_cache(corpus_dir: str, limit: int) -> int:
+    """Copy up to `limit` HTML responses from the HTTP cache into the corpus directory"""
+    os.makedirs(corpus_dir, exist_ok=True)
+    conn = sqlite3.connect(HTTP_CACHE_PATH)
+    rows = conn.execute(
+        "SELECT url, content FROM responses WHERE headers LIKE '%text/html%' ORDER BY accessed_at DESC LIMIT ?",
+        (limit,)
+    ).fetchall()
+    conn.close()
+
+    for url, content in rows:
+        name = hashlib.md5(url.encode("utf-8")).hexdigest()
+        with open(os.path.join(corpus_dir, f"{name}.html"), "wb") as f:
+            f.write(content)
+    return len(rows)
+
+
+def load_corpus(corpus_dir: str):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.html"))):
+        with open(path, "rb") as f:
+            pages.append((f"file://{os.path.abspath(path)}", f.read()))
+    return pages
+
+
+def available_backends():
+    backends = []
+    for backend in BACKENDS:
+        try:
+            BeautifulSoup("<p>probe</p>", backend)
+            backends.append(backend)
+        except FeatureNotFound:
+            print(f"Skipping {backend}: not installed")
+    return backends
+
+
+def extract(page, parser=None):
+    url, html = page
+    return parse_article_page(html, SOURCE, {"url": url}, parser)
+
+
+def bench_backend(pages, backend, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [extract(page, backend) for page in pages]
+    elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def bench_pool(pages, workers, repeat):
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        # Start the workers before timing
+        list(pool.map(extract, pages[:workers]))
+        start = time.perf_counter()
+        for _ in range(repeat):
+            list(pool.map(extract, pages, chunksize=max(1, len(pages) // (workers * 4))))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus_dir")
+    parser.add_argument("--export-from-cache", type=int, default=0, metavar="N")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if args.export_from_cache:
+        print(f"Exported {export_from_cache(args.corpus_dir, args.export_from_cache)} pages from {HTTP_CACHE_PATH}")
+
+    pages = load_corpus(args.corpus_dir)
+    if not pages:
+        print(f"No *.html files found in {args.corpus_dir}")
+        return
+    total_mb = sum(len(html) for _, html in pages) / 1e6
+    print(f"Corpus: {len(pages)} pages, {total_mb:.1f} MB, repeat={args.repeat}, default backend={HTML_PARSER}\n")
+
+    baseline = None
+    print(f"{'backend':<14}{'pages/s':>10}{'ms/page':>10}{'matches html.parser':>22}")
+    for backend in available_backends():
+        results, elapsed = bench_backend(pages, backend, args.repeat)
+        processed = len(pages) * args.repeat
+        if backend == "html.parser":
+            baseline = results
+        agreement = (
+            sum(
+                1 for a, b in zip(results, baseline)
+                if a["title"] == b["title"] and a["content"] == b["content"]
+            ) / len(pages)
+            if baseline else float("nan")
+        )
+        print(f"{backend:<14}{processed / elapsed:>10.1f}{elapsed * 1000 / processed:>10.2f}{agreement:>21.0%}")
+
+    elapsed = bench_pool(pages, args.workers, args.repeat)
+    processed = len(pages) * args.repeat
+    print(f"\nProcess pool ({args.workers} workers, {HTML_PARSER}): {processed / elapsed:.1f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
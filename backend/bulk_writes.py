@@ -0,0 +1,120 @@
+"""
+Batched MongoDB persistence.
+
+``bulk_write_chunked`` sends write operations as unordered ``bulk_write``
+calls of at most BULK_WRITE_CHUNK_SIZE operations. The pipeline writes
+hundreds of articles and summaries per run, and this replaces one round trip
+per document with one per chunk.
+
+Each chunk is written independently, so a failing document is reported with
+its chunk and position and doesn't stop the rest of the run. Write concern
+comes from BULK_WRITE_W / BULK_WRITE_JOURNAL. The defaults (w=1, no journal
+wait) suit pipeline data, which is recomputed on the next run anyway.
+"""
+import logging
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from pymongo.write_concern import WriteConcern
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+BULK_WRITE_CHUNK_SIZE = int(os.getenv("BULK_WRITE_CHUNK_SIZE", "500"))
+BULK_WRITE_W = os.getenv("BULK_WRITE_W", "1")
+BULK_WRITE_JOURNAL = os.getenv("BULK_WRITE_JOURNAL", "false").lower() == "true"
+
+# Write errors kept per call for the summary; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+
+def write_concern(w: Optional[str] = None, journal: Optional[bool] = None) -> WriteConcern:
+    w = BULK_WRITE_W if w is None else w
+    return WriteConcern(
+        w=int(w) if str(w).isdigit() else w,
+        j=BULK_WRITE_JOURNAL if journal is None else journal
+    )
+
+
+def upsert_op(filter: Dict[str, Any], fields: Dict[str, Any], on_insert: Optional[Dict[str, Any]] = None) -> UpdateOne:
+    """UpdateOne that sets ``fields`` on the matching document, creating it if needed"""
+    update: Dict[str, Any] = {"$set": fields}
+    if on_insert:
+        update["$setOnInsert"] = on_insert
+    return UpdateOne(filter, update, upsert=True)
+
+
+async def bulk_write_chunked(
+    collection: Any,
+    operations: Sequence[Any],
+    chunk_size: int = BULK_WRITE_CHUNK_SIZE,
+    concern: Optional[WriteConcern] = None,
+) -> Dict[str, Any]:
+    """
+    Write ``operations`` to ``collection`` as unordered bulk writes.
+
+    Args:
+        collection: Motor collection
+        operations: pymongo write operations (UpdateOne, InsertOne, ...)
+        chunk_size: Maximum operations per bulk_write call
+        concern: Write concern; defaults to the BULK_WRITE_* settings
+
+    Returns:
+        Counts of matched, modified, upserted and inserted documents, the
+        number of failed operations and details for the first few failures.
+        Never raises for per-document write errors.
+    """
+    summary: Dict[str, Any] = {
+        "operations": len(operations), "chunks": 0,
+        "matched": 0, "modified": 0, "upserted": 0, "inserted": 0,
+        "failed": 0, "errors": [],
+    }
+    if not operations:
+        return summary
+
+    target = collection.with_options(write_concern=concern or write_concern())
+    for start in range(0, len(operations), chunk_size):
+        chunk = operations[start:start + chunk_size]
+        chunk_number = summary["chunks"]
+        summary["chunks"] += 1
+        try:
+            result = await target.bulk_write(list(chunk), ordered=False)
+            details = result.bulk_api_result if result.acknowledged else {}
+        except BulkWriteError as e:
+            # Unordered: everything except the reported operations was applied
+            details = e.details
+            write_errors: List[Dict[str, Any]] = details.get("writeErrors", [])
+            summary["failed"] += len(write_errors)
+            for error in write_errors:
+                if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+                    summary["errors"].append({
+                        "chunk": chunk_number,
+                        "index": start + error.get("index", 0),
+                        "code": error.get("code"),
+                        "message": error.get("errmsg", ""),
+                    })
+            logger.error(
+                f"{len(write_errors)} of {len(chunk)} writes to {collection.name} failed in chunk {chunk_number}"
+                + (f": {write_errors[0].get('errmsg', '')}" if write_errors else "")
+            )
+        except Exception as e:
+            summary["failed"] += len(chunk)
+            if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+                summary["errors"].append({"chunk": chunk_number, "index": start, "code": None, "message": str(e)})
+            logger.error(f"Bulk write of chunk {chunk_number} ({len(chunk)} ops) to {collection.name} failed: {str(e)}")
+            continue
+
+        summary["matched"] += details.get("nMatched", 0)
+        summary["modified"] += details.get("nModified", 0)
+        summary["upserted"] += details.get("nUpserted", 0)
+        summary["inserted"] += details.get("nInserted", 0)
+
+    logger.info(
+        f"Bulk wrote {summary['operations']} ops to {collection.name} in {summary['chunks']} chunks: "
+        f"{summary['upserted']} upserted, {summary['modified']} modified, {summary['failed']} failed"
+    )
+    return summary
@@ -0,0 +1,185 @@
+"""
+Token budgeting for the summaries sent to report generation.
+
+Every structured summary is costed by the tokens of the exact JSON item
+``generate_summary_reports`` puts in its prompt. The count is stored on the
+summary (``token_count`` / ``token_encoding``) so it is computed once per
+document rather than on every report.
+
+``pack_summaries`` fills a token budget greedily by value per token, which is
+the usual approximation for a 0/1 knapsack. Value combines extraction
+confidence, recency and retrieval similarity. Summaries that don't fit are
+skipped rather than ending the selection, so a long low-value summary never
+crowds out several short useful ones.
+
+Tokens are counted with tiktoken when it is installed. Its encoding differs
+slightly from Claude's tokenizer, but it tracks much closer than chars/4,
+which remains the fallback.
+"""
+import json
+import logging
+import math
+import os
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from dotenv import load_dotenv
+
+try:
+    import tiktoken
+except ImportError:  # optional; fall back to a character estimate
+    tiktoken = None
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+REPORT_CONTEXT_TOKENS = int(os.getenv("REPORT_CONTEXT_TOKENS", "6000"))
+CONTEXT_TOKENIZER_ENCODING = os.getenv("CONTEXT_TOKENIZER_ENCODING", "cl100k_base")
+# Days for a summary's recency weight to halve
+CONTEXT_RECENCY_HALF_LIFE_DAYS = float(os.getenv("CONTEXT_RECENCY_HALF_LIFE_DAYS", "30"))
+
+CONFIDENCE_WEIGHTS = {"high": 3.0, "medium": 2.0, "low": 1.0}
+UNKNOWN_CONFIDENCE_WEIGHT = 0.5
+
+# Fields of a summary that go into the report prompt
+REPORT_FIELDS = {
+    "key_event": "Unknown",
+    "insurance_domains": [],
+    "risk_factors": [],
+    "business_implications": "Unknown",
+    "timeframe": "Unknown",
+    "confidence": "Unknown",
+    "geographic_focus": "Unknown",
+    "regulatory_impact": "Unknown",
+    "source": "Unknown",
+    "article_title": "Unknown",
+    "date": "Unknown",
+    "total_relevance": 0,
+}
+
+_encoding = None
+_encoding_name: Optional[str] = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding, _encoding_name
+    if _encoding_name is None:
+        with _encoding_lock:
+            if _encoding_name is None:
+                if tiktoken is not None:
+                    try:
+                        _encoding = tiktoken.get_encoding(CONTEXT_TOKENIZER_ENCODING)
+                    except Exception as e:
+                        logger.warning(f"Couldn't load tokenizer {CONTEXT_TOKENIZER_ENCODING}, estimating tokens from length: {str(e)}")
+                _encoding_name = f"tiktoken:{CONTEXT_TOKENIZER_ENCODING}" if _encoding is not None else "chars/4"
+    return _encoding
+
+
+def encoding_name() -> str:
+    """Identifies how counts were made, so stored counts can be invalidated when it changes"""
+    _get_encoding()
+    return _encoding_name
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def report_item(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """The part of a summary that goes into the report prompt"""
+    return {field: summary.get(field, default) for field, default in REPORT_FIELDS.items()}
+
+
+def summary_tokens(summary: Dict[str, Any]) -> int:
+    """Prompt tokens of a summary, using its stored count when that was made with the current tokenizer"""
+    if summary.get("token_encoding") == encoding_name() and isinstance(summary.get("token_count"), int):
+        return summary["token_count"]
+    return count_tokens(json.dumps(report_item(summary), indent=2, default=str))
+
+
+def ensure_token_counts(summaries: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Set token_count/token_encoding where missing or stale; returns the summaries that changed"""
+    name = encoding_name()
+    changed = []
+    for summary in summaries:
+        if summary.get("token_encoding") == name and isinstance(summary.get("token_count"), int):
+            continue
+        summary["token_count"] = summary_tokens(summary)
+        summary["token_encoding"] = name
+        changed.append(summary)
+    return changed
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value[:19])
+        except ValueError:
+            return None
+    return None
+
+
+def summary_value(summary: Dict[str, Any], similarity: Optional[float] = None, now: Optional[datetime] = None) -> float:
+    """Usefulness of a summary to a report: confidence x recency x retrieval similarity"""
+    confidence = CONFIDENCE_WEIGHTS.get(str(summary.get("confidence", "")).lower(), UNKNOWN_CONFIDENCE_WEIGHT)
+
+    recency = 0.5
+    timestamp = _as_datetime(summary.get("created_at")) or _as_datetime(summary.get("date"))
+    if timestamp is not None:
+        age_days = max(0.0, ((now or datetime.now()) - timestamp.replace(tzinfo=None)).total_seconds() / 86400)
+        recency = math.pow(0.5, age_days / CONTEXT_RECENCY_HALF_LIFE_DAYS)
+
+    # Similarity only reorders retrieved summaries; it never zeroes one out
+    return confidence * (0.5 + recency) * (1.0 + (similarity or 0.0))
+
+
+def pack_summaries(
+    summaries: Sequence[Dict[str, Any]],
+    budget: int = REPORT_CONTEXT_TOKENS,
+    similarity: Optional[Callable[[Dict[str, Any]], Optional[float]]] = None,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Choose the summaries that give the most value within ``budget`` tokens.
+
+    Args:
+        summaries: Candidate summaries
+        budget: Token budget for the selected summaries' report items
+        similarity: Optional retrieval similarity (0-1) per summary
+        limit: Optional cap on the number of summaries selected
+
+    Returns:
+        The selected summaries, most valuable first
+    """
+    now = datetime.now()
+    candidates = []
+    for summary in summaries:
+        tokens = max(1, summary_tokens(summary))
+        value = summary_value(summary, similarity(summary) if similarity else None, now)
+        candidates.append((value / tokens, value, tokens, summary))
+    candidates.sort(key=lambda c: c[0], reverse=True)
+
+    selected, used = [], 0
+    for _, value, tokens, summary in candidates:
+        if limit is not None and len(selected) >= limit:
+            break
+        if used + tokens <= budget:
+            selected.append((value, summary))
+            used += tokens
+
+    # Greedy by density can lose to the single most valuable item that fits
+    best = max((c for c in candidates if c[2] <= budget), key=lambda c: c[1], default=None)
+    if best is not None and best[1] > sum(value for value, _ in selected):
+        selected, used = [(best[1], best[3])], best[2]
+
+    selected.sort(key=lambda s: s[0], reverse=True)
+    logger.info(f"Packed {len(selected)} of {len(summaries)} summaries into {used}/{budget} tokens ({encoding_name()})")
+    return [summary for _, summary in selected]
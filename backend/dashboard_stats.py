@@ -0,0 +1,187 @@
+"""
+Materialized dashboard statistics.
+
+The counts and distributions behind /dashboard/stats are kept in a single
+``dashboard_stats`` document. The endpoint serves that document, with its
+version as an ETag, instead of aggregating the whole corpus on every page
+load.
+
+The document is recomputed:
+- when a MongoDB change stream reports writes to articles, structured
+  summaries or reports (needs a replica set)
+- when writers call ``mark_dirty`` after storing data
+- on a fixed interval, as a fallback for deployments without change streams
+
+Refreshes are debounced. A pipeline run that writes hundreds of documents
+triggers one recomputation, not hundreds.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure, PyMongoError
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_STATS_DEBOUNCE_SECONDS = float(os.getenv("DASHBOARD_STATS_DEBOUNCE_SECONDS", "5"))
+DASHBOARD_STATS_REFRESH_MINUTES = int(os.getenv("DASHBOARD_STATS_REFRESH_MINUTES", "15"))
+
+STATS_ID = "current"
+WATCHED_COLLECTIONS = ["articles", "structured_summaries", "reports"]
+RISK_FACTOR_LIMIT = 10
+
+
+class DashboardStatsView:
+    """Maintains the materialized dashboard_stats document for one database"""
+
+    def __init__(
+        self,
+        db: Any,
+        format_report: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+        debounce: float = DASHBOARD_STATS_DEBOUNCE_SECONDS,
+        on_refresh: Optional[Callable[[], Awaitable[Any]]] = None,
+    ):
+        self.db = db
+        self.collection = db.dashboard_stats
+        self.format_report = format_report
+        self.debounce = debounce
+        self.on_refresh = on_refresh
+
+        self._pending: Optional[asyncio.Task] = None
+        self._dirty = False
+        self._watcher: Optional[asyncio.Task] = None
+        self.stats: Dict[str, Any] = {"refreshes": 0, "change_events": 0, "last_refresh_seconds": None}
+
+    async def compute(self) -> Dict[str, Any]:
+        """Aggregate the statistics from the source collections"""
+        async def grouped(collection, pipeline):
+            return {doc["_id"]: doc["count"] async for doc in collection.aggregate(pipeline) if doc["_id"] is not None}
+
+        (
+            total_articles, total_reports, source_distribution,
+            domain_distribution, risk_factor_frequency, recent_report
+        ) = await asyncio.gather(
+            self.db.articles.count_documents({}),
+            self.db.reports.count_documents({}),
+            grouped(self.db.articles, [
+                {"$group": {"_id": "$source", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}}
+            ]),
+            grouped(self.db.structured_summaries, [
+                {"$unwind": "$insurance_domains"},
+                {"$group": {"_id": "$insurance_domains", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}}
+            ]),
+            grouped(self.db.structured_summaries, [
+                {"$unwind": "$risk_factors"},
+                {"$group": {"_id": "$risk_factors", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}},
+                {"$limit": RISK_FACTOR_LIMIT}
+            ]),
+            self.db.reports.find_one({}, sort=[("created_at", -1)]),
+        )
+
+        return {
+            "total_articles": total_articles,
+            "total_reports": total_reports,
+            # Stored as key/count pairs: sources and risk factors may contain
+            # characters that aren't valid in field names
+            "source_distribution": list(source_distribution.items()),
+            "domain_distribution": list(domain_distribution.items()),
+            "risk_factor_frequency": list(risk_factor_frequency.items()),
+            "recent_report": self.format_report(recent_report) if recent_report else None,
+        }
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Recompute and store the statistics, bumping their version"""
+        start = asyncio.get_running_loop().time()
+        stats = await self.compute()
+        stats["updated_at"] = datetime.now()
+        document = await self.collection.find_one_and_update(
+            {"_id": STATS_ID},
+            {"$set": stats, "$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self.stats["refreshes"] += 1
+        self.stats["last_refresh_seconds"] = round(asyncio.get_running_loop().time() - start, 3)
+        logger.info(f"Refreshed dashboard stats to version {document['version']} in {self.stats['last_refresh_seconds']}s")
+        if self.on_refresh is not None:
+            await self.on_refresh()
+        return document
+
+    async def get(self) -> Dict[str, Any]:
+        """The materialized statistics (computed on first use) in the /dashboard/stats shape, plus version"""
+        document = await self.collection.find_one({"_id": STATS_ID})
+        if document is None:
+            document = await self.refresh()
+        return {
+            "version": document.get("version", 0),
+            "total_articles": document.get("total_articles", 0),
+            "total_reports": document.get("total_reports", 0),
+            "source_distribution": dict(document.get("source_distribution", [])),
+            "domain_distribution": dict(document.get("domain_distribution", [])),
+            "risk_factor_frequency": dict(document.get("risk_factor_frequency", [])),
+            "recent_report": document.get("recent_report"),
+        }
+
+    def mark_dirty(self) -> None:
+        """
+        Schedule a refresh after the debounce delay. Changes marked while a
+        refresh is pending or running are picked up by another refresh once
+        it finishes.
+        """
+        self._dirty = True
+        if self._pending is not None and not self._pending.done():
+            return
+
+        async def delayed_refresh():
+            while self._dirty:
+                await asyncio.sleep(self.debounce)
+                # Cleared before computing, so writes during the refresh set it again
+                self._dirty = False
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    logger.error(f"Error refreshing dashboard stats: {str(e)}")
+
+        self._pending = asyncio.create_task(delayed_refresh())
+
+    async def watch(self) -> None:
+        """Mark the statistics dirty on every write to the watched collections"""
+        pipeline = [{"$match": {"ns.coll": {"$in": WATCHED_COLLECTIONS}}}]
+        delay = 1.0
+        while True:
+            try:
+                async with self.db.watch(pipeline) as stream:
+                    logger.info("Watching for dashboard stats changes")
+                    delay = 1.0
+                    async for _ in stream:
+                        self.stats["change_events"] += 1
+                        self.mark_dirty()
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                # Standalone servers don't support change streams; rely on the interval refresh
+                logger.warning(f"Change streams unavailable, dashboard stats refresh on a schedule only: {str(e)}")
+                return
+            except PyMongoError as e:
+                logger.error(f"Dashboard stats change stream failed, reconnecting in {delay:.0f}s: {str(e)}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60.0)
+
+    def start(self) -> None:
+        if self._watcher is None or self._watcher.done():
+            self._watcher = asyncio.create_task(self.watch())
+
+    async def stop(self) -> None:
+        for task in (self._watcher, self._pending):
+            if task is not None and not task.done():
+                task.cancel()
+        self._watcher = self._pending = None
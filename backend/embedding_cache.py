@@ -0,0 +1,214 @@
+"""
+Persistent on-disk embedding cache.
+
+Vectors are keyed by the MD5 of the whitespace-normalized text (the same
+normalization ``hash_content`` uses) and stored per model name, so index
+rebuilds and clustering only encode text that hasn't been seen before.
+
+Layout of a cache directory for one model::
+
+    vectors.f32   append-only float32 matrix, one row per cached text
+    keys.txt      one content hash per line; line N is row N of vectors.f32
+    meta.json     model name and embedding dimension
+
+Vectors are appended before their keys, so a crash mid-write can only leave
+unreferenced trailing rows, which are ignored on load.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows: rely on the in-process lock only
+    fcntl = None
+
+
+def text_hash(text: str) -> str:
+    """MD5 of whitespace-normalized text"""
+    cleaned = ' '.join(text.split())
+    return hashlib.md5(cleaned.encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content-hash -> vector store backed by a memory-mapped float32 matrix.
+
+    Reads go through a read-only memmap, so a cache with hundreds of thousands
+    of rows costs little resident memory. Appends from other processes are
+    picked up the next time a lookup notices the keys file has grown.
+    """
+
+    def __init__(self, directory: str, model_name: str):
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.model_name = model_name
+        self.path = os.path.join(directory, safe_name)
+        self._vectors_path = os.path.join(self.path, "vectors.f32")
+        self._keys_path = os.path.join(self.path, "keys.txt")
+        self._meta_path = os.path.join(self.path, "meta.json")
+        self._lock_path = os.path.join(self.path, ".lock")
+
+        self._lock = threading.Lock()
+        self._dim: Optional[int] = None
+        self._rows: Dict[str, int] = {}
+        self._matrix: Optional[np.memmap] = None
+        self._keys_size = 0
+
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock:
+            self._reload()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self._dim
+
+    def _reload(self) -> None:
+        """Re-read keys and remap the vectors file (caller holds the lock)"""
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                self._dim = json.load(f)["dim"]
+
+        if self._dim is None or not os.path.exists(self._keys_path):
+            return
+
+        with open(self._keys_path) as f:
+            keys = f.read().splitlines()
+        self._keys_size = os.path.getsize(self._keys_path)
+
+        vector_rows = os.path.getsize(self._vectors_path) // (4 * self._dim) if os.path.exists(self._vectors_path) else 0
+        row_count = min(len(keys), vector_rows)
+        if row_count < len(keys):
+            logger.warning(f"Embedding cache {self.path} has {len(keys) - row_count} keys without vectors, ignoring them")
+
+        self._rows = {key: row for row, key in enumerate(keys[:row_count])}
+        self._matrix = (
+            np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(row_count, self._dim))
+            if row_count else None
+        )
+
+    def _maybe_reload(self) -> None:
+        if os.path.exists(self._keys_path) and os.path.getsize(self._keys_path) != self._keys_size:
+            self._reload()
+
+    def get_many(self, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Return cached vectors for the hashes that are present"""
+        with self._lock:
+            self._maybe_reload()
+            if self._matrix is None:
+                return {}
+            found = {h: self._rows[h] for h in hashes if h in self._rows}
+            if not found:
+                return {}
+            keys = list(found.keys())
+            vectors = np.asarray(self._matrix[[found[k] for k in keys]])
+        return dict(zip(keys, vectors))
+
+    def put_many(self, hashes: Sequence[str], vectors: Sequence[Sequence[float]]) -> int:
+        """Append vectors for hashes not already cached; returns rows written"""
+        if not hashes:
+            return 0
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(hashes):
+            raise ValueError("hashes and vectors must have the same length")
+
+        with self._lock:
+            lock_file = open(self._lock_path, "w")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                # Another process may have appended since our last read
+                self._maybe_reload()
+
+                if self._dim is None:
+                    self._dim = int(matrix.shape[1])
+                    with open(self._meta_path, "w") as f:
+                        json.dump({"model_name": self.model_name, "dim": self._dim}, f)
+                elif matrix.shape[1] != self._dim:
+                    raise ValueError(f"Expected {self._dim}-dimensional vectors, got {matrix.shape[1]}")
+
+                new_rows = []
+                seen = set()
+                for i, h in enumerate(hashes):
+                    if h not in self._rows and h not in seen:
+                        seen.add(h)
+                        new_rows.append(i)
+                if not new_rows:
+                    return 0
+
+                # Drop trailing rows left behind by an interrupted write so
+                # the row numbering stays aligned with keys.txt
+                expected_bytes = len(self._rows) * self._dim * 4
+                if os.path.exists(self._vectors_path) and os.path.getsize(self._vectors_path) != expected_bytes:
+                    with open(self._vectors_path, "r+b") as f:
+                        f.truncate(expected_bytes)
+
+                with open(self._vectors_path, "ab") as f:
+                    f.write(matrix[new_rows].tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                with open(self._keys_path, "a") as f:
+                    f.write("".join(f"{hashes[i]}\n" for i in new_rows))
+
+                self._reload()
+                return len(new_rows)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "path": self.path,
+            "entries": len(self._rows),
+            "dim": self._dim,
+            "size_bytes": os.path.getsize(self._vectors_path) if os.path.exists(self._vectors_path) else 0,
+        }
+
+
+def lookup_or_encode(
+    cache: Optional[EmbeddingCache],
+    texts: List[str],
+    encode: Callable[[List[str]], List[List[float]]],
+) -> Tuple[List[List[float]], int]:
+    """
+    Resolve embeddings for ``texts`` from the cache, encoding only the misses.
+
+    ``encode`` is called once with the list of unique uncached texts. Returns
+    the vectors in input order and the number of texts that were encoded.
+    """
+    if cache is None:
+        return encode(texts), len(texts)
+
+    hashes = [text_hash(text) for text in texts]
+    cached = cache.get_many(hashes)
+
+    missing: Dict[str, str] = {}
+    for h, text in zip(hashes, texts):
+        if h not in cached and h not in missing:
+            missing[h] = text
+
+    if missing:
+        encoded = encode(list(missing.values()))
+        try:
+            cache.put_many(list(missing.keys()), encoded)
+        except Exception as e:
+            logger.error(f"Error writing to embedding cache: {str(e)}")
+        for h, vector in zip(missing.keys(), encoded):
+            cached[h] = vector
+
+    return [
+        cached[h].tolist() if isinstance(cached[h], np.ndarray) else list(cached[h])
+        for h in hashes
+    ], len(missing)
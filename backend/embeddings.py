@@ -0,0 +1,191 @@
+"""
+Process-wide sentence-transformer embedding service.
+
+All vector paths (FAISS index builds, searches, topic clustering, report theme
+analysis) share a single lazily loaded model instead of constructing their own
+HuggingFaceEmbeddings, which reloads the model weights on every call.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+
+try:
+    from .embedding_cache import EmbeddingCache, lookup_or_encode
+except ImportError:
+    from embedding_cache import EmbeddingCache, lookup_or_encode
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Embedding configuration (overridable through the environment)
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE", "cpu")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))  # 0 keeps the torch default
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "embedding_cache")
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+
+
+class EmbeddingService(Embeddings):
+    """
+    Thread-safe, lazily initialized wrapper around HuggingFaceEmbeddings.
+
+    The service is a LangChain ``Embeddings`` implementation, so it can be passed
+    anywhere FAISS expects an embedding model.
+    """
+
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL_NAME,
+        device: str = EMBEDDING_DEVICE,
+        threads: int = EMBEDDING_THREADS,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        cache_dir: Optional[str] = EMBEDDING_CACHE_DIR if EMBEDDING_CACHE_ENABLED else None,
+    ):
+        self.model_name = model_name
+        self.device = device
+        self.threads = threads
+        self.batch_size = batch_size
+
+        # Document vectors are cached on disk by content hash; queries are not
+        self._cache: Optional[EmbeddingCache] = None
+        if cache_dir:
+            try:
+                self._cache = EmbeddingCache(cache_dir, model_name)
+            except Exception as e:
+                logger.error(f"Error opening embedding cache in {cache_dir}, continuing without it: {str(e)}")
+
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, Any] = {
+            "load_seconds": None,
+            "loaded_at": None,
+            "documents_requested": 0,
+            "documents_encoded": 0,
+            "document_calls": 0,
+            "document_seconds": 0.0,
+            "queries_encoded": 0,
+            "query_seconds": 0.0,
+        }
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def _get_model(self):
+        """Return the underlying model, loading it on first use"""
+        if self._model is None:
+            with self._load_lock:
+                # Another thread may have finished loading while we waited
+                if self._model is None:
+                    self._model = self._load_model()
+        return self._model
+
+    def _load_model(self):
+        from langchain.embeddings import HuggingFaceEmbeddings
+
+        if self.threads > 0:
+            try:
+                import torch
+                torch.set_num_threads(self.threads)
+            except ImportError:
+                logger.warning("torch not available, ignoring EMBEDDING_THREADS setting")
+
+        logger.info(f"Loading embedding model {self.model_name} on {self.device}")
+        start = time.perf_counter()
+        model = HuggingFaceEmbeddings(
+            model_name=self.model_name,
+            model_kwargs={"device": self.device},
+            encode_kwargs={"batch_size": self.batch_size},
+        )
+        elapsed = time.perf_counter() - start
+
+        with self._stats_lock:
+            self._stats["load_seconds"] = round(elapsed, 3)
+            self._stats["loaded_at"] = time.time()
+        logger.info(f"Embedding model {self.model_name} loaded in {elapsed:.2f}s")
+        return model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        texts = list(texts)
+        if not texts:
+            return []
+
+        encoded_seconds = 0.0
+
+        def encode(batch: List[str]) -> List[List[float]]:
+            nonlocal encoded_seconds
+            model = self._get_model()
+            start = time.perf_counter()
+            vectors = model.embed_documents(batch)
+            encoded_seconds = time.perf_counter() - start
+            return vectors
+
+        vectors, encoded = lookup_or_encode(self._cache, texts, encode)
+
+        with self._stats_lock:
+            self._stats["documents_requested"] += len(texts)
+            self._stats["documents_encoded"] += encoded
+            self._stats["document_calls"] += 1
+            self._stats["document_seconds"] += encoded_seconds
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        model = self._get_model()
+        start = time.perf_counter()
+        vector = model.embed_query(text)
+        elapsed = time.perf_counter() - start
+
+        with self._stats_lock:
+            self._stats["queries_encoded"] += 1
+            self._stats["query_seconds"] += elapsed
+        return vector
+
+    def warmup(self) -> None:
+        """Load the model and run one encode so the first request doesn't pay for it"""
+        self.embed_query("climate risk warmup")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return load time and encode throughput metrics"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+
+        stats["model_name"] = self.model_name
+        stats["device"] = self.device
+        stats["batch_size"] = self.batch_size
+        stats["threads"] = self.threads
+        stats["loaded"] = self.is_loaded
+        stats["cache_hits"] = stats["documents_requested"] - stats["documents_encoded"]
+        stats["cache"] = self._cache.stats() if self._cache else None
+        stats["documents_per_second"] = (
+            round(stats["documents_encoded"] / stats["document_seconds"], 1)
+            if stats["document_seconds"] > 0 else None
+        )
+        stats["avg_query_ms"] = (
+            round(stats["query_seconds"] * 1000 / stats["queries_encoded"], 2)
+            if stats["queries_encoded"] > 0 else None
+        )
+        stats["document_seconds"] = round(stats["document_seconds"], 3)
+        stats["query_seconds"] = round(stats["query_seconds"], 3)
+        return stats
+
+
+_service: Optional[EmbeddingService] = None
+_service_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Return the process-wide embedding service (the model itself loads lazily)"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = EmbeddingService()
+    return _service
@@ -0,0 +1,210 @@
+"""
+Concurrent HTTP fetch engine for scraping news sources.
+
+One ``Fetcher`` owns a pooled ``httpx.AsyncClient`` and enforces:
+
+- a global cap on in-flight requests (FETCH_MAX_CONCURRENCY)
+- a per-host cap (FETCH_PER_HOST_CONCURRENCY) plus a politeness delay between
+  request starts to the same host (FETCH_HOST_DELAY_SECONDS)
+- retries with exponential backoff and jitter for timeouts, connection errors,
+  429 and 5xx responses (FETCH_MAX_RETRIES), honouring Retry-After
+- the persistent HTTP cache (see http_cache.py): fresh pages skip the network,
+  stale ones are revalidated with conditional requests
+
+Use it as an async context manager so the connection pool is closed::
+
+    async with Fetcher() as fetcher:
+        html = (await fetcher.fetch(url)).content
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from dotenv import load_dotenv
+
+try:
+    from .http_cache import HttpCache, CacheEntry, get_http_cache
+except ImportError:
+    from http_cache import HttpCache, CacheEntry, get_http_cache
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+FETCH_MAX_CONCURRENCY = int(os.getenv("FETCH_MAX_CONCURRENCY", "16"))
+FETCH_PER_HOST_CONCURRENCY = int(os.getenv("FETCH_PER_HOST_CONCURRENCY", "2"))
+FETCH_HOST_DELAY_SECONDS = float(os.getenv("FETCH_HOST_DELAY_SECONDS", "0.5"))
+FETCH_TIMEOUT_SECONDS = float(os.getenv("FETCH_TIMEOUT_SECONDS", "15"))
+FETCH_MAX_RETRIES = int(os.getenv("FETCH_MAX_RETRIES", "2"))
+FETCH_BACKOFF_SECONDS = float(os.getenv("FETCH_BACKOFF_SECONDS", "1.0"))
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status_code: int
+    content: bytes
+    headers: Dict[str, str]
+    elapsed: float
+    from_cache: bool = False
+
+    @classmethod
+    def from_entry(cls, entry: CacheEntry, elapsed: float = 0.0) -> "FetchResult":
+        return cls(
+            url=entry.url,
+            status_code=200,
+            content=entry.content,
+            headers=entry.headers,
+            elapsed=elapsed,
+            from_cache=True,
+        )
+
+
+class _HostState:
+    """Concurrency limit and request pacing for a single host"""
+
+    def __init__(self, concurrency: int):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.pacing_lock = asyncio.Lock()
+        self.next_start = 0.0
+
+
+class Fetcher:
+    """Pooled, rate-limited async HTTP client shared by one crawl"""
+
+    def __init__(
+        self,
+        max_concurrency: int = FETCH_MAX_CONCURRENCY,
+        per_host_concurrency: int = FETCH_PER_HOST_CONCURRENCY,
+        host_delay: float = FETCH_HOST_DELAY_SECONDS,
+        timeout: float = FETCH_TIMEOUT_SECONDS,
+        max_retries: int = FETCH_MAX_RETRIES,
+        backoff: float = FETCH_BACKOFF_SECONDS,
+        headers: Optional[Dict[str, str]] = None,
+        cache: Optional[HttpCache] = None,
+        use_cache: bool = True,
+    ):
+        self.per_host_concurrency = per_host_concurrency
+        self.host_delay = host_delay
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.cache = (cache or get_http_cache()) if use_cache else None
+
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._hosts: Dict[str, _HostState] = {}
+        self._client = httpx.AsyncClient(
+            headers=headers or DEFAULT_HEADERS,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+        )
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "cache_hits": 0, "not_modified": 0}
+
+    async def __aenter__(self) -> "Fetcher":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def _host(self, url: str) -> _HostState:
+        host = urlsplit(url).netloc.lower()
+        if host not in self._hosts:
+            self._hosts[host] = _HostState(self.per_host_concurrency)
+        return self._hosts[host]
+
+    async def _wait_for_turn(self, host: _HostState) -> None:
+        """Space out request starts to the same host by the politeness delay"""
+        async with host.pacing_lock:
+            now = time.monotonic()
+            wait = host.next_start - now
+            host.next_start = max(now, host.next_start) + self.host_delay
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+        # Exponential backoff with full jitter
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    async def fetch(self, url: str) -> FetchResult:
+        """
+        GET a URL within the global and per-host limits.
+
+        Raises httpx.HTTPError once retries are exhausted or for a
+        non-retryable 4xx response.
+        """
+        entry = await asyncio.to_thread(self.cache.lookup, url) if self.cache else None
+        if entry and entry.is_fresh(self.cache.ttl):
+            self.stats["cache_hits"] += 1
+            self.cache.stats["fresh_hits"] += 1
+            return FetchResult.from_entry(entry)
+        request_headers = entry.conditional_headers() if entry else {}
+
+        host = self._host(url)
+        attempt = 0
+        while True:
+            response = None
+            try:
+                async with self._global, host.semaphore:
+                    await self._wait_for_turn(host)
+                    self.stats["requests"] += 1
+                    start = time.perf_counter()
+                    response = await self._client.get(url, headers=request_headers)
+                    elapsed = time.perf_counter() - start
+
+                if response.status_code == 304 and entry:
+                    # Unchanged since we stored it
+                    self.stats["not_modified"] += 1
+                    await asyncio.to_thread(self.cache.mark_revalidated, url, dict(response.headers))
+                    return FetchResult.from_entry(entry, elapsed)
+
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    if self.cache:
+                        await asyncio.to_thread(self.cache.store, url, response.content, dict(response.headers))
+                    return FetchResult(
+                        url=str(response.url),
+                        status_code=response.status_code,
+                        content=response.content,
+                        headers=dict(response.headers),
+                        elapsed=elapsed,
+                    )
+                error: Exception = httpx.HTTPStatusError(
+                    f"{response.status_code} from {url}", request=response.request, response=response
+                )
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                error = e
+            except httpx.HTTPStatusError:
+                self.stats["failures"] += 1
+                raise
+
+            if attempt >= self.max_retries:
+                self.stats["failures"] += 1
+                raise error
+
+            delay = self._retry_delay(attempt, response)
+            attempt += 1
+            self.stats["retries"] += 1
+            logger.warning(f"Retrying {url} in {delay:.1f}s (attempt {attempt}/{self.max_retries}): {str(error)}")
+            await asyncio.sleep(delay)
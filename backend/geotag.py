@@ -7,6 +7,12 @@ from bson import ObjectId
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_anthropic import ChatAnthropic 
 from dotenv import load_dotenv
+
+try:
+    from .llm_executor import llm_executor
+except ImportError:
+    from llm_executor import llm_executor
+
 MONGO_URI = "mongodb://localhost:27017"
 DB_NAME = "climate_risk_intelligence"  
 load_dotenv()
@@ -41,7 +47,7 @@ Content:
 Respond with a single location in the format: City, State (if applicable), Country.""")
     ]
 
-    response = await llm.ainvoke(prompt)
+    response = await llm_executor.ainvoke(llm, prompt)
     location = response.content.strip()
     return location
 
@@ -0,0 +1,182 @@
+"""
+Persistent HTTP cache for the scrapers.
+
+Responses are stored in a local SQLite database together with their ETag and
+Last-Modified validators. Within HTTP_CACHE_TTL_SECONDS a cached page is
+served without touching the network; after that the fetcher revalidates it
+with If-None-Match/If-Modified-Since and a 304 is answered from the store.
+The store is bounded by HTTP_CACHE_MAX_BYTES and evicts least recently used
+entries first.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "true").lower() == "true"
+HTTP_CACHE_PATH = os.getenv("HTTP_CACHE_PATH", "http_cache.sqlite3")
+HTTP_CACHE_TTL_SECONDS = float(os.getenv("HTTP_CACHE_TTL_SECONDS", "900"))
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Response headers kept alongside the body
+STORED_HEADERS = ("content-type", "etag", "last-modified")
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    content: bytes
+    headers: Dict[str, str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    validated_at: float
+
+    def is_fresh(self, ttl: float) -> bool:
+        return time.time() - self.validated_at < ttl
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """SQLite-backed response store with TTL freshness and size-bounded LRU eviction"""
+
+    def __init__(self, path: str = HTTP_CACHE_PATH, ttl: float = HTTP_CACHE_TTL_SECONDS, max_bytes: int = HTTP_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                content BLOB NOT NULL,
+                headers TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                validated_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        self._conn.commit()
+
+        self.stats: Dict[str, Any] = {"fresh_hits": 0, "revalidated": 0, "stored": 0, "evicted": 0}
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, headers, etag, last_modified, validated_at FROM responses WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+        content, headers, etag, last_modified, validated_at = row
+        return CacheEntry(
+            url=url,
+            content=content,
+            headers=json.loads(headers),
+            etag=etag,
+            last_modified=last_modified,
+            validated_at=validated_at,
+        )
+
+    def mark_revalidated(self, url: str, headers: Dict[str, str]) -> None:
+        """Record a 304: the stored body is current again. Updated validators win."""
+        headers = {k.lower(): v for k, v in headers.items()}
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                UPDATE responses
+                SET validated_at = ?, accessed_at = ?,
+                    etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified)
+                WHERE url = ?
+                """,
+                (now, now, headers.get("etag"), headers.get("last-modified"), url)
+            )
+            self._conn.commit()
+            self.stats["revalidated"] += 1
+
+    def store(self, url: str, content: bytes, headers: Dict[str, str]) -> None:
+        headers = {k.lower(): v for k, v in headers.items()}
+        if "no-store" in headers.get("cache-control", ""):
+            return
+
+        kept_headers = {name: headers[name] for name in STORED_HEADERS if name in headers}
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO responses
+                    (url, content, headers, etag, last_modified, validated_at, accessed_at, size)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (url, content, json.dumps(kept_headers), headers.get("etag"),
+                 headers.get("last-modified"), now, now, len(content))
+            )
+            self._conn.commit()
+            self.stats["stored"] += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the store is back under 90% of its limit"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        for url, size in self._conn.execute("SELECT url, size FROM responses ORDER BY accessed_at").fetchall():
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+            evicted += 1
+        self._conn.commit()
+        self.stats["evicted"] += evicted
+        logger.info(f"Evicted {evicted} entries from HTTP cache ({total} bytes remaining)")
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return dict(self.stats, entries=entries, size_bytes=total, max_bytes=self.max_bytes, ttl_seconds=self.ttl)
+
+
+_cache: Optional[HttpCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """Return the process-wide HTTP cache, or None when it's disabled"""
+    global _cache
+    if not HTTP_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = HttpCache()
+    return _cache
@@ -0,0 +1,159 @@
+"""
+Keyword relevance scoring for insurance and climate risk articles.
+
+Keywords are lowercased and grouped once at import. When pyahocorasick is
+installed a single Aho-Corasick automaton finds every keyword in one pass
+over the text; otherwise the precomputed keywords are checked as substrings,
+which in CPython is faster than a combined alternation regex. Both paths keep
+the original substring semantics ("claim" matches "claims"), so stored scores
+don't shift when switching between them.
+"""
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Insurance and climate risk related keywords - expanded based on source sites
+INSURANCE_KEYWORDS = [
+    "insurance", "reinsurance", "underwriting", "premium", "policy", "claim",
+    "liability", "risk assessment", "insurtech", "property insurance",
+    "casualty insurance", "life insurance", "health insurance", "chubb",
+    "insurer", "underwriter", "coverage", "deductible", "policyholder",
+    "indemnity", "actuarial", "loss ratio", "combined ratio", "catastrophe bond",
+    "parametric", "captive insurance", "commercial lines", "personal lines"
+]
+
+CLIMATE_KEYWORDS = [
+    "climate", "flood", "hurricane", "wildfire", "storm", "drought", "sea level",
+    "extreme weather", "natural disaster", "catastrophe", "TNFD", "ESG",
+    "sustainability", "carbon", "emissions", "global warming", "climate change",
+    "biodiversity", "nature-related", "disclosure", "resilience", "adaptation",
+    "mitigation", "physical risk", "transition risk", "TCFD", "ISSB", "net-zero",
+    "decarbonization", "climate-resilient", "nature loss", "nature positive"
+]
+
+# Source-specific keyword weighting
+SOURCE_WEIGHTS = {
+    "TNFD": 2.0,  # TNFD content is highly relevant
+    "UNFCCC": 1.8,  # UN Climate content is highly relevant
+    "Insurance Business Magazine": 1.5,  # Direct insurance industry source
+    "Insurance Journal": 1.5,  # Direct insurance industry source
+    "WEADAPT": 1.3,  # Climate adaptation platform
+    "CLIMATE CHANGE NEWS": 1.3,  # Climate-focused news
+    "UNEPFI": 1.4,  # UN Environment Programme Finance Initiative
+    "GENEVA ASSOCIATION": 1.5  # Insurance and risk research
+}
+
+# More lenient threshold for sources known to be highly relevant
+LENIENT_INSURANCE_SOURCES = {"TNFD", "UNFCCC", "UNEPFI"}
+LENIENT_CLIMATE_SOURCES = {"Insurance Business Magazine", "Insurance Journal"}
+
+
+class KeywordMatcher:
+    """Counts how many distinct keywords of each group occur in a text"""
+
+    def __init__(self, groups: Dict[str, List[str]]):
+        self.group_names = list(groups)
+        self.keywords = list(dict.fromkeys(keyword.lower() for keywords in groups.values() for keyword in keywords))
+        self._index = {keyword: i for i, keyword in enumerate(self.keywords)}
+
+        # keyword x group incidence matrix, so group counts are one matrix product
+        self.membership = np.zeros((len(self.keywords), len(groups)), dtype=np.int32)
+        for group, keywords in enumerate(groups.values()):
+            for keyword in keywords:
+                self.membership[self._index[keyword.lower()], group] = 1
+
+        self._automaton = None
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for keyword, i in self._index.items():
+                self._automaton.add_word(keyword, i)
+            self._automaton.make_automaton()
+
+    def present(self, text: str) -> np.ndarray:
+        """Boolean vector of the keywords found in ``text`` (case-insensitive)"""
+        text = text.lower()
+        found = np.zeros(len(self.keywords), dtype=bool)
+        if self._automaton is not None:
+            for _, i in self._automaton.iter(text):
+                found[i] = True
+        else:
+            for i, keyword in enumerate(self.keywords):
+                if keyword in text:
+                    found[i] = True
+        return found
+
+    def count(self, text: str) -> Dict[str, int]:
+        counts = self.present(text).astype(np.int32) @ self.membership
+        return dict(zip(self.group_names, counts.tolist()))
+
+    def count_batch(self, texts: List[str]) -> np.ndarray:
+        """Per-group distinct keyword counts, shape (len(texts), n_groups)"""
+        presence = np.zeros((len(texts), len(self.keywords)), dtype=np.int32)
+        for row, text in enumerate(texts):
+            presence[row] = self.present(text)
+        return presence @ self.membership
+
+
+matcher = KeywordMatcher({"insurance": INSURANCE_KEYWORDS, "climate": CLIMATE_KEYWORDS})
+
+
+def article_text(article: Dict[str, Any]) -> str:
+    # Combine title and content for analysis, ensure they're strings
+    title = str(article.get("title", "")) if article.get("title") else ""
+    content = str(article.get("content", "")) if article.get("content") else ""
+    return title + " " + content
+
+
+def score_articles(articles: List[Dict[str, Any]]) -> List[Optional[Dict[str, float]]]:
+    """
+    Score a batch of articles for insurance and climate relevance.
+
+    Returns one entry per article: a dict with insurance_relevance,
+    climate_relevance and total_relevance, or None if the article isn't
+    relevant to both domains.
+    """
+    if not articles:
+        return []
+
+    counts = matcher.count_batch([article_text(article) for article in articles])
+    sources = [article.get("source", "Unknown") for article in articles]
+    weights = np.array([SOURCE_WEIGHTS.get(source, 1.0) for source in sources])
+
+    # Apply source-specific weighting
+    insurance_scores = np.round(counts[:, 0] * weights, 1)
+    climate_scores = np.round(counts[:, 1] * weights, 1)
+
+    results = []
+    for article, source, insurance_score, climate_score in zip(articles, sources, insurance_scores, climate_scores):
+        weighted_insurance_score = float(insurance_score)
+        weighted_climate_score = float(climate_score)
+
+        # Additional scoring for category/type if available
+        if article.get("category") and isinstance(article.get("category"), str):
+            category = article.get("category", "").lower()
+            if any(term in category for term in ["insurance", "risk", "finance"]):
+                weighted_insurance_score += 2
+            if any(term in category for term in ["climate", "environment", "sustainability"]):
+                weighted_climate_score += 2
+
+        # Only include articles with at least some relevance to both domains
+        min_insurance_threshold = 0 if source in LENIENT_INSURANCE_SOURCES else 1
+        min_climate_threshold = 0 if source in LENIENT_CLIMATE_SOURCES else 1
+
+        if weighted_insurance_score > min_insurance_threshold and weighted_climate_score > min_climate_threshold:
+            results.append({
+                "insurance_relevance": weighted_insurance_score,
+                "climate_relevance": weighted_climate_score,
+                "total_relevance": weighted_insurance_score + weighted_climate_score,
+            })
+        else:
+            results.append(None)
+    return results
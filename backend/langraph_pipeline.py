@@ -1,30 +1,30 @@
 import asyncio
-from typing import TypedDict, List, Dict, Any
+import time
+from typing import TypedDict, List, Dict, Any, Annotated, Awaitable, Callable
 from langgraph.graph import StateGraph, END
 from langchain_core.runnables import RunnableLambda
 
 # Import existing tools and generator functions
 from api import (
-    scrape_news_sources,
+    crawl_news_sources,
     analyze_insurance_relevance,
-    extract_structured_info,
-    generate_summary_reports
-)
-from app import (
-    generate_regulatory_frameworks,
-    generate_esg_impacts,
-    generate_underwriting_challenges,
-    generate_coverage_gaps,
+    generate_summary_reports,
+    run_coroutine_sync
 )
+from app import extract_climate_risk_data
 
 # Define the joint pipeline state
 typical_keys = [
     'raw_articles', 'relevant_articles',
     'frameworks', 'esg_impacts',
     'underwriting_challenges', 'coverage_gaps',
-    'structured_info', 'summary_report'
+    'structured_info', 'summary_report', 'node_timings'
 ]
 
+def merge_timings(current: Dict[str, float], update: Dict[str, float]) -> Dict[str, float]:
+    # Concurrent branches each report their own timing
+    return {**(current or {}), **(update or {})}
+
 class PipelineState(TypedDict):
     raw_articles: List[Dict[str, Any]]
     relevant_articles: List[Dict[str, Any]]
@@ -34,86 +34,73 @@ class PipelineState(TypedDict):
     coverage_gaps: List[Dict[str, Any]]
     structured_info: List[Dict[str, Any]]
     summary_report: Dict[str, Any]
+    node_timings: Annotated[Dict[str, float], merge_timings]
+
+def timed(name: str, func: Callable[[PipelineState], Awaitable[Dict[str, Any]]]) -> RunnableLambda:
+    """Wrap an async node so its wall time is recorded in state["node_timings"]"""
+    async def node(state: PipelineState) -> Dict[str, Any]:
+        start = time.perf_counter()
+        update = await func(state)
+        return {**update, "node_timings": {name: round(time.perf_counter() - start, 3)}}
+    return RunnableLambda(node)
 
 # Node: fetch raw news articles
-fetch_articles = RunnableLambda(
-    lambda _: {"raw_articles": scrape_news_sources.invoke({})}
-)
+async def _fetch(state: PipelineState) -> Dict[str, Any]:
+    return {"raw_articles": await crawl_news_sources()}
 
-# Node: filter for insurance relevance
-analyze_relevance = RunnableLambda(
-    lambda state: {"relevant_articles": analyze_insurance_relevance.invoke({"articles": state["raw_articles"]})}
-)
+# Node: filter for insurance relevance (CPU-bound keyword scoring, kept off the loop)
+async def _relevance(state: PipelineState) -> Dict[str, Any]:
+    relevant = await asyncio.to_thread(analyze_insurance_relevance.invoke, {"articles": state["raw_articles"]})
+    return {"relevant_articles": relevant}
 
-# Node: extract structured summaries
-def _extract_struct(state: PipelineState) -> Dict[str, Any]:
-    info = extract_structured_info.invoke({"articles": state["relevant_articles"]})
-    return {"structured_info": info}
-structured_info_node = RunnableLambda(_extract_struct)
+# Node: one LLM pass per article producing structured summaries, frameworks,
+# ESG impacts, underwriting challenges and coverage gaps. The per-article
+# calls run concurrently on the pipeline's event loop.
+async def _extract_all(state: PipelineState) -> Dict[str, Any]:
+    return await extract_climate_risk_data(state["relevant_articles"])
 
 # Node: generate human-readable summary report
-def _gen_report(state: PipelineState) -> Dict[str, Any]:
-    report = generate_summary_reports.invoke({"structured_info": state["structured_info"]})
+async def _gen_report(state: PipelineState) -> Dict[str, Any]:
+    report = await asyncio.to_thread(generate_summary_reports.invoke, {"structured_info": state["structured_info"]})
     return {"summary_report": report}
-summary_node = RunnableLambda(_gen_report)
-
-# Wrappers for async structured info generators
-def _gen_frameworks(state: PipelineState) -> Dict[str, Any]:
-    frameworks = asyncio.run(generate_regulatory_frameworks(state["relevant_articles"]))
-    return {"frameworks": frameworks}
-
-def _gen_esg(state: PipelineState) -> Dict[str, Any]:
-    esg = asyncio.run(generate_esg_impacts(state["relevant_articles"]))
-    return {"esg_impacts": esg}
-
-def _gen_challenges(state: PipelineState) -> Dict[str, Any]:
-    challenges = asyncio.run(generate_underwriting_challenges(state["relevant_articles"]))
-    return {"underwriting_challenges": challenges}
-
-def _gen_gaps(state: PipelineState) -> Dict[str, Any]:
-    gaps = asyncio.run(generate_coverage_gaps(state["relevant_articles"]))
-    return {"coverage_gaps": gaps}
-
-generate_frameworks_node = RunnableLambda(_gen_frameworks)
-generate_esg_node = RunnableLambda(_gen_esg)
-generate_challenges_node = RunnableLambda(_gen_challenges)
-generate_gaps_node = RunnableLambda(_gen_gaps)
 
 # Build the state graph
 graph = StateGraph(PipelineState)
 
 # Add nodes
-graph.add_node("scrape", fetch_articles)
-graph.add_node("relevance", analyze_relevance)
-graph.add_node("frameworks", generate_frameworks_node)
-graph.add_node("esg", generate_esg_node)
-graph.add_node("challenges", generate_challenges_node)
-graph.add_node("gaps", generate_gaps_node)
-graph.add_node("structured_info", structured_info_node)
-graph.add_node("summary", summary_node)
+graph.add_node("scrape", timed("scrape", _fetch))
+graph.add_node("relevance", timed("relevance", _relevance))
+graph.add_node("extract", timed("extract", _extract_all))
+graph.add_node("summary", timed("summary", _gen_report))
 
 # Define edges for sequencing and parallelism
 graph.set_entry_point("scrape")
 # After scraping, analyze relevance
 graph.add_edge("scrape", "relevance")
-# After relevance, branch into data generators
-for next_node in ["frameworks", "esg", "challenges", "gaps", "structured_info"]:
-    graph.add_edge("relevance", next_node)
-# After structured info, generate summary
-graph.add_edge("structured_info", "summary")
-
-# Terminal edges for leaf nodes
-for end_node in ["frameworks", "esg", "challenges", "gaps", "summary"]:
-    graph.add_edge(end_node, END)
+# After relevance, extract every data set in one pass
+graph.add_edge("relevance", "extract")
+# After extraction, generate summary
+graph.add_edge("extract", "summary")
+graph.add_edge("summary", END)
 
 # Compile the pipeline
 climate_pipeline = graph.compile()
 
-def run_climate_pipeline() -> Dict[str, Any]:
+async def arun_climate_pipeline() -> Dict[str, Any]:
     """
-    Invoke the LangGraph-based climate risk data pipeline.
+    Run the LangGraph-based climate risk data pipeline on the current event loop.
     Returns a dict containing all results: raw_articles, relevant_articles,
     frameworks, esg_impacts, underwriting_challenges, coverage_gaps,
-    structured_info, and summary_report.
+    structured_info, summary_report, and node_timings (seconds per node).
+    """
+    start = time.perf_counter()
+    result = await climate_pipeline.ainvoke({"node_timings": {}})
+    result["node_timings"] = merge_timings(result.get("node_timings"), {"total": round(time.perf_counter() - start, 3)})
+    return result
+
+def run_climate_pipeline() -> Dict[str, Any]:
+    """
+    Invoke the LangGraph-based climate risk data pipeline from synchronous code.
+    Safe to call from inside a running event loop; see arun_climate_pipeline.
     """
-    return climate_pipeline.invoke({})
+    return run_coroutine_sync(arun_climate_pipeline())
@@ -0,0 +1,176 @@
+"""
+Persistent LLM response cache.
+
+Responses are stored in a local SQLite database keyed by a hash of
+(model, system prompt hash, user prompt hash, call parameters), so the same
+article sent with the same prompt is answered from disk instead of the
+model. Entries expire after LLM_CACHE_TTL_SECONDS and the store keeps at
+most LLM_CACHE_MAX_ENTRIES, evicting least recently used entries first.
+
+``LLMExecutor.ainvoke`` consults the cache before spending rate-limit budget,
+so every call routed through the executor is cached.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+
+# Model attributes that change the output for the same prompt
+MODEL_PARAMS = ("temperature", "max_tokens", "max_tokens_to_sample", "top_p", "top_k")
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def _message_text(message: Any) -> str:
+    content = getattr(message, "content", message)
+    return content if isinstance(content, str) else json.dumps(content, sort_keys=True, default=str)
+
+
+def model_name(llm: Any) -> str:
+    return str(getattr(llm, "model", None) or getattr(llm, "model_name", None) or type(llm).__name__)
+
+
+def cache_key(llm: Any, messages: Sequence[Any], params: Dict[str, Any]) -> str:
+    """Hash of (model, system prompt hash, user prompt hash, call parameters)"""
+    system_parts, user_parts = [], []
+    for message in messages:
+        role = getattr(message, "type", "human")
+        if role == "system":
+            system_parts.append(_message_text(message))
+        else:
+            user_parts.append(f"{role}:{_message_text(message)}")
+
+    model_params = {name: getattr(llm, name) for name in MODEL_PARAMS if getattr(llm, name, None) is not None}
+    model_params.update(params)
+    return _digest(json.dumps([
+        model_name(llm),
+        _digest("\n".join(system_parts)),
+        _digest("\n".join(user_parts)),
+        model_params,
+    ], sort_keys=True, default=str))
+
+
+class LLMCache:
+    """SQLite-backed response store with TTL expiry and entry-bounded LRU eviction"""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl: float = LLM_CACHE_TTL_SECONDS, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                content TEXT NOT NULL,
+                usage TEXT,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        self._conn.commit()
+
+        self.stats: Dict[str, Any] = {"hits": 0, "misses": 0, "expired": 0, "stored": 0, "evicted": 0}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached response content and usage, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, usage, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[2] >= self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.stats["expired"] += 1
+                row = None
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.stats["hits"] += 1
+
+        content, usage, _ = row
+        return {"content": content, "usage": json.loads(usage) if usage else {}}
+
+    def put(self, key: str, model: str, content: str, usage: Optional[Dict[str, Any]] = None) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO responses (key, model, content, usage, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (key, model, content, json.dumps(usage) if usage else None, now, now)
+            )
+            self._conn.commit()
+            self.stats["stored"] += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries once the store holds more than max_entries"""
+        count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count <= self.max_entries:
+            return
+
+        # Trim to 90% so eviction doesn't run on every insert
+        excess = count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+            (excess,)
+        )
+        self._conn.commit()
+        self.stats["evicted"] += excess
+        logger.info(f"Evicted {excess} entries from LLM cache")
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return dict(
+            self.stats,
+            entries=entries,
+            hit_rate=round(self.stats["hits"] / lookups, 3) if lookups else None,
+            max_entries=self.max_entries,
+            ttl_seconds=self.ttl,
+        )
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Return the process-wide LLM cache, or None when it's disabled"""
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache()
+    return _cache
@@ -0,0 +1,382 @@
+"""
+Async execution layer for LLM calls.
+
+``LLMExecutor.ainvoke`` wraps a chat model's ``ainvoke`` with:
+
+- a cap on in-flight calls (LLM_MAX_CONCURRENCY)
+- token-bucket rate limits on requests per minute (LLM_REQUESTS_PER_MINUTE)
+  and estimated input tokens per minute (LLM_TOKENS_PER_MINUTE)
+- a per-call timeout (LLM_TIMEOUT_SECONDS)
+- retries with exponential backoff and full jitter on 429 (rate limited),
+  529 (overloaded) and timeouts (LLM_MAX_RETRIES), honouring Retry-After
+- the persistent response cache (see llm_cache.py): a repeated prompt is
+  answered from disk without touching the limits or the model. Callers pass
+  ``validate`` so only responses they could parse are stored (and replayed)
+
+``LLMExecutor.astream`` applies the same limits and cache to a streamed
+response, yielding text chunks as they arrive.
+
+The rate limits are shared by every event loop in the process, since they
+model the API key's quota. The concurrency cap applies per event loop.
+
+Fan out a batch with ``asyncio.gather`` and it finishes in about the time of
+the slowest call instead of the sum of all of them::
+
+    results = await asyncio.gather(*(llm_executor.ainvoke(llm, messages) for messages in batch))
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Union
+
+from dotenv import load_dotenv
+from langchain_core.messages import AIMessage
+
+try:
+    from .llm_cache import LLMCache, cache_key, get_llm_cache, model_name
+except ImportError:
+    from llm_cache import LLMCache, cache_key, get_llm_cache, model_name
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "5"))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "50"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "40000"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_SECONDS = float(os.getenv("LLM_BACKOFF_SECONDS", "2.0"))
+
+RETRY_STATUS_CODES = {429, 529}
+
+
+def estimate_tokens(messages: Sequence[Any]) -> int:
+    """Rough input token count: about 4 characters per token"""
+    chars = 0
+    for message in messages:
+        content = getattr(message, "content", message)
+        chars += len(content) if isinstance(content, str) else len(str(content))
+    return max(1, chars // 4)
+
+
+def status_code_of(error: Exception) -> Optional[int]:
+    """HTTP status of an API error, whichever client library raised it"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def retry_after_of(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    retry_after = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(retry_after) if retry_after else None
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at ``rate_per_minute``.
+
+    A request larger than the bucket is allowed once it's full, so an
+    oversized prompt waits for a whole minute's budget instead of forever.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Wait until ``amount`` tokens are available and take them; returns seconds waited"""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                wait = (amount - self._tokens) / self.rate
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def debit(self, amount: float) -> None:
+        """Charge usage found out after the fact; the balance may go negative"""
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+
+
+class LLMExecutor:
+    """Concurrency-limited, rate-limited, retrying runner for ``ainvoke`` calls"""
+
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = LLM_TOKENS_PER_MINUTE,
+        timeout: float = LLM_TIMEOUT_SECONDS,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff: float = LLM_BACKOFF_SECONDS,
+        cache: Optional[LLMCache] = None,
+        use_cache: bool = True,
+    ):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.use_cache = use_cache
+        self._cache = cache
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+
+        # asyncio primitives belong to one event loop
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+        self._semaphores_lock = threading.Lock()
+        self.stats: Dict[str, float] = {
+            "calls": 0, "cache_hits": 0, "retries": 0, "failures": 0, "timeouts": 0,
+            "rate_limit_wait_seconds": 0.0, "input_tokens": 0, "output_tokens": 0, "uncached_invalid": 0,
+        }
+
+    @property
+    def cache(self) -> Optional[LLMCache]:
+        if not self.use_cache:
+            return None
+        return self._cache or get_llm_cache()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._semaphores_lock:
+            if loop not in self._semaphores:
+                self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+            return self._semaphores[loop]
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        retry_after = retry_after_of(error)
+        if retry_after is not None:
+            return retry_after
+        # Exponential backoff with full jitter
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    def _record_usage(self, response: Any, estimated: int) -> None:
+        usage = getattr(response, "usage_metadata", None) or {}
+        input_tokens = usage.get("input_tokens", estimated)
+        self.stats["input_tokens"] += input_tokens
+        self.stats["output_tokens"] += usage.get("output_tokens", 0)
+        if input_tokens > estimated:
+            self.token_bucket.debit(input_tokens - estimated)
+
+    async def _acquire(self, estimated: int) -> None:
+        """Wait for rate-limit budget for one call (caller holds the semaphore)"""
+        waited = await self.request_bucket.acquire(1)
+        waited += await self.token_bucket.acquire(estimated)
+        self.stats["rate_limit_wait_seconds"] += waited
+        self.stats["calls"] += 1
+
+    async def _backoff(self, attempt: int, error: Exception) -> None:
+        """Sleep before retry ``attempt + 1``, or raise ``error`` once retries are exhausted"""
+        if attempt >= self.max_retries:
+            self.stats["failures"] += 1
+            raise error
+
+        delay = self._retry_delay(attempt, error)
+        self.stats["retries"] += 1
+        logger.warning(
+            f"Retrying LLM call in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries}): "
+            f"{type(error).__name__} {str(error)}"
+        )
+        await asyncio.sleep(delay)
+
+    async def _cache_lookup(
+        self, store: Optional[LLMCache], key: Optional[str], cache: Union[bool, str], validate: Optional[Callable[[str], Any]]
+    ) -> Optional[Dict[str, Any]]:
+        if store is None or cache == "refresh":
+            return None
+        hit = await asyncio.to_thread(store.get, key)
+        if hit is None:
+            return None
+        if not accepts(validate, hit["content"]):
+            # Stored before the caller validated responses; call the model again
+            logger.warning("Ignoring cached LLM response the caller can't use")
+            return None
+        self.stats["cache_hits"] += 1
+        return hit
+
+    async def _cache_store(
+        self, store: Optional[LLMCache], key: Optional[str], llm: Any, content: Any,
+        usage: Any = None, validate: Optional[Callable[[str], Any]] = None
+    ) -> None:
+        if store is None or not isinstance(content, str) or not content:
+            return
+        if not accepts(validate, content):
+            self.stats["uncached_invalid"] += 1
+            return
+        try:
+            await asyncio.to_thread(store.put, key, model_name(llm), content, dict(usage) if usage else None)
+        except Exception as e:
+            logger.error(f"Error writing to LLM cache: {str(e)}")
+
+    async def ainvoke(
+        self,
+        llm: Any,
+        messages: Sequence[Any],
+        timeout: Optional[float] = None,
+        cache: Union[bool, str] = True,
+        validate: Optional[Callable[[str], Any]] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Call ``llm.ainvoke(messages, **kwargs)`` within the executor's limits.
+
+        With ``cache`` (the default) an identical earlier call is answered
+        from the response cache as an ``AIMessage``; ``cache="refresh"``
+        skips the lookup but stores the new response. If ``validate`` is
+        given, a response is only cached (and a cached one only used) when
+        ``validate(text)`` returns a true value without raising.
+
+        Raises the last error once retries are exhausted, or immediately for
+        errors that aren't rate limiting, overload or timeouts.
+        """
+        store = self.cache if cache else None
+        key = cache_key(llm, messages, kwargs) if store is not None else None
+        hit = await self._cache_lookup(store, key, cache, validate)
+        if hit is not None:
+            return AIMessage(content=hit["content"], additional_kwargs={"cached": True})
+
+        response = await self._call(llm, messages, timeout, **kwargs)
+        await self._cache_store(
+            store, key, llm, getattr(response, "content", None), getattr(response, "usage_metadata", None), validate
+        )
+        return response
+
+    async def _call(self, llm: Any, messages: Sequence[Any], timeout: Optional[float], **kwargs) -> Any:
+        estimated = estimate_tokens(messages)
+        timeout = timeout or self.timeout
+        attempt = 0
+        while True:
+            async with self._semaphore():
+                await self._acquire(estimated)
+                try:
+                    response = await asyncio.wait_for(llm.ainvoke(messages, **kwargs), timeout)
+                    self._record_usage(response, estimated)
+                    return response
+                except asyncio.TimeoutError as e:
+                    self.stats["timeouts"] += 1
+                    error: Exception = e
+                except Exception as e:
+                    if status_code_of(e) not in RETRY_STATUS_CODES:
+                        self.stats["failures"] += 1
+                        raise
+                    error = e
+
+            await self._backoff(attempt, error)
+            attempt += 1
+
+    async def astream(
+        self,
+        llm: Any,
+        messages: Sequence[Any],
+        timeout: Optional[float] = None,
+        cache: Union[bool, str] = True,
+        validate: Optional[Callable[[str], Any]] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream the text of ``llm.astream(messages, **kwargs)`` within the executor's limits.
+
+        ``timeout`` bounds the whole stream. A call is retried only if it
+        fails before yielding anything; later errors propagate. A cached
+        response is yielded as a single chunk, and a completed stream is
+        stored in the cache if ``validate`` (as for ``ainvoke``) accepts it.
+        """
+        store = self.cache if cache else None
+        key = cache_key(llm, messages, kwargs) if store is not None else None
+        hit = await self._cache_lookup(store, key, cache, validate)
+        if hit is not None:
+            yield hit["content"]
+            return
+
+        estimated = estimate_tokens(messages)
+        timeout = timeout or self.timeout
+        attempt = 0
+        while True:
+            chunks: List[str] = []
+            error: Optional[Exception] = None
+            async with self._semaphore():
+                await self._acquire(estimated)
+                try:
+                    deadline = time.monotonic() + timeout
+                    stream = llm.astream(messages, **kwargs).__aiter__()
+                    while True:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise asyncio.TimeoutError()
+                        try:
+                            chunk = await asyncio.wait_for(stream.__anext__(), remaining)
+                        except StopAsyncIteration:
+                            break
+                        text = chunk_text(chunk)
+                        if text:
+                            chunks.append(text)
+                            yield text
+                except asyncio.TimeoutError as e:
+                    self.stats["timeouts"] += 1
+                    error = e
+                except Exception as e:
+                    if chunks or status_code_of(e) not in RETRY_STATUS_CODES:
+                        self.stats["failures"] += 1
+                        raise
+                    error = e
+
+            if error is None:
+                content = "".join(chunks)
+                self.stats["input_tokens"] += estimated
+                await self._cache_store(store, key, llm, content, validate=validate)
+                return
+            if chunks:
+                # Part of the response was already consumed, so it can't be retried transparently
+                self.stats["failures"] += 1
+                raise error
+            await self._backoff(attempt, error)
+            attempt += 1
+
+
+def accepts(validate: Optional[Callable[[str], Any]], content: str) -> bool:
+    """Whether a caller's validator accepts a response; no validator accepts everything"""
+    if validate is None:
+        return True
+    try:
+        return bool(validate(content))
+    except Exception:
+        return False
+
+
+def chunk_text(chunk: Any) -> str:
+    """Text of a streamed message chunk (string content or a list of content blocks)"""
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            block.get("text", "") if isinstance(block, dict) else str(block)
+            for block in content
+        )
+    return ""
+
+
+llm_executor = LLMExecutor()
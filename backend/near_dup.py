@@ -0,0 +1,159 @@
+"""
+Near-duplicate detection for syndicated articles.
+
+``hash_content`` only catches copies that are identical after whitespace
+normalization. A story republished with a different footer or byline keeps
+most of its word shingles, so MinHash signatures estimate the Jaccard
+similarity of two articles' shingle sets, and LSH banding turns finding
+candidate pairs into exact lookups on band keys.
+
+Articles store their signature (``minhash``) and band keys
+(``minhash_bands``). ``minhash_bands`` is indexed, so new articles are
+matched against the corpus with one ``$in`` query over their band keys.
+
+Signatures are deterministic across processes and restarts: shingles are
+hashed with CRC32 (not Python's salted ``hash``) and the permutations come
+from a fixed seed.
+"""
+import hashlib
+import logging
+import os
+import re
+import zlib
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+NEAR_DUP_NUM_PERM = int(os.getenv("NEAR_DUP_NUM_PERM", "128"))
+NEAR_DUP_BANDS = int(os.getenv("NEAR_DUP_BANDS", "16"))
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))
+NEAR_DUP_SHINGLE_SIZE = int(os.getenv("NEAR_DUP_SHINGLE_SIZE", "5"))
+
+# Shorter texts don't have enough shingles for a meaningful estimate
+MIN_SHINGLES = 10
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_SEED = 1
+
+
+def shingles(text: str, size: int = NEAR_DUP_SHINGLE_SIZE) -> List[str]:
+    """Lowercased word n-grams of ``text``"""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+class MinHasher:
+    """MinHash signatures with LSH banding"""
+
+    def __init__(self, num_perm: int = NEAR_DUP_NUM_PERM, bands: int = NEAR_DUP_BANDS, seed: int = _SEED):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        # Universal hashes (a * x + b) mod p. a and b stay below 2**32 so the
+        # product of a 32-bit shingle hash can't overflow uint64.
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> Optional[List[int]]:
+        """MinHash signature of ``text``, or None if it's too short to compare"""
+        grams = set(shingles(text))
+        if len(grams) < MIN_SHINGLES:
+            return None
+        hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).tolist()
+
+    def band_keys(self, signature: Sequence[int]) -> List[str]:
+        """One key per band; two signatures sharing any key are LSH candidates"""
+        values = np.asarray(signature, dtype=np.uint64)
+        keys = []
+        for band in range(self.bands):
+            chunk = values[band * self.rows:(band + 1) * self.rows].tobytes()
+            keys.append(f"{band}:{hashlib.blake2b(chunk, digest_size=8).hexdigest()}")
+        return keys
+
+    @staticmethod
+    def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        if len(a) != len(b):
+            return 0.0
+        return float(np.mean(np.asarray(a) == np.asarray(b)))
+
+
+hasher = MinHasher()
+
+
+class LSHIndex:
+    """In-memory band key -> items map for matching a batch of signatures"""
+
+    def __init__(self, minhasher: MinHasher = hasher):
+        self.hasher = minhasher
+        self._buckets: Dict[str, List[Hashable]] = {}
+        self._signatures: Dict[Hashable, Sequence[int]] = {}
+
+    def add(self, key: Hashable, signature: Sequence[int], bands: Optional[Iterable[str]] = None) -> None:
+        self._signatures[key] = signature
+        for band in bands or self.hasher.band_keys(signature):
+            self._buckets.setdefault(band, []).append(key)
+
+    def best_match(self, signature: Sequence[int], threshold: float = NEAR_DUP_THRESHOLD) -> Tuple[Optional[Hashable], float]:
+        """Most similar indexed item at or above ``threshold``"""
+        best, best_score = None, 0.0
+        checked = set()
+        for band in self.hasher.band_keys(signature):
+            for key in self._buckets.get(band, ()):
+                if key in checked:
+                    continue
+                checked.add(key)
+                score = self.hasher.similarity(signature, self._signatures[key])
+                if score >= threshold and score > best_score:
+                    best, best_score = key, score
+        return best, best_score
+
+
+def cluster_near_duplicates(
+    new_items: Sequence[Tuple[str, Optional[Sequence[int]]]],
+    existing_items: Sequence[Tuple[str, Sequence[int]]] = (),
+    threshold: float = NEAR_DUP_THRESHOLD,
+) -> Dict[str, str]:
+    """
+    Assign new items to near-duplicate clusters.
+
+    Args:
+        new_items: (key, signature) pairs in arrival order; a None signature is never a duplicate
+        existing_items: (canonical key, signature) pairs for already stored items
+        threshold: Minimum estimated Jaccard similarity to count as a duplicate
+
+    Returns:
+        Mapping of each duplicate new key to the canonical key it duplicates.
+        Stored items win over new ones, and earlier new items over later ones.
+    """
+    index = LSHIndex()
+    for i, (canonical, signature) in enumerate(existing_items):
+        # Several stored items can share a canonical key, so index them by position
+        index.add(("existing", i, canonical), signature)
+
+    duplicates: Dict[str, str] = {}
+    for key, signature in new_items:
+        if signature is None:
+            continue
+        match, score = index.best_match(signature, threshold)
+        if match is None:
+            index.add(("new", key, key), signature)
+            continue
+        canonical = match[2]
+        duplicates[key] = canonical
+        logger.info(f"Near-duplicate ({score:.2f}): {key} -> {canonical}")
+    return duplicates
@@ -10,6 +10,11 @@ from dotenv import load_dotenv
 import feedparser
 import re
 
+try:
+    from .fetcher import Fetcher
+except ImportError:
+    from fetcher import Fetcher
+
 # Load environment variables
 load_dotenv()
 
@@ -147,17 +152,18 @@ async def fetch_article_content(article_link: str) -> str:
         Article content as text
     """
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(article_link, timeout=10.0)
-            
-            if response.status_code != 200:
-                logger.error(f"Failed to fetch article: {response.status_code}")
+        # Goes through the shared HTTP cache, so unchanged articles aren't re-downloaded
+        async with Fetcher(timeout=10.0, max_retries=0) as fetcher:
+            try:
+                response = await fetcher.fetch(article_link)
+            except httpx.HTTPStatusError as e:
+                logger.error(f"Failed to fetch article: {e.response.status_code}")
                 return ""
             
             # Extract article content
             # This is a simplified approach - production code would need more sophisticated parsing
             from bs4 import BeautifulSoup
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = BeautifulSoup(response.content, 'html.parser')
             
             # Remove script and style elements
             for script in soup(["script", "style"]):
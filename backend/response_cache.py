@@ -0,0 +1,388 @@
+"""
+Response cache for the read-heavy dashboard GET endpoints.
+
+``ResponseCacheMiddleware`` serves the routes configured with a ``CacheRule``
+from a cache of complete responses, keyed by path and query string:
+
+- within ``ttl`` a cached response is served as is
+- for ``stale`` seconds after that it is still served, and one background
+  request recomputes it (stale-while-revalidate)
+- concurrent requests for a response that is being computed wait for that
+  computation instead of starting their own
+- every cached response carries an ETag; a matching If-None-Match gets a 304
+
+Entries are tagged with the data they depend on ("summaries", "reports", ...)
+and writers call ``ResponseCache.invalidate`` with those tags after storing
+new data. Invalidation also bumps a per-tag generation, so a computation
+that was running when its tags were invalidated isn't stored. The cache
+lives in process memory (LRU bounded by RESPONSE_CACHE_MAX_ENTRIES), or in
+Redis when RESPONSE_CACHE_REDIS_URL is set so several workers share it.
+Request coalescing is always per process.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from dotenv import load_dotenv
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # optional; the in-process cache is used instead
+    aioredis = None
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "")
+RESPONSE_CACHE_PREFIX = os.getenv("RESPONSE_CACHE_PREFIX", "response-cache")
+
+# Headers set per response by the middleware rather than stored
+_PER_RESPONSE_HEADERS = {"age", "x-cache"}
+# Headers kept on a 304
+_NOT_MODIFIED_HEADERS = {"etag", "cache-control", "vary", "last-modified"}
+
+
+@dataclass
+class CacheRule:
+    """Caching policy for one route"""
+    ttl: float
+    stale: float = 0.0
+    tags: Sequence[str] = ()
+
+
+@dataclass
+class CachedResponse:
+    status: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+    etag: str
+    stored_at: float
+    ttl: float
+    stale: float
+    tags: List[str] = field(default_factory=list)
+
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    def is_fresh(self) -> bool:
+        return self.age() < self.ttl
+
+    def is_servable(self) -> bool:
+        return self.age() < self.ttl + self.stale
+
+    def dumps(self) -> str:
+        data = asdict(self)
+        data["body"] = base64.b64encode(self.body).decode("ascii")
+        return json.dumps(data)
+
+    @classmethod
+    def loads(cls, text: str) -> "CachedResponse":
+        data = json.loads(text)
+        data["body"] = base64.b64decode(data["body"])
+        data["headers"] = [tuple(header) for header in data["headers"]]
+        return cls(**data)
+
+
+class MemoryBackend:
+    """In-process LRU of cached responses"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._generations: Dict[str, int] = {}
+
+    async def generations(self, tags: Sequence[str]) -> List[int]:
+        return [self._generations.get(tag, 0) for tag in tags]
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CachedResponse) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def invalidate(self, tags: Sequence[str]) -> int:
+        removed = 0
+        for tag in tags:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+            for key in self._tags.pop(tag, set()):
+                if self._entries.pop(key, None) is not None:
+                    removed += 1
+        return removed
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+
+
+class RedisBackend:
+    """Cached responses in Redis, shared by every worker; each tag is a set of keys"""
+
+    def __init__(self, url: str = RESPONSE_CACHE_REDIS_URL, prefix: str = RESPONSE_CACHE_PREFIX):
+        self.redis = aioredis.from_url(url)
+        self.prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:entry:{key}"
+
+    def _tag(self, tag: str) -> str:
+        return f"{self.prefix}:tag:{tag}"
+
+    def _generation(self, tag: str) -> str:
+        return f"{self.prefix}:generation:{tag}"
+
+    async def generations(self, tags: Sequence[str]) -> List[int]:
+        if not tags:
+            return []
+        return [int(value or 0) for value in await self.redis.mget([self._generation(tag) for tag in tags])]
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        text = await self.redis.get(self._key(key))
+        return CachedResponse.loads(text) if text else None
+
+    async def set(self, key: str, entry: CachedResponse) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(self._key(key), entry.dumps(), ex=max(1, int(entry.ttl + entry.stale)))
+            for tag in entry.tags:
+                pipe.sadd(self._tag(tag), self._key(key))
+            await pipe.execute()
+
+    async def invalidate(self, tags: Sequence[str]) -> int:
+        keys: Set[bytes] = set()
+        for tag in tags:
+            await self.redis.incr(self._generation(tag))
+            keys.update(await self.redis.smembers(self._tag(tag)))
+        if tags:
+            await self.redis.delete(*[self._tag(tag) for tag in tags])
+        return await self.redis.delete(*keys) if keys else 0
+
+    async def clear(self) -> None:
+        # Generations are kept so in-flight computations still see them change
+        for pattern in (self._key("*"), self._tag("*")):
+            async for key in self.redis.scan_iter(match=pattern):
+                await self.redis.delete(key)
+
+
+def make_backend() -> Any:
+    if RESPONSE_CACHE_REDIS_URL:
+        if aioredis is not None:
+            logger.info("Response cache stored in Redis")
+            return RedisBackend()
+        logger.warning("RESPONSE_CACHE_REDIS_URL is set but redis isn't installed, caching responses in memory")
+    return MemoryBackend()
+
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match comparison; weak and strong tags compare equal"""
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == bare:
+            return True
+    return False
+
+
+class ResponseCache:
+    """Route rules, the storage backend and the in-flight computations"""
+
+    def __init__(self, rules: Dict[str, CacheRule], backend: Any = None, enabled: bool = RESPONSE_CACHE_ENABLED):
+        self.rules = rules
+        self.backend = backend or make_backend()
+        self.enabled = enabled
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats: Dict[str, int] = {
+            "hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0,
+            "not_modified": 0, "revalidations": 0, "invalidated": 0, "discarded": 0, "backend_errors": 0,
+        }
+
+    def rule_for(self, scope: Dict[str, Any]) -> Optional[CacheRule]:
+        if not self.enabled or scope["type"] != "http" or scope["method"] != "GET":
+            return None
+        return self.rules.get(scope["path"])
+
+    @staticmethod
+    def key_for(scope: Dict[str, Any]) -> str:
+        query = sorted(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True))
+        return f"{scope['path']}?{urlencode(query)}"
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            self.stats["backend_errors"] += 1
+            logger.error(f"Response cache read failed for {key}: {str(e)}")
+            return None
+
+    async def generations(self, tags: Sequence[str]) -> Optional[List[int]]:
+        try:
+            return await self.backend.generations(tags)
+        except Exception as e:
+            self.stats["backend_errors"] += 1
+            logger.error(f"Response cache generation read failed for {list(tags)}: {str(e)}")
+            return None
+
+    async def store(self, key: str, entry: CachedResponse, generations: Optional[List[int]]) -> None:
+        """Store ``entry`` unless its tags were invalidated since ``generations`` was read"""
+        current = await self.generations(entry.tags)
+        if generations is None or current != generations:
+            self.stats["discarded"] += 1
+            logger.info(f"Not caching {key}: its data was invalidated while it was computed")
+            return
+        try:
+            await self.backend.set(key, entry)
+        except Exception as e:
+            self.stats["backend_errors"] += 1
+            logger.error(f"Response cache write failed for {key}: {str(e)}")
+
+    async def invalidate(self, *tags: str) -> int:
+        """Drop every cached response tagged with any of ``tags``"""
+        try:
+            removed = await self.backend.invalidate(tags)
+        except Exception as e:
+            self.stats["backend_errors"] += 1
+            logger.error(f"Response cache invalidation of {tags} failed: {str(e)}")
+            return 0
+        self.stats["invalidated"] += removed
+        if removed:
+            logger.info(f"Invalidated {removed} cached responses tagged {list(tags)}")
+        return removed
+
+    async def clear(self) -> None:
+        """Drop every cached response"""
+        await self.backend.clear()
+        await self.invalidate(*sorted({tag for rule in self.rules.values() for tag in rule.tags}))
+
+    def compute(self, app: Any, scope: Dict[str, Any], key: str, rule: CacheRule) -> "asyncio.Task":
+        """The running computation for ``key``, starting one if there is none"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return task
+        task = asyncio.create_task(self._compute(app, scope, key, rule))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    async def _compute(self, app: Any, scope: Dict[str, Any], key: str, rule: CacheRule) -> CachedResponse:
+        # The route sees a plain GET: conditional headers are answered here
+        headers = [(name, value) for name, value in scope.get("headers", []) if name != b"if-none-match"]
+        scope = dict(scope, headers=headers)
+        start: Dict[str, Any] = {}
+        body: List[bytes] = []
+        generations = await self.generations(rule.tags)
+
+        async def receive() -> Dict[str, Any]:
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+
+        await app(scope, receive, send)
+
+        content = b"".join(body)
+        response_headers = [
+            (name.decode("latin-1"), value.decode("latin-1"))
+            for name, value in start.get("headers", [])
+            if name.decode("latin-1").lower() not in _PER_RESPONSE_HEADERS
+        ]
+        etag = next((value for name, value in response_headers if name.lower() == "etag"), None)
+        if etag is None:
+            etag = make_etag(content)
+            response_headers.append(("etag", etag))
+
+        entry = CachedResponse(
+            status=start.get("status", 500), headers=response_headers, body=content, etag=etag,
+            stored_at=time.time(), ttl=rule.ttl, stale=rule.stale, tags=list(rule.tags),
+        )
+        if entry.status == 200:
+            await self.store(key, entry, generations)
+        return entry
+
+    def revalidate(self, app: Any, scope: Dict[str, Any], key: str, rule: CacheRule) -> None:
+        if key in self._inflight:
+            return
+        self.stats["revalidations"] += 1
+        task = self.compute(app, scope, key, rule)
+
+        def log_failure(task: "asyncio.Task") -> None:
+            if not task.cancelled() and task.exception() is not None:
+                logger.error(f"Background revalidation of {key} failed: {str(task.exception())}")
+
+        task.add_done_callback(log_failure)
+
+
+class ResponseCacheMiddleware:
+    """ASGI middleware serving the routes in ``cache.rules`` through ``cache``"""
+
+    def __init__(self, app: Any, cache: ResponseCache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        rule = self.cache.rule_for(scope)
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = self.cache.key_for(scope)
+        entry = await self.cache.get(key)
+        if entry is not None and entry.is_fresh():
+            self.cache.stats["hits"] += 1
+            state = "hit"
+        elif entry is not None and entry.is_servable():
+            self.cache.stats["stale_hits"] += 1
+            self.cache.revalidate(self.app, scope, key, rule)
+            state = "stale"
+        else:
+            self.cache.stats["misses"] += 1
+            # Shielded so a client disconnecting doesn't cancel the other waiters' computation
+            entry = await asyncio.shield(self.cache.compute(self.app, scope, key, rule))
+            state = "miss"
+
+        await self.respond(scope, send, entry, state)
+
+    async def respond(self, scope: Dict[str, Any], send: Any, entry: CachedResponse, state: str) -> None:
+        extra = [(b"x-cache", state.encode()), (b"age", str(int(entry.age())).encode())]
+        if_none_match = next((value for name, value in scope.get("headers", []) if name == b"if-none-match"), None)
+
+        if entry.status == 200 and if_none_match is not None and etag_matches(if_none_match.decode("latin-1"), entry.etag):
+            self.cache.stats["not_modified"] += 1
+            headers = [
+                (name.encode("latin-1"), value.encode("latin-1"))
+                for name, value in entry.headers if name.lower() in _NOT_MODIFIED_HEADERS
+            ]
+            await send({"type": "http.response.start", "status": 304, "headers": headers + extra})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in entry.headers]
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers + extra})
+        await send({"type": "http.response.body", "body": entry.body})
@@ -0,0 +1,333 @@
+"""
+Structured LLM output validated against Pydantic models.
+
+``generate_structured`` replaces the per-endpoint "find the fenced JSON, call
+json.loads, patch missing keys" code:
+
+- The model's JSON schema is appended to the system prompt, so the model is
+  asked for exactly the document the endpoint returns.
+- The response is streamed through ``IncrementalJSONParser``. It makes a
+  single pass over the tokens, skips any prose or code fences around the
+  JSON value, and escapes raw newlines and tabs inside strings. No regex
+  repair loops are run over the whole text.
+- The result is validated with the Pydantic model. If some fields are
+  missing or invalid, only those fields are requested again and merged in,
+  instead of regenerating the whole document.
+"""
+import json
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Type, TypeVar, Union
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from pydantic import BaseModel, ValidationError
+
+try:
+    from .llm_executor import llm_executor
+except ImportError:
+    from llm_executor import llm_executor
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Raw control characters a model sometimes leaves inside JSON strings
+_STRING_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+# Characters JSON escape sequences stand for
+_ESCAPED_CHARS = {"n": "\n", "r": "\r", "t": "\t", "b": "\b", "f": "\f"}
+# Characters that can open the value for each ``expect`` setting
+_OPENERS = {None: "{[", "object": "{", "array": "["}
+
+
+class StructuredOutputError(ValueError):
+    """The model's response couldn't be turned into a valid document"""
+
+
+class IncrementalJSONParser:
+    """
+    Extract the first complete JSON object or array from streamed text.
+
+    Call ``feed`` with each chunk as it arrives; ``done`` turns true once the
+    top-level value closes, and ``value`` holds the parsed result. Runs in
+    time linear in the input, whatever the chunk boundaries.
+
+    With ``expect="object"`` (or ``"array"``) only that kind of value is
+    extracted, so a bracket in leading prose such as "see [1]" is skipped.
+
+    If ``on_field_text`` is given and the value is an object, it is called
+    with ``(key, text)`` as the decoded text of each top-level string field
+    arrives, so callers can show a field before the document is complete.
+    """
+
+    def __init__(self, on_field_text: Optional[Callable[[str, str], Any]] = None, expect: Optional[str] = None):
+        self._openers = _OPENERS[expect]
+        self._chars: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.done = False
+        self.value: Any = None
+
+        # Top-level field tracking for on_field_text
+        self.on_field_text = on_field_text
+        self._is_object = False
+        self._expect_key = False
+        self._string_role: Optional[str] = None  # "key" or "value" for top-level strings
+        self._key = ""
+        self._key_chars: List[str] = []
+        self._unicode: Optional[str] = None
+        self._pending: List[str] = []
+
+    @property
+    def started(self) -> bool:
+        return self._depth > 0 or self.done
+
+    def feed(self, text: Iterable[str]) -> bool:
+        """Consume a chunk; returns True once the value is complete"""
+        for ch in text:
+            if self.done:
+                break
+            if not self.started:
+                # Skip anything before the value, such as prose or a ``` fence
+                if ch in self._openers:
+                    self._depth = 1
+                    self._is_object = self._expect_key = ch == "{"
+                    self._chars.append(ch)
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    self._string_char(ch, escaped=True)
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._end_string()
+                else:
+                    self._string_char(ch, escaped=False)
+                    ch = _STRING_ESCAPES.get(ch, ch)
+            elif ch == '"':
+                self._in_string = True
+                self._start_string()
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+            elif ch == "," and self._depth == 1:
+                self._expect_key = self._is_object
+            self._chars.append(ch)
+
+            if self._depth == 0:
+                self._finish()
+        self._flush()
+        return self.done
+
+    def _start_string(self) -> None:
+        self._string_role = None
+        if self.on_field_text is None or not self._is_object or self._depth != 1:
+            return
+        if self._expect_key:
+            self._string_role = "key"
+            self._key_chars = []
+        else:
+            self._string_role = "value"
+
+    def _end_string(self) -> None:
+        if self._string_role == "key":
+            self._flush()
+            self._key = "".join(self._key_chars)
+            self._expect_key = False
+        self._string_role = None
+
+    def _string_char(self, ch: str, escaped: bool) -> None:
+        if self._string_role is None:
+            return
+        if self._unicode is not None:
+            self._unicode += ch
+            if len(self._unicode) < 4:
+                return
+            try:
+                ch = chr(int(self._unicode, 16))
+            except ValueError:
+                ch = ""
+            self._unicode = None
+        elif escaped:
+            if ch == "u":
+                self._unicode = ""
+                return
+            ch = _ESCAPED_CHARS.get(ch, ch)
+
+        if self._string_role == "key":
+            self._key_chars.append(ch)
+        else:
+            self._pending.append(ch)
+
+    def _flush(self) -> None:
+        if self._pending:
+            text, self._pending = "".join(self._pending), []
+            self.on_field_text(self._key, text)
+
+    def _finish(self) -> None:
+        self._flush()
+        text = "".join(self._chars)
+        try:
+            self.value = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise StructuredOutputError(f"Invalid JSON from model: {str(e)}") from e
+        self.done = True
+
+    def result(self) -> Any:
+        if not self.done:
+            raise StructuredOutputError("Response ended before the JSON value was complete")
+        return self.value
+
+
+def parse_json(text: str, expect: Optional[str] = None) -> Any:
+    """
+    Parse the first JSON value (of the ``expect`` kind, if given) in a
+    complete response.
+
+    If a value closes but isn't valid JSON, parsing resumes after it, so a
+    later value (e.g. a corrected one) can still be found. Brackets nested
+    inside the invalid value are never parsed on their own, and a value that
+    never closes raises.
+    """
+    # Parsers share one iterator, so each resumes where the last one stopped
+    chars = iter(text)
+    error = StructuredOutputError("No JSON value in response")
+    while True:
+        parser = IncrementalJSONParser(expect=expect)
+        try:
+            parser.feed(chars)
+        except StructuredOutputError as e:
+            error = e
+            continue
+        if parser.started:
+            return parser.result()
+        raise error
+
+
+def has_keys(value: Any, keys: Iterable[str]) -> bool:
+    """Whether a parsed response is an object holding every one of ``keys``"""
+    return isinstance(value, dict) and all(key in value for key in keys)
+
+
+def schema_instructions(model: Type[BaseModel], fields: Optional[Set[str]] = None) -> str:
+    """Prompt text asking for a JSON document matching the model's schema (optionally a subset of fields)"""
+    schema = model.model_json_schema(by_alias=True)
+    if fields is not None:
+        schema = dict(schema)
+        schema["properties"] = {name: spec for name, spec in schema.get("properties", {}).items() if name in fields}
+        schema["required"] = [name for name in schema.get("required", []) if name in fields]
+    return (
+        "Respond with a single JSON object that conforms to this JSON Schema, with no text before or after it:\n"
+        f"{json.dumps(schema)}"
+    )
+
+
+def _with_instructions(messages: Sequence[Any], instructions: str) -> List[Any]:
+    messages = list(messages)
+    if messages and getattr(messages[0], "type", None) == "system":
+        return [SystemMessage(content=f"{messages[0].content}\n\n{instructions}")] + messages[1:]
+    return [SystemMessage(content=instructions)] + messages
+
+
+async def _stream_json(
+    llm: Any,
+    messages: Sequence[Any],
+    cache: Union[bool, str] = True,
+    on_field_text: Optional[Callable[[str, str], Any]] = None,
+    required: Sequence[str] = (),
+    **kwargs
+) -> Any:
+    parser = IncrementalJSONParser(on_field_text, expect="object")
+    chunks: List[str] = []
+    failed = False
+    # Only responses holding a complete JSON object with the required keys are cached
+    async for chunk in llm_executor.astream(
+        llm, messages, cache=cache, validate=lambda text: has_keys(parse_json(text, expect="object"), required), **kwargs
+    ):
+        chunks.append(chunk)
+        if not failed and not parser.done:
+            try:
+                parser.feed(chunk)
+            except StructuredOutputError:
+                failed = True
+    if parser.done:
+        return parser.value
+    # The first object didn't parse; look for a later top-level one
+    return parse_json("".join(chunks), expect="object")
+
+
+def _failing_fields(error: ValidationError) -> Set[str]:
+    return {str(err["loc"][0]) for err in error.errors() if err.get("loc")}
+
+
+async def generate_structured(
+    llm: Any,
+    messages: Sequence[Any],
+    model: Type[ModelT],
+    field_retries: int = 2,
+    overrides: Optional[Dict[str, Any]] = None,
+    on_field_text: Optional[Callable[[str, str], Any]] = None,
+    on_reset: Optional[Callable[[], Any]] = None,
+    **kwargs
+) -> ModelT:
+    """
+    Ask the model for a document matching ``model`` and validate it.
+
+    Args:
+        llm: Chat model, called through the shared LLM executor
+        messages: Prompt messages; the schema is appended to the system message
+        model: Pydantic model the response must validate against
+        field_retries: How many times to re-request just the fields that failed validation
+        overrides: Values known up front (e.g. IDs) that replace whatever the model returns
+        on_field_text: Called with (field, text) as top-level string fields stream in.
+            The validated result is authoritative.
+        on_reset: Called before a regenerated response streams in, so text
+            already passed to on_field_text can be discarded
+        **kwargs: Passed to the model call, e.g. max_tokens
+
+    Raises:
+        StructuredOutputError if no valid document could be produced
+    """
+    prompt = _with_instructions(messages, schema_instructions(model))
+    # Keys supplied by overrides don't have to come back from the model
+    required = [key for key in model.model_json_schema(by_alias=True).get("required", []) if key not in (overrides or {})]
+    try:
+        document = await _stream_json(llm, prompt, on_field_text=on_field_text, required=required, **kwargs)
+    except StructuredOutputError as e:
+        # Nothing usable came back (e.g. a truncated stream); regenerate once,
+        # replacing the cached response
+        logger.warning(f"Regenerating {model.__name__} after unparseable response: {str(e)}")
+        if on_reset is not None:
+            on_reset()
+        document = await _stream_json(llm, prompt, cache="refresh", on_field_text=on_field_text, required=required, **kwargs)
+
+    if not isinstance(document, dict):
+        raise StructuredOutputError(f"Expected a JSON object for {model.__name__}, got {type(document).__name__}")
+
+    for attempt in range(field_retries + 1):
+        document.update(overrides or {})
+        try:
+            return model.model_validate(document)
+        except ValidationError as e:
+            fields = _failing_fields(e)
+            if attempt == field_retries or not fields:
+                raise StructuredOutputError(f"{model.__name__} failed validation: {str(e)}") from e
+
+            logger.info(f"Re-requesting fields {sorted(fields)} of {model.__name__}")
+            repair_prompt = list(prompt) + [HumanMessage(content=(
+                f"These fields of your previous answer were missing or invalid: {', '.join(sorted(fields))}.\n"
+                f"Validation errors: {json.dumps(e.errors(include_url=False), default=str)}\n"
+                f"Previous answer: {json.dumps({k: v for k, v in document.items() if k in fields}, default=str)}\n\n"
+                f"{schema_instructions(model, fields)}"
+            ))]
+            try:
+                patch = await _stream_json(llm, repair_prompt, cache=False, **kwargs)
+            except StructuredOutputError as parse_error:
+                raise StructuredOutputError(f"Field retry for {model.__name__} failed: {str(parse_error)}") from parse_error
+            if isinstance(patch, dict):
+                document.update({k: v for k, v in patch.items() if k in fields})
+
+    raise StructuredOutputError(f"{model.__name__} failed validation")
@@ -0,0 +1,172 @@
+"""
+Daily rollups of structured-summary counts for the trend endpoints.
+
+One ``daily_rollups`` document per publication day (``_id`` is YYYY-MM-DD)
+holds that day's counts:
+- summaries: number of structured summaries
+- domains: summaries per insurance domain
+- regulatory: summaries per domain that report a regulatory impact
+- risk_factors: [factor, count] pairs (factors are free text, so they aren't
+  used as field names)
+
+Any window is answered by summing the few hundred bytes of each day in it,
+rather than unwinding raw summaries. A refresh rebuilds only the days of
+summaries written since the last run; ``full=True`` rebuilds every day, which
+also picks up deletions.
+"""
+import logging
+import re
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from pymongo import ReplaceOne
+
+try:
+    from .bulk_writes import bulk_write_chunked
+except ImportError:
+    from bulk_writes import bulk_write_chunked
+
+logger = logging.getLogger(__name__)
+
+STATE_ID = "daily_rollups"
+DOMAINS = ["property", "casualty", "life", "health", "reinsurance"]
+
+_DAY_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}")
+# regulatory_impact values that mean "none reported"
+_NO_IMPACT = {"", "unknown", "none", "n/a", "not mentioned", "not specified"}
+
+SUMMARY_PROJECTION = {"date": 1, "insurance_domains": 1, "risk_factors": 1, "regulatory_impact": 1}
+
+
+def day_key(value: Any) -> Optional[str]:
+    """YYYY-MM-DD of a summary date, or None if it isn't a recognizable date"""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, str) and _DAY_PATTERN.match(value):
+        return value[:10]
+    return None
+
+
+def has_regulatory_impact(value: Any) -> bool:
+    return isinstance(value, str) and value.strip().lower() not in _NO_IMPACT
+
+
+def empty_day(day: str) -> Dict[str, Any]:
+    return {"_id": day, "summaries": 0, "domains": Counter(), "regulatory": Counter(), "risk_factors": Counter()}
+
+
+def add_summary(bucket: Dict[str, Any], summary: Dict[str, Any]) -> None:
+    bucket["summaries"] += 1
+    domains = summary.get("insurance_domains")
+    domains = {domain for domain in domains if domain in DOMAINS} if isinstance(domains, list) else set()
+    bucket["domains"].update(domains)
+    if has_regulatory_impact(summary.get("regulatory_impact")):
+        bucket["regulatory"].update(domains)
+    factors = summary.get("risk_factors")
+    if isinstance(factors, list):
+        bucket["risk_factors"].update(str(factor) for factor in factors if factor)
+
+
+def bucket_document(bucket: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "_id": bucket["_id"],
+        "day": datetime.strptime(bucket["_id"], "%Y-%m-%d"),
+        "summaries": bucket["summaries"],
+        "domains": dict(bucket["domains"]),
+        "regulatory": dict(bucket["regulatory"]),
+        "risk_factors": [[factor, count] for factor, count in bucket["risk_factors"].most_common()],
+        "updated_at": datetime.now(),
+    }
+
+
+async def rebuild_days(db: Any, days: Optional[Set[str]] = None) -> int:
+    """Recount the given days (every day when None) from structured_summaries; returns days written"""
+    query: Dict[str, Any] = {}
+    if days:
+        # One range scan covering the dirty days; other days in it are skipped
+        query["date"] = {"$gte": min(days), "$lt": max(days) + "\uffff"}
+
+    buckets: Dict[str, Dict[str, Any]] = {day: empty_day(day) for day in (days or ())}
+    async for summary in db.structured_summaries.find(query, SUMMARY_PROJECTION):
+        day = day_key(summary.get("date"))
+        if day is None or (days and day not in days):
+            continue
+        add_summary(buckets.setdefault(day, empty_day(day)), summary)
+
+    operations = [ReplaceOne({"_id": day}, bucket_document(bucket), upsert=True) for day, bucket in buckets.items()]
+    await bulk_write_chunked(db.daily_rollups, operations)
+    if days is None:
+        # Days that no longer have any summaries
+        await db.daily_rollups.delete_many({"_id": {"$nin": list(buckets)}})
+    return len(operations)
+
+
+async def refresh_rollups(db: Any, full: bool = False) -> Dict[str, Any]:
+    """Bring daily_rollups up to date with summaries written since the last refresh"""
+    started = datetime.now()
+    state = await db.rollup_state.find_one({"_id": STATE_ID})
+
+    if full or state is None:
+        days_written = await rebuild_days(db)
+    else:
+        dirty = {
+            day for day in (
+                day_key(value)
+                for value in await db.structured_summaries.distinct("date", {"created_at": {"$gte": state["last_run"]}})
+            )
+            if day
+        }
+        days_written = await rebuild_days(db, dirty) if dirty else 0
+
+    await db.rollup_state.update_one({"_id": STATE_ID}, {"$set": {"last_run": started}}, upsert=True)
+    stats = {"full": full or state is None, "days_written": days_written, "seconds": round((datetime.now() - started).total_seconds(), 2)}
+    logger.info(f"Refreshed daily rollups: {stats}")
+    return stats
+
+
+async def window_totals(db: Any, start: str, end: Optional[str] = None) -> Dict[str, Any]:
+    """Summed counts for days in [start, end) (open-ended when end is None)"""
+    day_range: Dict[str, str] = {"$gte": start}
+    if end:
+        day_range["$lt"] = end
+    totals: Dict[str, Any] = {"days": 0, "summaries": 0, "domains": Counter(), "regulatory": Counter(), "risk_factors": Counter()}
+    async for bucket in db.daily_rollups.find({"_id": day_range}):
+        totals["days"] += 1
+        totals["summaries"] += bucket.get("summaries", 0)
+        totals["domains"].update(bucket.get("domains", {}))
+        totals["regulatory"].update(bucket.get("regulatory", {}))
+        totals["risk_factors"].update({factor: count for factor, count in bucket.get("risk_factors", [])})
+    return totals
+
+
+def month_keys(months: int, now: Optional[datetime] = None) -> List[str]:
+    """The last ``months`` calendar months, oldest first, as YYYY-MM"""
+    now = now or datetime.now()
+    year, month = now.year, now.month
+    keys = []
+    for _ in range(months):
+        keys.append(f"{year:04d}-{month:02d}")
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+    return list(reversed(keys))
+
+
+async def monthly_totals(db: Any, field: str, months: Iterable[str]) -> Dict[str, Counter]:
+    """Per-month sums of one per-domain rollup field ("domains" or "regulatory")"""
+    months = list(months)
+    totals = {month: Counter() for month in months}
+    if not months:
+        return totals
+    cursor = db.daily_rollups.find(
+        {"_id": {"$gte": f"{months[0]}-01", "$lt": f"{months[-1]}-32"}},
+        {field: 1}
+    )
+    async for bucket in cursor:
+        month = bucket["_id"][:7]
+        if month in totals:
+            totals[month].update(bucket.get(field, {}))
+    return totals
+
+
+def days_ago(days: int, now: Optional[datetime] = None) -> str:
+    return ((now or datetime.now()) - timedelta(days=days)).strftime("%Y-%m-%d")
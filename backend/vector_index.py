@@ -0,0 +1,629 @@
+"""
+Memory-resident FAISS index manager.
+
+Keeps each on-disk FAISS index loaded in memory and hands out immutable
+snapshots to searches, so the request path never touches the disk. Writers
+publish a new version (saved to disk and swapped in atomically); a periodic
+refresh picks up versions written by other processes.
+
+Indexes are updated incrementally: new or changed documents are embedded
+into small delta segments (``segments/NNNNNN``) that are merged in at load
+time, and a ``manifest.json`` maps each document key to its live docstore id
+and content hash. Vectors whose id is no longer live are tombstones; they are
+masked out of searches until a background compaction rewrites the base index.
+
+Indexes can also carry compact per-vector filter columns (relevance, date
+ordinal, domain bitmask) so filtered searches are applied during the search
+instead of after taking the top k.
+"""
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain.vectorstores import FAISS
+from langchain.schema import Document
+from langchain.docstore.in_memory import InMemoryDocstore
+
+try:
+    from .embeddings import get_embedding_service
+    from .embedding_cache import text_hash
+except ImportError:
+    from embeddings import get_embedding_service
+    from embedding_cache import text_hash
+
+logger = logging.getLogger(__name__)
+
+ARTICLES_INDEX = "articles_index"
+SUMMARIES_INDEX = "summaries_index"
+# Summaries are indexed before they have a Mongo id; the article URL is the
+# same key the structured_summaries upsert uses
+SUMMARIES_KEY_FIELD = "article_url"
+
+# Marker written next to index.faiss/index.pkl every time an index is published
+VERSION_FILE = "VERSION"
+MANIFEST_FILE = "manifest.json"
+SEGMENTS_DIR = "segments"
+
+# Compact once this share of vectors is dead or there are too many segments
+COMPACT_TOMBSTONE_RATIO = float(os.getenv("INDEX_COMPACT_TOMBSTONE_RATIO", "0.2"))
+COMPACT_MAX_SEGMENTS = int(os.getenv("INDEX_COMPACT_MAX_SEGMENTS", "20"))
+
+# Extra headroom when sizing the first over-fetch from the filter selectivity
+FILTER_OVERFETCH_FACTOR = float(os.getenv("VECTOR_FILTER_OVERFETCH_FACTOR", "1.5"))
+
+# Sentinel for dates that couldn't be parsed (always passes the prefilter)
+UNKNOWN_DATE = -1
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """A loaded index version. Never mutated after it has been published."""
+    name: str
+    store: FAISS
+    version: str
+    loaded_at: float
+    # Manifest the version was loaded with; None for indexes written before
+    # incremental updates, in which case every vector is live
+    manifest: Optional[Dict[str, Any]] = None
+    live_ids: Optional[frozenset] = None
+
+    @property
+    def tombstones(self) -> int:
+        if self.live_ids is None:
+            return 0
+        return self.store.index.ntotal - len(self.live_ids)
+
+
+def document_key(document: Document, key_field: str) -> str:
+    """Stable key of an indexed document, falling back to its content hash"""
+    key = str(document.metadata.get(key_field) or "")
+    return key or f"hash:{text_hash(document.page_content)}"
+
+
+def manifest_from_store(store: FAISS, key_field: str) -> Dict[str, Any]:
+    """
+    Build a manifest for an index that doesn't have one yet.
+
+    When the same key was indexed several times (as the old nightly update
+    did), the most recently added vector wins and the others become tombstones.
+    """
+    documents = {}
+    for position in sorted(store.index_to_docstore_id):
+        docstore_id = store.index_to_docstore_id[position]
+        document = store.docstore.search(docstore_id)
+        if not isinstance(document, Document):
+            continue
+        documents[document_key(document, key_field)] = {
+            "id": docstore_id,
+            "hash": text_hash(document.page_content),
+        }
+    return {"key_field": key_field, "segments": [], "next_segment": 1, "documents": documents}
+
+
+def clone_store(store: FAISS) -> FAISS:
+    """Copy a FAISS store so it can be extended without touching the original"""
+    import faiss
+    return FAISS(
+        embedding_function=store.embedding_function,
+        index=faiss.clone_index(store.index),
+        docstore=InMemoryDocstore(dict(store.docstore._dict)),
+        index_to_docstore_id=dict(store.index_to_docstore_id),
+        normalize_L2=store._normalize_L2,
+        distance_strategy=store.distance_strategy,
+    )
+
+
+def date_ordinal(value: Any) -> int:
+    """Convert an ISO-like date string to a day ordinal, or UNKNOWN_DATE"""
+    try:
+        return date.fromisoformat(str(value)[:10]).toordinal()
+    except (TypeError, ValueError):
+        return UNKNOWN_DATE
+
+
+@dataclass(frozen=True)
+class FilterColumns:
+    """
+    Per-vector filter metadata aligned with FAISS positions of one index version.
+
+    Unknown values (NaN relevance, UNKNOWN_DATE, zero domain mask) pass the
+    prefilter; callers re-check exact filters on the hydrated documents.
+    """
+    version: str
+    live: np.ndarray           # bool, False for tombstoned vectors
+    relevance: np.ndarray      # float32
+    date_ordinal: np.ndarray   # int32
+    domain_mask: np.ndarray    # uint64
+    domain_bits: Dict[str, int]
+
+    def mask(
+        self,
+        min_relevance: Optional[float] = None,
+        domains: Optional[List[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> np.ndarray:
+        """Boolean allow-list over FAISS positions for the given filters"""
+        allowed = self.live.copy()
+
+        if min_relevance:
+            allowed &= np.isnan(self.relevance) | (self.relevance >= min_relevance)
+
+        if domains:
+            # Domains never seen in the columns can only match unknown rows
+            wanted = np.uint64(0)
+            for domain in domains:
+                if domain in self.domain_bits:
+                    wanted |= np.uint64(1) << np.uint64(self.domain_bits[domain])
+            allowed &= (self.domain_mask == 0) | ((self.domain_mask & wanted) != 0)
+
+        known_date = self.date_ordinal != UNKNOWN_DATE
+        if start_date:
+            start = date_ordinal(start_date)
+            if start != UNKNOWN_DATE:
+                allowed &= ~known_date | (self.date_ordinal >= start)
+        if end_date:
+            end = date_ordinal(end_date)
+            if end != UNKNOWN_DATE:
+                allowed &= ~known_date | (self.date_ordinal <= end)
+
+        return allowed
+
+
+def build_filter_columns(
+    snapshot: IndexSnapshot,
+    records: Optional[Dict[str, Dict[str, Any]]] = None,
+    key_field: str = "id",
+) -> FilterColumns:
+    """
+    Build filter columns for a snapshot.
+
+    ``records`` maps the document key (``metadata[key_field]``) to fresh
+    ``total_relevance``/``date``/``domains`` values from the database; documents
+    without a record fall back to the values stored in their metadata.
+    """
+    store = snapshot.store
+    records = records or {}
+    ntotal = store.index.ntotal
+
+    live = np.ones(ntotal, dtype=bool)
+    relevance = np.full(ntotal, np.nan, dtype=np.float32)
+    ordinals = np.full(ntotal, UNKNOWN_DATE, dtype=np.int32)
+    domain_mask = np.zeros(ntotal, dtype=np.uint64)
+    domain_bits: Dict[str, int] = {}
+
+    for position, docstore_id in store.index_to_docstore_id.items():
+        if position >= ntotal:
+            continue
+        if snapshot.live_ids is not None and docstore_id not in snapshot.live_ids:
+            live[position] = False
+            continue
+        document = store.docstore.search(docstore_id)
+        metadata = document.metadata if isinstance(document, Document) else {}
+        record = records.get(str(metadata.get(key_field, "")), {})
+
+        value = record.get("total_relevance", metadata.get("total_relevance"))
+        if isinstance(value, (int, float)):
+            relevance[position] = value
+        ordinals[position] = date_ordinal(record.get("date", metadata.get("date")))
+
+        bits = 0
+        for domain in record.get("domains") or []:
+            if domain not in domain_bits:
+                if len(domain_bits) >= 64:
+                    # Out of bits: leave the row unknown so it still passes
+                    bits = 0
+                    break
+                domain_bits[domain] = len(domain_bits)
+            bits |= 1 << domain_bits[domain]
+        domain_mask[position] = bits
+
+    return FilterColumns(
+        version=snapshot.version,
+        live=live,
+        relevance=relevance,
+        date_ordinal=ordinals,
+        domain_mask=domain_mask,
+        domain_bits=domain_bits,
+    )
+
+
+class IndexManager:
+    """
+    Registry of resident FAISS indexes keyed by their directory path.
+
+    ``get`` is lock-free and performs no I/O; swapping a snapshot is a single
+    reference assignment, so in-flight searches keep using the version they
+    started with.
+    """
+
+    def __init__(self):
+        self._snapshots: Dict[str, IndexSnapshot] = {}
+        self._filter_columns: Dict[str, FilterColumns] = {}
+        self._filter_records: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+
+    def _load_lock(self, name: str) -> threading.Lock:
+        with self._registry_lock:
+            if name not in self._load_locks:
+                self._load_locks[name] = threading.Lock()
+            return self._load_locks[name]
+
+    def get(self, name: str) -> Optional[IndexSnapshot]:
+        """Return the current snapshot for an index, or None if it isn't loaded"""
+        return self._snapshots.get(name)
+
+    def disk_version(self, name: str) -> Optional[str]:
+        """
+        Return the version stamp of the index on disk.
+
+        Uses the VERSION file when present and falls back to the modification
+        times of the FAISS files for indexes written before versioning.
+        """
+        if not os.path.exists(os.path.join(name, "index.faiss")):
+            return None
+
+        version_path = os.path.join(name, VERSION_FILE)
+        if os.path.exists(version_path):
+            with open(version_path) as f:
+                return f.read().strip()
+
+        mtimes = [
+            os.path.getmtime(os.path.join(name, filename))
+            for filename in ("index.faiss", "index.pkl")
+            if os.path.exists(os.path.join(name, filename))
+        ]
+        return f"mtime-{max(mtimes):.6f}"
+
+    def _read_manifest(self, name: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(name, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_manifest(self, name: str, manifest: Dict[str, Any]) -> None:
+        # Write-then-rename so readers never see a partial manifest
+        path = os.path.join(name, MANIFEST_FILE)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(manifest, f)
+        os.replace(f"{path}.tmp", path)
+
+    def _write_version(self, name: str) -> str:
+        version = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+        with open(os.path.join(name, VERSION_FILE), "w") as f:
+            f.write(version)
+        return version
+
+    def _load_from_disk(self, name: str):
+        """Load the base index plus its delta segments"""
+        store = FAISS.load_local(name, get_embedding_service(), allow_dangerous_deserialization=True)
+        manifest = self._read_manifest(name)
+        for segment in (manifest or {}).get("segments", []):
+            segment_store = FAISS.load_local(
+                os.path.join(name, SEGMENTS_DIR, segment),
+                get_embedding_service(),
+                allow_dangerous_deserialization=True
+            )
+            store.merge_from(segment_store)
+        return store, manifest
+
+    def _reload_locked(self, name: str) -> bool:
+        version = self.disk_version(name)
+        if version is None:
+            return False
+
+        current = self._snapshots.get(name)
+        if current and current.version == version:
+            return False
+
+        start = time.perf_counter()
+        store, manifest = self._load_from_disk(name)
+        snapshot = self._swap(name, store, version, manifest)
+        logger.info(
+            f"Loaded index {name} version {version} ({store.index.ntotal} vectors, "
+            f"{snapshot.tombstones} tombstones) in {time.perf_counter() - start:.2f}s"
+        )
+        return True
+
+    def reload_if_changed(self, name: str) -> bool:
+        """
+        Load the on-disk index if its version differs from the resident one.
+
+        Returns True when a new snapshot was swapped in. Raises if the index on
+        disk can't be loaded; the resident snapshot is left untouched.
+        """
+        with self._load_lock(name):
+            return self._reload_locked(name)
+
+    def refresh_all(self) -> List[str]:
+        """Pick up new on-disk versions of every known index; returns the names that were reloaded"""
+        reloaded = []
+        for name in dict.fromkeys((ARTICLES_INDEX, SUMMARIES_INDEX, *self._snapshots.keys())):
+            try:
+                if self.reload_if_changed(name):
+                    reloaded.append(name)
+            except Exception as e:
+                logger.error(f"Error reloading index {name}: {str(e)}")
+        return reloaded
+
+    def publish(self, name: str, store: FAISS, key_field: str = "id") -> IndexSnapshot:
+        """
+        Persist a freshly built index and make it the resident version.
+
+        Replaces any delta segments. The caller hands over ownership of
+        ``store``: it must not be modified after publishing since concurrent
+        searches may be reading it.
+        """
+        with self._load_lock(name):
+            store.save_local(name)
+            shutil.rmtree(os.path.join(name, SEGMENTS_DIR), ignore_errors=True)
+            manifest = manifest_from_store(store, key_field)
+            self._write_manifest(name, manifest)
+            version = self._write_version(name)
+            snapshot = self._swap(name, store, version, manifest)
+        logger.info(f"Published index {name} version {version} ({store.index.ntotal} vectors)")
+        return snapshot
+
+    def _current_for_write(self, name: str, key_field: str):
+        """Latest snapshot plus a private copy of its manifest (caller holds the lock)"""
+        self._reload_locked(name)
+        current = self._snapshots.get(name)
+        if current is None:
+            raise FileNotFoundError(f"FAISS index {name} does not exist")
+
+        manifest = current.manifest
+        if manifest is None or manifest.get("key_field", key_field) != key_field:
+            # Re-keying keeps the latest vector per key and tombstones the rest
+            manifest = manifest_from_store(current.store, key_field)
+        manifest = dict(manifest, segments=list(manifest["segments"]), documents=dict(manifest["documents"]))
+        return current, manifest
+
+    def upsert(self, name: str, documents: List[Document], key_field: str = "id") -> Dict[str, int]:
+        """
+        Add new documents and replace changed ones without rewriting the index.
+
+        Documents whose key is already indexed with the same content hash are
+        skipped. Only the new vectors are embedded and written, as a delta
+        segment; replaced vectors become tombstones.
+        """
+        counts = {"added": 0, "updated": 0, "unchanged": 0}
+
+        # Last occurrence of a key in the batch wins
+        batch = {document_key(document, key_field): document for document in documents}
+
+        with self._load_lock(name):
+            current, manifest = self._current_for_write(name, key_field)
+
+            new_docs, new_ids = [], []
+            for key, document in batch.items():
+                content_hash = text_hash(document.page_content)
+                existing = manifest["documents"].get(key)
+                if existing and existing["hash"] == content_hash:
+                    counts["unchanged"] += 1
+                    continue
+
+                counts["updated" if existing else "added"] += 1
+                docstore_id = f"{key}:{uuid.uuid4().hex[:12]}"
+                manifest["documents"][key] = {"id": docstore_id, "hash": content_hash}
+                new_docs.append(document)
+                new_ids.append(docstore_id)
+
+            if not new_docs:
+                return counts
+
+            segment_store = FAISS.from_documents(new_docs, get_embedding_service(), ids=new_ids)
+            sequence = manifest.get("next_segment", 1)
+            segment = f"{sequence:06d}"
+            # The segment is written before the manifest references it, so a
+            # crash in between only leaves an unused directory behind
+            segment_store.save_local(os.path.join(name, SEGMENTS_DIR, segment))
+            manifest["segments"].append(segment)
+            manifest["next_segment"] = sequence + 1
+            self._write_manifest(name, manifest)
+            version = self._write_version(name)
+
+            store = clone_store(current.store)
+            store.merge_from(segment_store)
+            snapshot = self._swap(name, store, version, manifest)
+
+        logger.info(
+            f"Updated index {name} with segment {segment}: {counts} "
+            f"({snapshot.tombstones} tombstones, {len(manifest['segments'])} segments)"
+        )
+        return counts
+
+    def delete(self, name: str, keys: List[str], key_field: str = "id") -> int:
+        """Tombstone documents by key; returns how many were live"""
+        with self._load_lock(name):
+            current, manifest = self._current_for_write(name, key_field)
+            removed = sum(1 for key in keys if manifest["documents"].pop(str(key), None))
+            if not removed:
+                return 0
+            self._write_manifest(name, manifest)
+            version = self._write_version(name)
+            self._swap(name, current.store, version, manifest)
+        logger.info(f"Tombstoned {removed} documents in index {name}")
+        return removed
+
+    def needs_compaction(self, name: str) -> bool:
+        snapshot = self._snapshots.get(name)
+        if snapshot is None or snapshot.manifest is None:
+            return False
+        ntotal = snapshot.store.index.ntotal
+        return (
+            len(snapshot.manifest.get("segments", [])) > COMPACT_MAX_SEGMENTS
+            or (ntotal > 0 and snapshot.tombstones / ntotal > COMPACT_TOMBSTONE_RATIO)
+        )
+
+    def compact(self, name: str, key_field: str = "id") -> bool:
+        """
+        Rewrite the index as a single base containing only live vectors.
+
+        Vectors are reconstructed from the resident index, so nothing is
+        re-embedded. The new directory is built alongside and swapped in.
+        """
+        with self._load_lock(name):
+            current, manifest = self._current_for_write(name, key_field)
+            store = current.store
+            live_ids = {entry["id"] for entry in manifest["documents"].values()}
+
+            positions = [
+                position for position in sorted(store.index_to_docstore_id)
+                if store.index_to_docstore_id[position] in live_ids
+            ]
+            if not positions:
+                logger.warning(f"Index {name} has no live documents, skipping compaction")
+                return False
+
+            start = time.perf_counter()
+            vectors = store.index.reconstruct_n(0, store.index.ntotal)
+            documents = [store.docstore.search(store.index_to_docstore_id[p]) for p in positions]
+            compacted = FAISS.from_embeddings(
+                [(document.page_content, vectors[p]) for document, p in zip(documents, positions)],
+                get_embedding_service(),
+                metadatas=[document.metadata for document in documents],
+                ids=[store.index_to_docstore_id[p] for p in positions],
+                normalize_L2=store._normalize_L2,
+                distance_strategy=store.distance_strategy,
+            )
+
+            manifest = dict(manifest, segments=[], next_segment=1)
+            staging, retired = f"{name}.compacting", f"{name}.retired"
+            shutil.rmtree(staging, ignore_errors=True)
+            compacted.save_local(staging)
+            self._write_manifest(staging, manifest)
+            version = self._write_version(staging)
+
+            shutil.rmtree(retired, ignore_errors=True)
+            os.rename(name, retired)
+            os.rename(staging, name)
+            shutil.rmtree(retired, ignore_errors=True)
+
+            self._swap(name, compacted, version, manifest)
+
+        logger.info(
+            f"Compacted index {name}: {store.index.ntotal} -> {compacted.index.ntotal} vectors "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        return True
+
+    def maybe_compact(self, name: str, key_field: str = "id") -> bool:
+        """Compact an index if tombstones or segment count crossed the thresholds"""
+        try:
+            self.reload_if_changed(name)
+            if self.needs_compaction(name):
+                return self.compact(name, key_field)
+        except Exception as e:
+            logger.error(f"Error compacting index {name}: {str(e)}")
+        return False
+
+    def _swap(self, name: str, store: FAISS, version: str, manifest: Optional[Dict[str, Any]] = None) -> IndexSnapshot:
+        live_ids = (
+            frozenset(entry["id"] for entry in manifest["documents"].values())
+            if manifest is not None else None
+        )
+        snapshot = IndexSnapshot(
+            name=name, store=store, version=version, loaded_at=time.time(),
+            manifest=manifest, live_ids=live_ids
+        )
+        self._snapshots[name] = snapshot
+        return snapshot
+
+    def set_filter_records(self, name: str, records: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Replace the database-sourced filter values for an index and rebuild its
+        columns for the current snapshot. Later versions reuse these records.
+        """
+        self._filter_records[name] = records
+        snapshot = self._snapshots.get(name)
+        if snapshot is not None:
+            self._filter_columns[name] = build_filter_columns(snapshot, records)
+
+    def filter_columns(self, name: str) -> Optional[FilterColumns]:
+        """Return filter columns matching the current snapshot, building them if stale"""
+        snapshot = self._snapshots.get(name)
+        if snapshot is None:
+            return None
+        columns = self._filter_columns.get(name)
+        if columns is None or columns.version != snapshot.version:
+            columns = build_filter_columns(snapshot, self._filter_records.get(name))
+            self._filter_columns[name] = columns
+        return columns
+
+    def filtered_search(
+        self,
+        name: str,
+        query: str,
+        limit: int,
+        min_relevance: Optional[float] = None,
+        domains: Optional[List[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> List[Document]:
+        """
+        Nearest neighbours of ``query`` that pass the filter columns.
+
+        The first fetch is sized from the filter selectivity and doubled until
+        at least ``limit`` allowed hits are found or the whole index has been
+        scanned. All allowed hits from the final fetch are returned in
+        similarity order so callers can drop ones failing exact re-checks.
+        """
+        snapshot = self._snapshots.get(name)
+        if snapshot is None:
+            return []
+        columns = self.filter_columns(name)
+        store = snapshot.store
+        ntotal = store.index.ntotal
+
+        allowed = columns.mask(min_relevance, domains, start_date, end_date)
+        allowed_count = int(allowed.sum())
+        if allowed_count == 0 or limit <= 0:
+            return []
+
+        embedding = np.array([store._embed_query(query)], dtype=np.float32)
+        if getattr(store, "_normalize_L2", False):
+            import faiss
+            faiss.normalize_L2(embedding)
+
+        k = min(ntotal, max(limit, math.ceil(limit * ntotal / allowed_count * FILTER_OVERFETCH_FACTOR)))
+        while True:
+            _, positions = store.index.search(embedding, k)
+            hits = [int(p) for p in positions[0] if p >= 0 and allowed[p]]
+            if len(hits) >= limit or k >= ntotal:
+                break
+            k = min(ntotal, k * 2)
+
+        documents = []
+        for position in hits:
+            document = store.docstore.search(store.index_to_docstore_id[position])
+            if isinstance(document, Document):
+                documents.append(document)
+        return documents
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {}
+        for name, snapshot in self._snapshots.items():
+            columns = self._filter_columns.get(name)
+            stats[name] = {
+                "version": snapshot.version,
+                "vectors": snapshot.store.index.ntotal,
+                "tombstones": snapshot.tombstones,
+                "segments": len((snapshot.manifest or {}).get("segments", [])),
+                "loaded_at": snapshot.loaded_at,
+                "filter_columns": columns is not None and columns.version == snapshot.version,
+            }
+        return stats
+
+
+index_manager = IndexManager()
@@ -7,6 +7,25 @@ import html2canvas from 'html2canvas';
 // API base URL - change this to match your backend URL
 const API_BASE_URL = 'http://localhost:8000';
 
+// Report sections as streamed by /analysis/stream, mapped to stored report fields
+const STREAMED_SECTIONS = {
+  'Executive Summary': 'executive_summary',
+  'Key Climate Risk Developments': 'key_developments',
+  'Insurance Domain Impacts': 'insurance_domain_impacts',
+  'Regional Insights': 'regional_insights',
+  'Regulatory Landscape': 'regulatory_landscape',
+  'Business Implications': 'business_implications',
+  'Recommended Actions': 'recommended_actions'
+};
+
+// Progress messages for pipeline stage events
+const STAGE_MESSAGES = {
+  scraped: (data) => `Scraped ${data.count} new articles`,
+  relevant: (data) => `Found ${data.count} relevant articles out of ${data.analyzed}`,
+  extracted: (data) => `Extracted ${data.count} new summaries (${data.total} total)`,
+  summaries: (data) => `Writing report from ${data.count} summaries...`
+};
+
 const EnterpriseReportSection = () => {
   // State
   const [reports, setReports] = useState([]);
@@ -14,13 +33,17 @@ const EnterpriseReportSection = () => {
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState(null);
   const [visibleSection, setVisibleSection] = useState('all');
+  const [progressMessage, setProgressMessage] = useState(null);
 
   // Ref for PDF generation
   const reportRef = useRef();
+  // Open analysis event stream, if any
+  const streamRef = useRef(null);
 
   // Fetch reports on component mount
   useEffect(() => {
     fetchReports();
+    return () => streamRef.current?.close();
   }, []);
 
   // Fetch reports from the backend
@@ -190,37 +213,68 @@ const EnterpriseReportSection = () => {
     }
   };
 
-  // Trigger a new report generation
-  const generateNewReport = async () => {
-    if (window.confirm('Generate a new climate risk report? This may take a few minutes.')) {
-      setIsLoading(true);
-      try {
-        const response = await fetch(`${API_BASE_URL}/analysis/run`, {
-          method: 'POST',
-          headers: {
-            'Content-Type': 'application/json'
-          },
-          body: JSON.stringify({ run_full_pipeline: true })
-        });
-        
-        if (!response.ok) {
-          throw new Error(`Failed to start analysis: ${response.status}`);
-        }
-        
-        const data = await response.json();
-        alert(`Analysis started with task ID: ${data.task_id}. This may take several minutes to complete.`);
-        
-        // Set a timer to check for the new report after a delay
-        setTimeout(() => {
-          fetchLatestReport();
-        }, 10000); // Check after 10 seconds initially
-        
-      } catch (err) {
-        console.error("Error starting analysis:", err);
-        setError(`Failed to start analysis. ${err.message}`);
-        setIsLoading(false);
-      }
+  // Trigger a new report generation and follow its progress over server-sent events
+  const generateNewReport = () => {
+    if (!window.confirm('Generate a new climate risk report? This may take a few minutes.')) {
+      return;
     }
+    streamRef.current?.close();
+    setIsLoading(true);
+    setError(null);
+    setProgressMessage('Starting analysis...');
+
+    const source = new EventSource(`${API_BASE_URL}/analysis/stream`);
+    streamRef.current = source;
+    let streamingReport = null;
+
+    const finish = () => {
+      source.close();
+      streamRef.current = null;
+      setProgressMessage(null);
+      setIsLoading(false);
+    };
+
+    source.addEventListener('stage', (event) => {
+      const data = JSON.parse(event.data);
+      const message = STAGE_MESSAGES[data.stage];
+      setProgressMessage(message ? message(data) : data.stage);
+    });
+
+    source.addEventListener('section', (event) => {
+      const { section, text } = JSON.parse(event.data);
+      const field = STREAMED_SECTIONS[section];
+      if (!field) return;
+      if (!streamingReport) {
+        streamingReport = {
+          generated_date: new Date().toISOString(),
+          article_count: 0,
+          sources: []
+        };
+      }
+      streamingReport = { ...streamingReport, [field]: (streamingReport[field] || '') + text };
+      setCurrentReport(streamingReport);
+    });
+
+    source.addEventListener('reset', () => {
+      // The report is being regenerated; its sections stream again from the start
+      streamingReport = null;
+    });
+
+    source.addEventListener('report', () => {
+      // Replace the streamed text with the stored report
+      fetchReports();
+    });
+
+    source.addEventListener('error', (event) => {
+      // Server-sent "error" events carry data; a dropped connection doesn't
+      const message = event.data ? JSON.parse(event.data).message : 'Lost connection to the analysis stream';
+      console.error("Analysis stream error:", message);
+      setError(`Report generation failed: ${message}`);
+      // Closing stops EventSource from reconnecting, which would start another run
+      finish();
+    });
+
+    source.addEventListener('done', finish);
   };
 
   // Format report date
@@ -237,33 +291,6 @@ const EnterpriseReportSection = () => {
     }
   };
 
-  // Check if the report is ready
-  const checkReportStatus = async (taskId) => {
-    try {
-      const response = await fetch(`${API_BASE_URL}/analysis/task/${taskId}`);
-      if (!response.ok) {
-        throw new Error(`Failed to check task status: ${response.status}`);
-      }
-      
-      const data = await response.json();
-      
-      if (data.status === 'completed') {
-        // Task is done, fetch the latest report
-        fetchLatestReport();
-      } else if (data.status === 'failed') {
-        setError(`Report generation failed: ${data.error || 'Unknown error'}`);
-        setIsLoading(false);
-      } else {
-        // Task is still running, check again after a delay
-        setTimeout(() => checkReportStatus(taskId), 5000); // Check every 5 seconds
-      }
-    } catch (err) {
-      console.error("Error checking task status:", err);
-      setError(`Failed to check task status. ${err.message}`);
-      setIsLoading(false);
-    }
-  };
-
   // Handle report selection
   const handleReportSelect = (report) => {
     setCurrentReport(report);
@@ -290,8 +317,9 @@ const EnterpriseReportSection = () => {
   // Render loading state
   if (isLoading && !currentReport) {
     return (
-      <div className="flex justify-center items-center min-h-[400px]">
+      <div className="flex flex-col justify-center items-center min-h-[400px]">
         <div className="animate-spin rounded-full h-12 w-12 border-t-2 border-b-2 border-blue-500"></div>
+        {progressMessage && <p className="mt-4 text-gray-600">{progressMessage}</p>}
       </div>
     );
   }
@@ -358,6 +386,14 @@ const EnterpriseReportSection = () => {
           </div>
         </div>
         
+        {/* Analysis progress */}
+        {progressMessage && (
+          <div className="mb-6 flex items-center text-sm text-blue-700 bg-blue-50 border border-blue-200 rounded-md px-4 py-2">
+            <RefreshCw className="h-4 w-4 mr-2 animate-spin" />
+            {progressMessage}
+          </div>
+        )}
+        
         {/* Report Selection */}
         {reports.length > 1 && (
           <div className="mb-6">